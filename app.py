@@ -1,10 +1,13 @@
 import asyncio
 import json
+import logging
 import os
+import sys
 import time
 from datetime import date
 from typing import List
 
+import numpy as np
 import pandas as pd
 from shiny import App, reactive, render, ui
 from shiny.types import SilentException
@@ -25,34 +28,39 @@ from config import (
     DEFAULT_SHEET_ID,
     LONDON_MASK_KML,
     ONE_WAY_DASH,
+    STATIC_DIR,
+    STATIC_URL_PATH,
     CHOICES,
     MAP_COLORS,
     TOOLTIP_TEXT,
     get_route_style,
     logger,
 )
-from data_io import get_access_table_once, get_gspread_client, list_regions, read_region_sheet, write_region_sheet
+from data_io import get_access_table_once, get_gspread_client, list_regions_cached, read_region_sheet, write_region_sheet
 from data_processing import (
+    cached_length_m,
     coords_to_ewkt,
+    frame_fingerprint,
+    frame_lengths_m,
     generate_route_id,
     line_length_m,
     normalize_linebreaks,
-    normalize_bool,
+    normalize_bool_series,
     polyline_color,
     prepare_routes_df,
     reverse_geocode_name,
     update_history,
 )
-from geo_utils import clip_coords_to_borough, load_kml_geometries
+from geo_utils import clip_coords_to_borough, load_kml_geometries_cached
 from map_folium import build_map
 from time_utils import today_string
 from ui_layout import build_app_ui
-from grid_page import GRID_PAGE_SIZE, grid_input_ids, render_grid
-from changes_page import render_changes
+from grid_page import GRID_PAGE_SIZE, build_grid_pager, grid_input_ids, render_grid
+from changes_page import CHANGES_PAGE_SIZE, render_changes
 from suggestions_page import render_suggestions_view
 from server_grid import register_grid_actions
-from server_highlight import compute_highlight, register_highlight_handlers
-from change_tracking import compute_change_summary, compute_row_status
+from server_highlight import compute_highlight, highlight_guid_set, register_highlight_handlers
+from change_tracking import compute_change_rows, compute_change_summary, compute_row_status
 from server_map import register_map_outputs
 from server_selection import register_selection_handlers
 from server_regions import register_region_handlers
@@ -82,6 +90,7 @@ def server(input, output, session):
     authenticated = reactive.Value(False)
     allowed_regions = reactive.Value([])
     access_table = reactive.Value(pd.DataFrame())
+    sheet_regions_state = reactive.Value(None)
     boroughs_state = reactive.Value({})
     london_mask_state = reactive.Value(None)
     last_edit_payload = reactive.Value("")
@@ -102,6 +111,8 @@ def server(input, output, session):
     region_pref_timeout_started = reactive.Value(False)
     region_select_synced = reactive.Value(False)
     changes_open_state = reactive.Value(["changed", "added", "removed"])
+    default_changes_limits = {"changed": CHANGES_PAGE_SIZE, "added": CHANGES_PAGE_SIZE, "removed": CHANGES_PAGE_SIZE}
+    changes_limit_state = reactive.Value(dict(default_changes_limits))
     reports_zip_path = reactive.Value(None)
     reports_tmp_dir = reactive.Value(None)
     reports_filename = reactive.Value("healthy-streets-report.zip")
@@ -154,31 +165,31 @@ def server(input, output, session):
         return loading_message.get()
 
     def _input_value(input_obj, input_id: str):
-        try:
-            return input_obj[input_id]()
-        except Exception:
+        # `in` checks Value.is_set(), so unsent inputs return None without
+        # raising (and catching) a SilentException per cell.
+        if input_id not in input_obj:
             return None
+        return input_obj[input_id]()
 
     def set_map_state(df: pd.DataFrame, reason: str) -> None:
-        try:
-            import inspect
-
-            caller = inspect.stack()[1]
-            logger.info(
-                "map_state.set reason=%s caller=%s:%s",
-                reason,
-                caller.filename,
-                caller.lineno,
-            )
-        except Exception:
-            logger.info("map_state.set reason=%s", reason)
+        if logger.isEnabledFor(logging.INFO):
+            try:
+                caller = sys._getframe(1)
+                logger.info(
+                    "map_state.set reason=%s caller=%s:%s",
+                    reason,
+                    caller.f_code.co_filename,
+                    caller.f_lineno,
+                )
+            except Exception:
+                logger.info("map_state.set reason=%s", reason)
         map_state.set(df)
 
     @reactive.effect
-    def _init_access_table():
+    async def _init_access_table():
         if AUTO_LOGIN_ENABLED and not authenticated.get():
             try:
-                all_regions = list_regions(DEFAULT_SHEET_ID)
+                all_regions = await asyncio.to_thread(list_regions_cached, DEFAULT_SHEET_ID)
             except Exception:
                 all_regions = []
             allowed_regions.set(all_regions)
@@ -187,7 +198,7 @@ def server(input, output, session):
             logger.info("Auto-login enabled (debugger detected).")
             return
         loading_message.set("Loading access table...")
-        access_table.set(get_access_table_once())
+        access_table.set(await asyncio.to_thread(get_access_table_once))
         loading_active.set(False)
 
     @reactive.effect
@@ -197,11 +208,11 @@ def server(input, output, session):
         loading_message.set("Loading borough boundaries...")
         try:
             logger.info("Loading borough shapes from %s", BOROUGHS_KML)
-            borough_geoms = {name: geom for name, geom in load_kml_geometries(BOROUGHS_KML) if name}
+            borough_geoms = {name: geom for name, geom in load_kml_geometries_cached(BOROUGHS_KML) if name}
             logger.info("Loaded %d borough geometries", len(borough_geoms))
             loading_message.set("Loading London mask...")
             logger.info("Loading London mask from %s", LONDON_MASK_KML)
-            london_shapes = load_kml_geometries(LONDON_MASK_KML)
+            london_shapes = load_kml_geometries_cached(LONDON_MASK_KML)
             london_geom = london_shapes[0][1] if london_shapes else None
             boroughs_state.set(borough_geoms)
             london_mask_state.set(london_geom)
@@ -229,7 +240,7 @@ def server(input, output, session):
 
     @reactive.effect
     @reactive.event(input.login_ok)
-    def _handle_login():
+    async def _handle_login():
         if AUTO_LOGIN_ENABLED:
             return
         name = (input.login_name() or "").strip()
@@ -245,7 +256,7 @@ def server(input, output, session):
         if access_df.empty:
             try:
                 logger.info("Access table empty. Reloading access table.")
-                access_df = get_access_table_once()
+                access_df = await asyncio.to_thread(get_access_table_once)
                 access_table.set(access_df)
             except Exception:
                 logger.exception("Failed to reload access table.")
@@ -254,9 +265,13 @@ def server(input, output, session):
             logger.warning("Access table invalid or missing columns.")
             ui.notification_show("Password list unavailable", type="error")
             return
-        access_df = access_df.copy()
-        access_df["Password"] = access_df["Password"].astype(str).str.strip()
-        access_df["Region"] = access_df["Region"].astype(str).str.strip()
+        # The cached access table is shared; work on the two columns needed.
+        access_df = pd.DataFrame(
+            {
+                "Password": access_df["Password"].astype(str).str.strip(),
+                "Region": access_df["Region"].astype(str).str.strip(),
+            }
+        )
         matched = access_df.loc[access_df["Password"] == password]
         if len(matched) != 1:
             logger.warning("Password not recognised for name=%s", name)
@@ -273,11 +288,25 @@ def server(input, output, session):
         ui.modal_remove()
         ui.notification_show(f"Welcome {name}", type="message")
 
+    @reactive.effect
+    async def _load_sheet_regions():
+        if not authenticated.get():
+            return
+        if sheet_regions_state.get() is not None:
+            return
+        try:
+            values = await asyncio.to_thread(list_regions_cached, DEFAULT_SHEET_ID)
+        except Exception:
+            logger.exception("Failed to list regions.")
+            values = []
+        logger.info("Loaded %d sheet regions", len(values))
+        sheet_regions_state.set(values)
+
     @reactive.calc
     def regions() -> List[str]:
         if not authenticated.get():
             return []
-        sheet_regions = list_regions(DEFAULT_SHEET_ID)
+        sheet_regions = sheet_regions_state.get() or []
         allowed = allowed_regions.get()
         if not allowed:
             return []
@@ -376,7 +405,7 @@ def server(input, output, session):
             "name": _normalize_optional(row.get("name", "")),
             "designation": _normalize_optional(row.get("Designation", "")),
             "id": _normalize_optional(row.get("id", "")),
-            "description": normalize_linebreaks(row.get("description", "")),
+            "description": str(row.get("description", "") or ""),
             "oneway": _normalize_optional(row.get("OneWay", "TwoWay")) or "TwoWay",
             "flow": _normalize_optional(row.get("Flow", "")),
             "protection": _normalize_optional(row.get("Protection", "")),
@@ -525,12 +554,123 @@ def server(input, output, session):
         logger=logger,
     )
 
-    @reactive.effect
-    def _apply_grid_edits():
+    # Grid input key -> (column, is_bool). One watcher per cell on the current
+    # page writes back only that cell, so a page of edits never rescans the
+    # whole slice.
+    grid_cell_fields = {
+        "name": ("name", False),
+        "designation": ("Designation", False),
+        "id": ("id", False),
+        "oneway": ("OneWay", False),
+        "flow": ("Flow", False),
+        "protection": ("Protection", False),
+        "owner": ("Ownership", False),
+        "audit_sv": ("AuditedStreetView", True),
+        "audit_ip": ("AuditedInPerson", True),
+        "rejected": ("Rejected", True),
+    }
+    grid_cell_watchers = {"guids": None, "effects": []}
+
+    def _apply_grid_cell(guid: str, key: str, value) -> None:
+        column, is_bool = grid_cell_fields[key]
         df_current = data_state.get()
         if df_current.empty:
             return
+        matches = df_current.index[df_current["guid"] == guid]
+        if len(matches) == 0:
+            return
+        current = df_current.at[matches[0], column]
+        if is_bool:
+            if bool(current) == bool(value):
+                return
+            new_value = bool(value)
+        else:
+            if str(current) == str(value):
+                return
+            new_value = str(value)
         df = df_current.copy()
+        df.loc[df["guid"] == guid, column] = new_value
+        logger.info("Grid edit %s guid=%s value=%s", column, guid, new_value)
+        df = update_history(df, guid, current_user.get())
+        try:
+            updated_row = df.loc[df["guid"] == guid].iloc[0]
+            style_payload = {
+                "guid": guid,
+                "style": {
+                    "color": polyline_color(updated_row, _current_route_colors()),
+                    "dashArray": ONE_WAY_DASH if updated_row.get("OneWay") == "OneWay" else None,
+                    "weight": _current_route_weight(),
+                },
+                "properties": {
+                    "OneWay": updated_row.get("OneWay"),
+                    "Rejected": bool(updated_row.get("Rejected", False)),
+                    "AuditedStreetView": bool(updated_row.get("AuditedStreetView", False)),
+                    "AuditedInPerson": bool(updated_row.get("AuditedInPerson", False)),
+                    "name": updated_row.get("name", ""),
+                    "Length_m": cached_length_m(updated_row),
+                },
+            }
+            send_custom(session, "hss_update_style", style_payload)
+            with reactive.isolate():
+                try:
+                    highlight_date = input.highlight_date()
+                except SilentException:
+                    highlight_date = None
+                try:
+                    highlight_owner = input.highlight_owner()
+                except SilentException:
+                    highlight_owner = None
+                try:
+                    highlight_audit = input.highlight_audit()
+                except SilentException:
+                    highlight_audit = None
+            grid_guids, dim_opacity, _, _, _, highlight_active = compute_highlight(
+                df=df,
+                mode=input.highlight_mode(),
+                since_value=highlight_date,
+                owner_value=highlight_owner,
+                audit_value=highlight_audit,
+                dim_percent=highlight_dim_state.get(),
+            )
+            grid_opacity = 0.9
+            if highlight_active and guid not in highlight_guid_set(grid_guids):
+                grid_opacity = dim_opacity
+            send_custom(
+                session,
+                "hss_update_minimap",
+                {
+                    "guid": guid,
+                    "color": polyline_color(updated_row, MAP_COLORS),
+                    "dash": ONE_WAY_DASH if updated_row.get("OneWay") == "OneWay" else "",
+                    "opacity": grid_opacity,
+                },
+            )
+            logger.info("Grid edit: sent hss_update_minimap guid=%s dash=%s opacity=%s", guid, ONE_WAY_DASH if updated_row.get("OneWay") == "OneWay" else "", grid_opacity)
+        except Exception:
+            logger.exception("Failed to send style update for grid edit guid=%s", guid)
+
+        if selected_guid.get() == guid:
+            selected_snapshot.set(_payload_from_row(updated_row))
+
+        data_state.set(df)
+        _sync_changes_flag(df)
+        logger.info("Grid edits applied: sending hss_refresh_minimaps")
+        send_custom(session, "hss_refresh_minimaps", {"changed": True})
+
+    def _make_grid_cell_watcher(guid: str, key: str, input_id: str):
+        @reactive.effect
+        @reactive.event(input[input_id], ignore_init=True)
+        def _watch_grid_cell():
+            value = _input_value(input, input_id)
+            if value is None:
+                return
+            _apply_grid_cell(guid, key, value)
+
+        return _watch_grid_cell
+
+    @reactive.effect
+    def _sync_grid_cell_watchers():
+        df_current = data_state.get()
         page = input.grid_page() or 1
         try:
             page = int(page)
@@ -538,125 +678,19 @@ def server(input, output, session):
             page = 1
         start = max(page - 1, 0) * GRID_PAGE_SIZE
         end = start + GRID_PAGE_SIZE
-        slice_rows = df_current.iloc[start:end]
-        changed = False
-        for _, row in slice_rows.iterrows():
-            guid = row.get("guid")
-            if not guid:
-                continue
+        guids = tuple(g for g in df_current["guid"].iloc[start:end] if g) if not df_current.empty else ()
+        if guids == grid_cell_watchers["guids"]:
+            return
+        for effect in grid_cell_watchers["effects"]:
+            effect.destroy()
+        effects = []
+        for guid in guids:
             ids = grid_input_ids(guid)
-            name = _input_value(input, ids["name"])
-            designation = _input_value(input, ids["designation"])
-            rid = _input_value(input, ids["id"])
-            oneway = _input_value(input, ids["oneway"])
-            flow = _input_value(input, ids["flow"])
-            protection = _input_value(input, ids["protection"])
-            owner = _input_value(input, ids["owner"])
-            audit_sv = _input_value(input, ids["audit_sv"])
-            audit_ip = _input_value(input, ids["audit_ip"])
-            rejected = _input_value(input, ids["rejected"])
-
-            row_changed = False
-            if name is not None and str(row.get("name", "")) != str(name):
-                df.loc[df["guid"] == guid, "name"] = str(name)
-                row_changed = True
-            if designation is not None and str(row.get("Designation", "")) != str(designation):
-                df.loc[df["guid"] == guid, "Designation"] = str(designation)
-                row_changed = True
-            if rid is not None and str(row.get("id", "")) != str(rid):
-                df.loc[df["guid"] == guid, "id"] = str(rid)
-                row_changed = True
-            if oneway is not None and str(row.get("OneWay", "")) != str(oneway):
-                df.loc[df["guid"] == guid, "OneWay"] = str(oneway)
-                row_changed = True
-                logger.info("Grid edit OneWay guid=%s value=%s", guid, oneway)
-            if flow is not None and str(row.get("Flow", "")) != str(flow):
-                df.loc[df["guid"] == guid, "Flow"] = str(flow)
-                row_changed = True
-            if protection is not None and str(row.get("Protection", "")) != str(protection):
-                df.loc[df["guid"] == guid, "Protection"] = str(protection)
-                row_changed = True
-            if owner is not None and str(row.get("Ownership", "")) != str(owner):
-                df.loc[df["guid"] == guid, "Ownership"] = str(owner)
-                row_changed = True
-            if audit_sv is not None and bool(row.get("AuditedStreetView", False)) != bool(audit_sv):
-                df.loc[df["guid"] == guid, "AuditedStreetView"] = bool(audit_sv)
-                row_changed = True
-            if audit_ip is not None and bool(row.get("AuditedInPerson", False)) != bool(audit_ip):
-                df.loc[df["guid"] == guid, "AuditedInPerson"] = bool(audit_ip)
-                row_changed = True
-            if rejected is not None and bool(row.get("Rejected", False)) != bool(rejected):
-                df.loc[df["guid"] == guid, "Rejected"] = bool(rejected)
-                row_changed = True
-
-            if row_changed:
-                df = update_history(df, guid, current_user.get())
-                changed = True
-                try:
-                    updated_row = df.loc[df["guid"] == guid].iloc[0]
-                    style_payload = {
-                        "guid": guid,
-                        "style": {
-                            "color": polyline_color(updated_row, _current_route_colors()),
-                            "dashArray": ONE_WAY_DASH if updated_row.get("OneWay") == "OneWay" else None,
-                            "weight": _current_route_weight(),
-                        },
-                        "properties": {
-                            "OneWay": updated_row.get("OneWay"),
-                            "Rejected": bool(updated_row.get("Rejected", False)),
-                            "AuditedStreetView": bool(updated_row.get("AuditedStreetView", False)),
-                            "AuditedInPerson": bool(updated_row.get("AuditedInPerson", False)),
-                            "name": updated_row.get("name", ""),
-                            "Length_m": int(round(line_length_m(updated_row.get("_coords") or []))),
-                        },
-                    }
-                    send_custom(session, "hss_update_style", style_payload)
-                    with reactive.isolate():
-                        try:
-                            highlight_date = input.highlight_date()
-                        except SilentException:
-                            highlight_date = None
-                        try:
-                            highlight_owner = input.highlight_owner()
-                        except SilentException:
-                            highlight_owner = None
-                        try:
-                            highlight_audit = input.highlight_audit()
-                        except SilentException:
-                            highlight_audit = None
-                    grid_guids, dim_opacity, _, _, _, highlight_active = compute_highlight(
-                        df=df,
-                        mode=input.highlight_mode(),
-                        since_value=highlight_date,
-                        owner_value=highlight_owner,
-                        audit_value=highlight_audit,
-                        dim_percent=highlight_dim_state.get(),
-                    )
-                    grid_opacity = 0.9
-                    if highlight_active and guid not in set(grid_guids):
-                        grid_opacity = dim_opacity
-                    send_custom(
-                        session,
-                        "hss_update_minimap",
-                        {
-                            "guid": guid,
-                            "color": polyline_color(updated_row, MAP_COLORS),
-                            "dash": ONE_WAY_DASH if updated_row.get("OneWay") == "OneWay" else "",
-                            "opacity": grid_opacity,
-                        },
-                    )
-                    logger.info("Grid edit: sent hss_update_minimap guid=%s dash=%s opacity=%s", guid, ONE_WAY_DASH if updated_row.get("OneWay") == "OneWay" else "", grid_opacity)
-                except Exception:
-                    logger.exception("Failed to send style update for grid edit guid=%s", guid)
-
-                if selected_guid.get() == guid:
-                    selected_snapshot.set(_payload_from_row(updated_row))
-
-        if changed:
-            data_state.set(df)
-            _sync_changes_flag(df)
-            logger.info("Grid edits applied: sending hss_refresh_minimaps")
-            send_custom(session, "hss_refresh_minimaps", {"changed": True})
+            for key in grid_cell_fields:
+                effects.append(_make_grid_cell_watcher(guid, key, ids[key]))
+        grid_cell_watchers["guids"] = guids
+        grid_cell_watchers["effects"] = effects
+        logger.info("Grid cell watchers: page=%s rows=%s effects=%s", page, len(guids), len(effects))
 
     register_map_outputs(
         input=input,
@@ -714,7 +748,7 @@ def server(input, output, session):
             ui.input_text_area(
                 "edit_description",
                 _label("Comments", "comment"),
-                value=normalize_linebreaks(row.get("description", "")),
+                value=str(row.get("description", "") or ""),
                 rows=5,
             ),
             ui.input_select(
@@ -829,7 +863,7 @@ def server(input, output, session):
                     "AuditedStreetView": bool(row.get("AuditedStreetView", False)),
                     "AuditedInPerson": bool(row.get("AuditedInPerson", False)),
                     "name": row.get("name", ""),
-                    "Length_m": int(round(line_length_m(row.get("_coords") or []))),
+                    "Length_m": cached_length_m(row),
                 },
             }
             logger.info("Send style update guid=%s payload=%s", guid, style_payload)
@@ -853,31 +887,31 @@ def server(input, output, session):
         changes_made.set(True)
         ui.notification_show("Route deleted.", type="message")
 
+    distance_cache = {"fp": None, "value": (0.0, 0.0, 0.0)}
+
+    def _distance_totals(df: pd.DataFrame):
+        fp = frame_fingerprint(df, ["OneWay", "Rejected", "_length_m"])
+        if fp == distance_cache["fp"]:
+            return distance_cache["value"]
+        if "Rejected" in df.columns:
+            df = df.loc[~normalize_bool_series(df["Rejected"])]
+        lengths = frame_lengths_m(df)
+        two_way_mask = (df["OneWay"] == "TwoWay").to_numpy(dtype=bool) if "OneWay" in df.columns else np.zeros(len(df), dtype=bool)
+        two_way = float(lengths[two_way_mask].sum())
+        one_way = float(lengths[~two_way_mask].sum())
+        total = one_way + 2 * two_way
+        value = (round(one_way / 1000, 2), round(two_way / 1000, 2), round(total / 1000, 2))
+        distance_cache["fp"] = fp
+        distance_cache["value"] = value
+        return value
+
     @output
     @render.ui
     def distance_boxes():
         df = data_state.get()
         if df.empty:
             return ui.TagList()
-        if "Rejected" in df.columns:
-            df = df.loc[~df["Rejected"].apply(normalize_bool)]
-        one_way = 0.0
-        two_way = 0.0
-        total_rows = len(df.index)
-        rows_with_coords = 0
-        for _, row in df.iterrows():
-            coords = row.get("_coords")
-            if coords:
-                rows_with_coords += 1
-            length = line_length_m(coords) if coords else 0.0
-            if row.get("OneWay") == "TwoWay":
-                two_way += length
-            else:
-                one_way += length
-        total = one_way + 2 * two_way
-        one_km = round(one_way / 1000, 2)
-        two_km = round(two_way / 1000, 2)
-        total_km = round(total / 1000, 2)
+        one_km, two_km, total_km = _distance_totals(df)
         return ui.tags.ul(
             ui.tags.li(
                 ui.tags.span("One-way", class_="metric-label"),
@@ -919,15 +953,24 @@ def server(input, output, session):
         added, removed, changed = compute_change_summary(baseline_state.get(), df)
         changes_made.set((added + removed + changed) > 0)
 
+    # (row count, page count) for the grid. A reactive.Value only invalidates
+    # its readers when the tuple changes, so cell edits that leave the row
+    # count alone do not re-render the pager or page info.
+    grid_totals = reactive.Value((0, 1))
+
+    @reactive.effect
+    def _sync_grid_totals():
+        df = data_state.get()
+        total = 0 if df.empty else len(df.index)
+        grid_totals.set((total, max(1, (total + GRID_PAGE_SIZE - 1) // GRID_PAGE_SIZE)))
+
     @output
     @render.text
     def grid_page_info():
         try:
-            df = data_state.get()
-            if df.empty:
+            total, total_pages = grid_totals.get()
+            if total == 0:
                 return "0 routes"
-            total = len(df.index)
-            total_pages = max(1, (total + GRID_PAGE_SIZE - 1) // GRID_PAGE_SIZE)
             page = input.grid_page() or 1
             return f"Page {page} of {total_pages} ({total} routes)"
         except Exception:
@@ -953,49 +996,16 @@ def server(input, output, session):
     @render.ui
     def grid_pager():
         try:
-            df = data_state.get()
-            if df.empty:
+            total, total_pages = grid_totals.get()
+            if total == 0:
                 return ui.tags.div()
-            total = len(df.index)
-            total_pages = max(1, (total + GRID_PAGE_SIZE - 1) // GRID_PAGE_SIZE)
             page = input.grid_page() or 1
             try:
                 page = int(page)
             except Exception:
                 page = 1
             page = max(1, min(page, total_pages))
-
-            window = 2
-            start = max(1, page - window)
-            end = min(total_pages, page + window)
-            pages = list(range(start, end + 1))
-
-            def page_item(label, target=None, active=False, disabled=False):
-                cls = "page-item"
-                if active:
-                    cls += " active"
-                if disabled:
-                    cls += " disabled"
-                if target is None or disabled:
-                    return ui.tags.li(ui.tags.span(label, class_="page-link"), class_=cls)
-                return ui.tags.li(
-                    ui.tags.a(label, class_="page-link", href="#", onclick=f"hssSetGridPage({target}); return false;"),
-                    class_=cls,
-                )
-
-            items = [
-                page_item("«", 1, disabled=(page == 1)),
-                page_item("‹", page - 1, disabled=(page == 1)),
-            ]
-            for p in pages:
-                items.append(page_item(str(p), p, active=(p == page)))
-            items.extend(
-                [
-                    page_item("›", page + 1, disabled=(page == total_pages)),
-                    page_item("»", total_pages, disabled=(page == total_pages)),
-                ]
-            )
-            return ui.tags.nav(ui.tags.ul(*items, class_="pagination pagination-sm mb-0"))
+            return build_grid_pager(page, total_pages)
         except Exception:
             logger.exception("Grid pager failed")
             return ui.tags.div()
@@ -1049,51 +1059,7 @@ def server(input, output, session):
         )
         if df.empty and baseline.empty:
             return ui.tags.div("No changes yet.")
-        current_ids = set(df["guid"].astype(str)) if not df.empty else set()
-        baseline_ids = set(baseline["guid"].astype(str)) if not baseline.empty else set()
-
-        created_rows = []
-        removed_rows = []
-        edited_pairs = []
-
-        created_ids = current_ids - baseline_ids
-        removed_ids = baseline_ids - current_ids
-        shared_ids = current_ids & baseline_ids
-
-        for guid in created_ids:
-            row = df.loc[df["guid"].astype(str) == guid].iloc[0]
-            created_rows.append(row)
-
-        for guid in removed_ids:
-            row = baseline.loc[baseline["guid"].astype(str) == guid].iloc[0]
-            removed_rows.append(row)
-
-        def _cell_equal(a, b) -> bool:
-            try:
-                if pd.isna(a) and pd.isna(b):
-                    return True
-            except Exception:
-                pass
-            if a is None and b is None:
-                return True
-            return a == b
-
-        compare_cols = [
-            c for c in df.columns
-            if c in baseline.columns and c not in {"History", "LastEdited", "WhenCreated"}
-        ]
-
-        def _row_changed(a, b):
-            for key in compare_cols:
-                if not _cell_equal(a.get(key), b.get(key)):
-                    return True
-            return False
-
-        for guid in shared_ids:
-            before_row = baseline.loc[baseline["guid"].astype(str) == guid].iloc[0]
-            after_row = df.loc[df["guid"].astype(str) == guid].iloc[0]
-            if _row_changed(before_row, after_row):
-                edited_pairs.append((before_row, after_row))
+        edited_pairs, created_rows, removed_rows = compute_change_rows(baseline, df)
         logger.info(
             "Changes view counts: created=%s removed=%s edited=%s",
             len(created_rows),
@@ -1134,8 +1100,26 @@ def server(input, output, session):
             route_colors=_current_route_colors(),
             route_weight=_current_route_weight(),
             open_panels=changes_open_state.get(),
+            limits=changes_limit_state.get(),
         )
 
+    @reactive.effect
+    @reactive.event(input.changes_load_more)
+    def _load_more_changes():
+        payload = input.changes_load_more() or {}
+        group = payload.get("group")
+        limits = dict(changes_limit_state.get())
+        if group not in limits:
+            return
+        limits[group] += CHANGES_PAGE_SIZE
+        logger.info("Changes view: show more group=%s limit=%s", group, limits[group])
+        changes_limit_state.set(limits)
+
+    @reactive.effect
+    @reactive.event(baseline_state)
+    def _reset_changes_limits():
+        changes_limit_state.set(dict(default_changes_limits))
+
     @output
     @render.ui
     def suggestions_view():
@@ -1329,7 +1313,7 @@ def server(input, output, session):
                     "AuditedStreetView": bool(row.get("AuditedStreetView", False)),
                     "AuditedInPerson": bool(row.get("AuditedInPerson", False)),
                     "name": row.get("name", ""),
-                    "Length_m": int(round(line_length_m(row.get("_coords") or []))),
+                    "Length_m": cached_length_m(row),
                 },
             }
             send_custom(session, "hss_update_style", style_payload)
@@ -1355,7 +1339,7 @@ def server(input, output, session):
                 dim_percent=highlight_dim_state.get(),
             )
             grid_opacity = 0.9
-            if highlight_active and str(guid) not in set(grid_guids):
+            if highlight_active and str(guid) not in highlight_guid_set(grid_guids):
                 grid_opacity = dim_opacity
             send_custom(
                 session,
@@ -1526,4 +1510,4 @@ def server(input, output, session):
         finally:
             loading_active.set(False)
 
-app = App(app_ui, server)
+app = App(app_ui, server, static_assets={f"/{STATIC_URL_PATH}": STATIC_DIR})
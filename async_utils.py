@@ -14,7 +14,9 @@ def send_custom(
     """Safely dispatch send_custom_message from any context.
 
     Uses asyncio.create_task when in an event loop, otherwise schedules onto
-    the provided loop (or the current loop) with call_soon_threadsafe.
+    the provided loop (or the current loop). call_soon_threadsafe is only
+    needed when the target loop is running in another thread; a loop that is
+    not running has nobody to wake, so plain call_soon skips the self-pipe write.
     """
     if payload is None:
         payload = {}
@@ -23,6 +25,10 @@ def send_custom(
     except RuntimeError:
         if loop is None:
             loop = asyncio.get_event_loop()
-        loop.call_soon_threadsafe(lambda: asyncio.create_task(session.send_custom_message(msg_type, payload)))
+        callback = lambda: asyncio.create_task(session.send_custom_message(msg_type, payload))  # noqa: E731
+        if loop.is_running():
+            loop.call_soon_threadsafe(callback)
+        else:
+            loop.call_soon(callback)
         return
     asyncio.create_task(session.send_custom_message(msg_type, payload))
@@ -1,58 +1,175 @@
-from typing import Tuple
+from typing import Dict, List, Tuple
 
+import numpy as np
 import pandas as pd
 
+HISTORY_COLUMNS = {"History", "LastEdited", "WhenCreated"}
+# List-valued columns cannot be hashed by pandas; they are compared directly.
+LIST_COLUMNS = {"_coords"}
 
-def _cell_equal(a: object, b: object) -> bool:
-    try:
-        if pd.isna(a) and pd.isna(b):
-            return True
-    except Exception:
-        pass
-    if a is None and b is None:
-        return True
-    return a == b
 
+def _edited_mask(b_vals: np.ndarray, c_vals: np.ndarray) -> np.ndarray:
+    """Row mask where any cell differs; NaN/None on both sides counts as equal."""
+    diff = (b_vals != c_vals) & ~(pd.isna(b_vals) & pd.isna(c_vals))
+    return diff.any(axis=1)
 
-def compute_row_status(base: pd.DataFrame, cur: pd.DataFrame) -> dict:
+
+def _column_diff(b_col: pd.Series, c_col: pd.Series) -> np.ndarray:
+    """Cell mask where two aligned columns differ, on dense arrays when possible."""
+    if b_col.dtype == c_col.dtype and (
+        pd.api.types.is_bool_dtype(b_col.dtype) or pd.api.types.is_numeric_dtype(b_col.dtype)
+    ):
+        b_vals = b_col.to_numpy()
+        c_vals = c_col.to_numpy()
+        diff = b_vals != c_vals
+        if b_vals.dtype.kind == "f":
+            diff &= ~(np.isnan(b_vals) & np.isnan(c_vals))
+        return diff
+    return _edited_mask(
+        b_col.to_numpy(dtype=object)[:, None],
+        c_col.to_numpy(dtype=object)[:, None],
+    )
+
+
+def _confirm_edits(base: pd.DataFrame, cur: pd.DataFrame, cols: list, bp: np.ndarray, cp: np.ndarray) -> np.ndarray:
+    """Row mask of real edits among the aligned candidate rows, one column at a time.
+
+    Bool/numeric columns compare as dense arrays; only the remaining columns go
+    through object comparison. Rows already known to differ are skipped.
+    """
+    edited = np.zeros(len(bp), dtype=bool)
+    for col in cols:
+        pending = np.flatnonzero(~edited)
+        if not pending.size:
+            break
+        b_col = base[col].iloc[bp[pending]]
+        c_col = cur[col].iloc[cp[pending]]
+        edited[pending[_column_diff(b_col, c_col)]] = True
+    return edited
+
+
+# Per-frame derived data (guid positions, row hashes), keyed on id() with the
+# frame kept alive so the id cannot be reused. data_state frames are replaced
+# rather than mutated, so the baseline is indexed/hashed once per load and
+# each new current frame once. (df.attrs is not used: it survives .copy().)
+_FRAME_CACHE: Dict[Tuple[int, str], Tuple[pd.DataFrame, tuple, object]] = {}
+_FRAME_CACHE_SIZE = 8
+
+
+def _frame_memo(df: pd.DataFrame, kind: str, tag: tuple, build):
+    key = (id(df), kind)
+    cached = _FRAME_CACHE.get(key)
+    if cached is not None and cached[0] is df and cached[1] == tag:
+        return cached[2]
+    value = build()
+    if len(_FRAME_CACHE) >= _FRAME_CACHE_SIZE:
+        _FRAME_CACHE.pop(next(iter(_FRAME_CACHE)))
+    _FRAME_CACHE[key] = (df, tag, value)
+    return value
+
+
+def _guid_positions(df: pd.DataFrame) -> pd.Series:
+    """Map guid (as str) -> row position; the first row wins for duplicate guids."""
+    def build():
+        guids = df["guid"].astype(str)
+        keep = ~guids.duplicated().to_numpy()
+        return pd.Series(np.flatnonzero(keep), index=guids.to_numpy()[keep])
+
+    return _frame_memo(df, "guid_positions", (len(df),), build)
+
+
+def _row_hashes(df: pd.DataFrame, cols: list) -> np.ndarray:
+    """Return one uint64 content hash per row of ``df[cols]`` (positional)."""
+    def build():
+        if not cols:
+            return np.zeros(len(df), dtype=np.uint64)
+        return pd.util.hash_pandas_object(df[cols], index=False).to_numpy(dtype=np.uint64)
+
+    return _frame_memo(df, "row_hashes", tuple(cols), build)
+
+
+# One-entry memo keyed on frame identity. The frames are kept alive alongside
+# the key so their ids cannot be reused; data_state frames are replaced on
+# every edit rather than mutated in place, so identity implies content.
+_DIFF_CACHE = {"key": None, "frames": None, "value": None}
+
+
+def _diff_core(base: pd.DataFrame, cur: pd.DataFrame) -> Tuple[set, set, set]:
+    """Return (created, removed, edited) guid sets for ``cur`` against ``base``."""
     if base.empty or cur.empty:
-        return {}
+        return set(), set(), set()
     if "guid" not in base.columns or "guid" not in cur.columns:
-        return {}
-    base_guids = set(base["guid"].astype(str))
-    cur_guids = set(cur["guid"].astype(str))
-    created_ids = cur_guids - base_guids
-    shared_ids = cur_guids & base_guids
-    compare_cols = [
-        c for c in cur.columns
-        if c in base.columns and c not in {"History", "LastEdited", "WhenCreated"}
-    ]
+        return set(), set(), set()
+    key = (id(base), len(base), id(cur), len(cur))
+    if key == _DIFF_CACHE["key"]:
+        return _DIFF_CACHE["value"]
+    # Set algebra on the (unique) guid indexes runs in pandas' C hashtable
+    # instead of building Python sets of every guid.
+    b_pos = _guid_positions(base)
+    c_pos = _guid_positions(cur)
+    created_ids = set(c_pos.index.difference(b_pos.index, sort=False))
+    removed_ids = set(b_pos.index.difference(c_pos.index, sort=False))
+    common = c_pos.index.intersection(b_pos.index, sort=False)
+    edited_ids = set()
+    if len(common):
+        compare_cols = [
+            c for c in cur.columns
+            if c in base.columns and c not in HISTORY_COLUMNS
+        ]
+        hash_cols = [c for c in compare_cols if c not in LIST_COLUMNS]
+        bp = b_pos.loc[common].to_numpy()
+        cp = c_pos.loc[common].to_numpy()
+        # Rows whose hashes match are unchanged; only hash misses (and
+        # list-column differences) are confirmed cell by cell below.
+        candidates = _row_hashes(base, hash_cols)[bp] != _row_hashes(cur, hash_cols)[cp]
+        for col in compare_cols:
+            if col in LIST_COLUMNS:
+                b_col = base[col].to_numpy(dtype=object)[bp]
+                c_col = cur[col].to_numpy(dtype=object)[cp]
+                candidates |= _edited_mask(b_col[:, None], c_col[:, None])
+        hits = np.flatnonzero(candidates)
+        if hits.size:
+            confirmed = _confirm_edits(base, cur, compare_cols, bp[hits], cp[hits])
+            edited_ids = set(common[hits][confirmed])
+    value = (created_ids, removed_ids, edited_ids)
+    _DIFF_CACHE.update(key=key, frames=(base, cur), value=value)
+    return value
+
+
+def compute_row_status(base: pd.DataFrame, cur: pd.DataFrame) -> dict:
+    created_ids, _, edited_ids = _diff_core(base, cur)
     status = {guid: "created" for guid in created_ids}
-    if shared_ids:
-        base_idx = base.set_index(base["guid"].astype(str), drop=False)
-        cur_idx = cur.set_index(cur["guid"].astype(str), drop=False)
-        for guid in shared_ids:
-            b_row = base_idx.loc[guid]
-            c_row = cur_idx.loc[guid]
-            for col in compare_cols:
-                if not _cell_equal(b_row[col], c_row[col]):
-                    status[guid] = "edited"
-                    break
+    status.update({guid: "edited" for guid in edited_ids})
     return status
 
 
 def compute_change_summary(base: pd.DataFrame, cur: pd.DataFrame) -> Tuple[int, int, int]:
+    created_ids, removed_ids, edited_ids = _diff_core(base, cur)
+    return len(created_ids), len(removed_ids), len(edited_ids)
+
+
+def _rows_at(df: pd.DataFrame, positions) -> List[pd.Series]:
+    positions = np.sort(np.asarray(positions, dtype=np.int64))
+    return [row for _, row in df.iloc[positions].iterrows()]
+
+
+def compute_change_rows(
+    base: pd.DataFrame, cur: pd.DataFrame
+) -> Tuple[List[Tuple[pd.Series, pd.Series]], List[pd.Series], List[pd.Series]]:
+    """Return (edited (before, after) pairs, created rows, removed rows) in frame order."""
     if base.empty or cur.empty:
-        return 0, 0, 0
-    if "guid" not in base.columns or "guid" not in cur.columns:
-        return 0, 0, 0
-    base_guids = set(base["guid"].astype(str))
-    cur_guids = set(cur["guid"].astype(str))
-    added = len(cur_guids - base_guids)
-    removed = len(base_guids - cur_guids)
-    status = compute_row_status(base, cur)
-    changed = sum(1 for v in status.values() if v == "edited")
-    return added, removed, changed
+        created = _rows_at(cur, range(len(cur))) if not cur.empty else []
+        removed = _rows_at(base, range(len(base))) if not base.empty else []
+        return [], created, removed
+    created_ids, removed_ids, edited_ids = _diff_core(base, cur)
+    b_pos = _guid_positions(base)
+    c_pos = _guid_positions(cur)
+    created = _rows_at(cur, c_pos.loc[list(created_ids)].to_numpy())
+    removed = _rows_at(base, b_pos.loc[list(removed_ids)].to_numpy())
+    edited_order = c_pos.loc[list(edited_ids)].sort_values()
+    after_rows = _rows_at(cur, edited_order.to_numpy())
+    before_rows = [base.iloc[pos] for pos in b_pos.loc[edited_order.index].to_numpy()]
+    return list(zip(before_rows, after_rows)), created, removed
 
 
-__all__ = ["compute_change_summary", "compute_row_status"]
+__all__ = ["HISTORY_COLUMNS", "compute_change_rows", "compute_change_summary", "compute_row_status"]
@@ -1,12 +1,17 @@
 from typing import Iterable, List, Optional, Set, Tuple
 
+import pandas as pd
 from shiny import ui
 
-from config import MAP_COLORS, ONE_WAY_DASH
-from data_processing import line_length_m, polyline_color
+from config import MAP_COLORS, ONE_WAY_DASH, STATIC_DIR
+from data_processing import cached_length_m, polyline_color
 from grid_page import grid_assets, route_minimap
+from server_highlight import highlight_guid_set
 
 
+# Cards rendered per group before a "Show more" button; each click adds this many.
+CHANGES_PAGE_SIZE = 50
+
 CHANGE_FIELDS = [
     ("name", "Name"),
     ("description", "Comments"),
@@ -28,201 +33,56 @@ def build_changes_panel():
     return ui.nav_panel(
         "Changes",
         grid_assets(),
-        ui.tags.style(
-            """
-            .hss-changes-list {
-                display: flex;
-                flex-direction: column;
-                gap: 1rem;
-            }
-            .hss-change-details > summary {
-                list-style: none;
-                cursor: pointer;
-                display: flex;
-                align-items: flex-start;
-                gap: 0.5rem;
-            }
-            .hss-change-details > summary::-webkit-details-marker {
-                display: none;
-            }
-            .hss-change-card {
-                border: 1px solid #e1e4e8;
-                border-radius: 12px;
-                padding: 1rem;
-                background: #fff;
-            }
-            .hss-change-title {
-                font-weight: 600;
-                margin-bottom: 0.5rem;
-            }
-            .hss-change-row {
-                display: flex;
-                gap: 1rem;
-                flex-wrap: wrap;
-            }
-            .hss-change-maps {
-                display: flex;
-                gap: 0.75rem;
-                align-items: flex-start;
-            }
-            .hss-change-maps .hss-grid-map {
-                width: 160px;
-                height: 100px;
-            }
-            .hss-change-label {
-                font-size: 12px;
-                color: #666;
-                margin-bottom: 0.2rem;
-            }
-            .hss-change-field {
-                display: flex;
-                gap: 0.5rem;
-                align-items: baseline;
-                margin-bottom: 0.25rem;
-            }
-            .hss-change-field-name {
-                min-width: 140px;
-                font-weight: 600;
-            }
-            .hss-change-old {
-                text-decoration: line-through;
-                color: #6c757d;
-            }
-            .hss-change-new {
-                font-weight: 700;
-                color: #111827;
-            }
-            .hss-change-neutral {
-                color: #111827;
-            }
-            .hss-change-badge {
-                display: inline-block;
-                padding: 0.1rem 0.5rem;
-                border-radius: 999px;
-                font-size: 12px;
-                line-height: 1.4;
-                align-self: flex-start;
-                margin-left: 0;
-                background: #f1f5f9;
-            }
-            .hss-change-badge-changed {
-                background: #fde68a;
-                color: #92400e;
-            }
-            .hss-change-badge-added {
-                background: #bbf7d0;
-                color: #166534;
-            }
-            .hss-change-badge-removed {
-                background: #fecaca;
-                color: #991b1b;
-            }
-            .hss-change-removed {
-                opacity: 0.75;
-            }
-            .hss-change-card-changed {
-                background: #fff7ed;
-            }
-            .hss-change-card-added {
-                background: #f0fdf4;
-            }
-            .hss-change-card-removed {
-                background: #fef2f2;
-            }
-            .hss-change-goto {
-                margin-left: auto;
-            }
-            .hss-change-group {
-                margin-bottom: 1rem;
-            }
-            """
-        ),
-        ui.tags.script(
-            """
-            (function() {
-                function loadState() {
-                    try {
-                        return JSON.parse(localStorage.getItem('hss_changes_open_v1') || '{}');
-                    } catch (e) {
-                        return {};
-                    }
-                }
-                function saveState(state) {
-                    try {
-                        localStorage.setItem('hss_changes_open_v1', JSON.stringify(state || {}));
-                    } catch (e) {
-                        return;
-                    }
-                }
-                function applyState(root) {
-                    const state = loadState();
-                    const nodes = (root || document).querySelectorAll('details.hss-change-details[data-change-id]');
-                    nodes.forEach(function(node) {
-                        const id = node.dataset.changeId;
-                        if (!id) return;
-                        if (state[id] === undefined) return;
-                        node.open = !!state[id];
-                    });
-                }
-                document.addEventListener('DOMContentLoaded', function() {
-                    applyState(document);
-                    document.addEventListener('toggle', function(ev) {
-                        const node = ev.target;
-                        if (!node || !node.matches || !node.matches('details.hss-change-details[data-change-id]')) return;
-                        const state = loadState();
-                        state[node.dataset.changeId] = !!node.open;
-                        saveState(state);
-                    }, true);
-                    const observer = new MutationObserver(function(mutations) {
-                        mutations.forEach(function(m) {
-                            m.addedNodes.forEach(function(node) {
-                                if (node.nodeType !== 1) return;
-                                applyState(node);
-                            });
-                        });
-                    });
-                    observer.observe(document.body, { childList: true, subtree: true });
-                });
-            })();
-            """
-        ),
+        ui.include_css(STATIC_DIR / "hss_changes.css", method="link"),
+        ui.include_js(STATIC_DIR / "hss_changes.js", method="link"),
         ui.output_ui("changes_view"),
     )
 
 
+def _fmt_yes_no(value) -> str:
+    return "Yes" if bool(value) else "No"
+
+
+def _fmt_before(value) -> str:
+    return "Before" if bool(value) else "In"
+
+
+def _fmt_text(value) -> str:
+    text = str(value).strip()
+    return text if text else "—"
+
+
+_BOOL_KEYS = frozenset({"AuditedStreetView", "AuditedInPerson", "Rejected"})
+_FORMATTERS = {**{key: _fmt_yes_no for key in _BOOL_KEYS}, "YearBuildBeforeFlag": _fmt_before}
+# (key, label, formatter) resolved once instead of per field per row.
+_CHANGE_FIELD_SPECS = tuple((key, label, _FORMATTERS.get(key, _fmt_text)) for key, label in CHANGE_FIELDS)
+
+
 def format_value(key: str, value) -> str:
     if value is None:
         return "—"
-    if key in {"AuditedStreetView", "AuditedInPerson", "Rejected"}:
-        return "Yes" if bool(value) else "No"
-    if key == "YearBuildBeforeFlag":
-        return "Before" if bool(value) else "In"
-    text = str(value).strip()
-    return text if text else "—"
+    return _FORMATTERS.get(key, _fmt_text)(value)
+
+
+def _norm(val):
+    try:
+        if pd.isna(val):
+            return None
+    except Exception:
+        pass
+    if isinstance(val, str):
+        return val.strip()
+    return val
 
 
 def diff_fields(before_row, after_row) -> List[Tuple[str, str, str, bool]]:
     diffs = []
-    for key, label in CHANGE_FIELDS:
+    for key, label, fmt in _CHANGE_FIELD_SPECS:
         before_val = before_row.get(key) if before_row is not None else None
         after_val = after_row.get(key) if after_row is not None else None
-        before_fmt = format_value(key, before_val)
-        after_fmt = format_value(key, after_val)
-        def _norm(val):
-            try:
-                import pandas as pd
-
-                if pd.isna(val):
-                    return None
-            except Exception:
-                pass
-            if isinstance(val, str):
-                return val.strip()
-            return val
-
-        before_norm = _norm(before_val)
-        after_norm = _norm(after_val)
-        changed = before_norm != after_norm
+        before_fmt = "—" if before_val is None else fmt(before_val)
+        after_fmt = "—" if after_val is None else fmt(after_val)
+        changed = _norm(before_val) != _norm(after_val)
         diffs.append((label, before_fmt, after_fmt, changed))
     return diffs
 
@@ -241,8 +101,7 @@ def _route_summary(row, prefix: str, *, direction: Optional[str] = None) -> str:
     name = str(row.get("name", "")).strip() if row is not None else ""
     if not name:
         name = "Unnamed"
-    coords = row.get("_coords") or []
-    length_m = int(round(line_length_m(coords))) if coords else 0
+    length_m = cached_length_m(row) if row is not None else 0
     dir_val = direction or (row.get("OneWay") if row is not None else None) or ""
     dir_text = dir_val or "TwoWay"
     return f"\"{name}\" - {length_m}m of {dir_text} - {prefix}"
@@ -252,8 +111,7 @@ def _route_summary_updated(after_row, changed_labels: Optional[List[str]] = None
     name = str(after_row.get("name", "")).strip() if after_row is not None else ""
     if not name:
         name = "Unnamed"
-    coords = after_row.get("_coords") or []
-    length_m = int(round(line_length_m(coords))) if coords else 0
+    length_m = cached_length_m(after_row) if after_row is not None else 0
     dir_val = after_row.get("OneWay") or ""
     dir_text = dir_val or "TwoWay"
     changes = ""
@@ -283,13 +141,32 @@ def render_changes(
     route_colors: Optional[dict] = None,
     route_weight: int = 3,
     open_panels: Optional[Iterable[str]] = None,
+    limits: Optional[dict] = None,
 ):
-    highlight_set = set(highlight_guids or [])
+    highlight_set = highlight_guid_set(highlight_guids)
     colors = route_colors or MAP_COLORS
+    limits = limits or {}
+    edited = list(edited)
+    created = list(created)
+    removed = list(removed)
+    totals = {"changed": len(edited), "added": len(created), "removed": len(removed)}
+    edited = edited[: limits.get("changed", CHANGES_PAGE_SIZE)]
+    created = created[: limits.get("added", CHANGES_PAGE_SIZE)]
+    removed = removed[: limits.get("removed", CHANGES_PAGE_SIZE)]
     edited_cards = []
     created_cards = []
     removed_cards = []
 
+    def _show_more(group: str, shown: int):
+        remaining = totals[group] - shown
+        if remaining <= 0:
+            return None
+        return ui.tags.button(
+            f"Show more ({remaining} remaining)",
+            class_="btn btn-sm btn-outline-secondary hss-change-more",
+            **{"data-group": group},
+        )
+
     def _field_list(diffs, only_changed: bool = False):
         items = []
         for label, before_val, after_val, changed in diffs:
@@ -480,20 +357,20 @@ def render_changes(
 
     return ui.accordion(
         ui.accordion_panel(
-            f"Changed ({len(edited_cards)})",
-            ui.tags.div(*edited_cards, class_="hss-changes-list") if edited_cards else ui.tags.div("No changes."),
+            f"Changed ({totals['changed']})",
+            ui.tags.div(*edited_cards, _show_more("changed", len(edited_cards)), class_="hss-changes-list") if edited_cards else ui.tags.div("No changes."),
             class_="hss-change-group",
             value="changed",
         ),
         ui.accordion_panel(
-            f"Added ({len(created_cards)})",
-            ui.tags.div(*created_cards, class_="hss-changes-list") if created_cards else ui.tags.div("No additions."),
+            f"Added ({totals['added']})",
+            ui.tags.div(*created_cards, _show_more("added", len(created_cards)), class_="hss-changes-list") if created_cards else ui.tags.div("No additions."),
             class_="hss-change-group",
             value="added",
         ),
         ui.accordion_panel(
-            f"Removed ({len(removed_cards)})",
-            ui.tags.div(*removed_cards, class_="hss-changes-list") if removed_cards else ui.tags.div("No removals."),
+            f"Removed ({totals['removed']})",
+            ui.tags.div(*removed_cards, _show_more("removed", len(removed_cards)), class_="hss-changes-list") if removed_cards else ui.tags.div("No removals."),
             class_="hss-change-group",
             value="removed",
         ),
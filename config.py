@@ -1,5 +1,6 @@
 import logging
 import os
+from pathlib import Path
 from typing import Optional
 
 APP_TITLE = "Healthy Streets (Shiny for Python)"
@@ -18,6 +19,11 @@ LONDON_MASK_KML = os.path.join(HELPERS_DIR, "LondonMask.kml")
 TFL_GEOJSON = os.path.join(HELPERS_DIR, "GLA_TLRN_HAB_wgs84.geojson")
 LCC_TFL_GEOJSON = os.path.join(HELPERS_DIR, "lcc_special_tlrn.geojson")
 CYCLE_ROUTES_JSON = os.path.join(HELPERS_DIR, "CycleRoutes.json")
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+# URL path (relative, so it also resolves inside the srcdoc map iframe) that serves STATIC_DIR.
+STATIC_URL_PATH = "hss_static"
+# Enables the map iframe's console tracing.
+HSS_DEBUG = os.environ.get("HSS_DEBUG", "").lower() in {"1", "true", "yes", "y"}
 NOMINATIM_ENABLED = os.environ.get("NOMINATIM_ENABLED", "").lower() in {"1", "true", "yes", "y"}
 NOMINATIM_USER_AGENT = os.environ.get("NOMINATIM_USER_AGENT", "")
 NOMINATIM_EMAIL = os.environ.get("NOMINATIM_EMAIL", "")
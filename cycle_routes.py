@@ -1,14 +1,21 @@
-import json
+import os
+import pickle
 from dataclasses import dataclass
-from typing import Callable, Iterable, List, Optional, Tuple
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
 
 from config import CYCLE_ROUTES_JSON, logger
-from geo_utils import sample_lat
+from data_processing import line_length_m
+from geo_utils import read_json_file, sample_lat
 
 try:
+    import shapely
     from shapely.geometry import LineString
     from shapely.strtree import STRtree
 except Exception:  # pragma: no cover
+    shapely = None
     LineString = None
     STRtree = None
 
@@ -26,63 +33,85 @@ class CycleRouteFeature:
 
 
 _CACHE = None
+# (minx, miny, maxx, maxy) of every projected CycleRoutes line, set with _CACHE.
+_BOUNDS: Optional[Tuple[float, float, float, float]] = None
+# Search radius for the nearest_cycle_label fast path (projected metres).
+NEAREST_SEARCH_M = 500.0
+# Filtered (tree, geoms, features, project) per programme filter.
+_INDEX_CACHE: Dict[frozenset, tuple] = {}
+
+
+def reset_cycle_route_cache() -> None:
+    """Drop the CycleRoutes index and every lookup memo built on top of it."""
+    global _CACHE, _BOUNDS
+    _CACHE = None
+    _BOUNDS = None
+    _INDEX_CACHE.clear()
+    for memo in (_projected_route, _route_length_m, _suggest_cached, _nearest_cached, _probe_cached):
+        memo.cache_clear()
+
+
+def _coords_key(coords: List[Tuple[float, float]]) -> Optional[Tuple[Tuple[float, float], ...]]:
+    """Hashable memo key for ``coords``, or None when there is nothing to look up."""
+    if not coords or LineString is None:
+        return None
+    return tuple((float(lat), float(lon)) for lat, lon in coords)
+
 
+def _iter_lines(coords: object) -> List[list]:
+    """Flatten GeoJSON line coordinates (any nesting depth) into coordinate lists.
 
-def _iter_lines(coords: object) -> Iterable[List[Tuple[float, float]]]:
+    Lines are returned as the original ``[lon, lat]`` lists, not copies; the
+    cache build hands them straight to NumPy.
+    """
     if not coords:
         return []
     if isinstance(coords[0], (float, int)):
         return [[(coords[0], coords[1])]]
-    if isinstance(coords[0], (list, tuple)) and coords and isinstance(coords[0][0], (float, int)):
-        return [[(lon, lat) for lon, lat in coords]]
     lines = []
-    for part in coords:
-        if not part:
+    stack = [coords]
+    while stack:
+        part = stack.pop()
+        if not part or isinstance(part[0], (float, int)):
             continue
-        if isinstance(part[0], (float, int)):
-            lines.append([(lon, lat) for lon, lat in part])
+        if part[0] and isinstance(part[0][0], (float, int)):
+            lines.append(part)
         else:
-            for sub in _iter_lines(part):
-                lines.append(sub)
+            # Reversed so parts are emitted in their original order.
+            stack.extend(reversed(part))
     return lines
 
 
-def _fallback_projector(lat0: float) -> Callable[[float, float], Tuple[float, float]]:
+def _fallback_projector(lat0: float) -> Callable[[object, object], Tuple[object, object]]:
     # Simple equirectangular approximation (meters) centered on lat0.
-    import math
-
+    # Works on scalars or NumPy arrays, so whole lines project in one call.
     r = 6371000.0
-    cos_lat = math.cos(math.radians(lat0))
+    x_scale = np.pi / 180.0 * r * np.cos(np.radians(lat0))
+    y_scale = np.pi / 180.0 * r
 
-    def _project(lon: float, lat: float) -> Tuple[float, float]:
-        x = math.radians(lon) * r * cos_lat
-        y = math.radians(lat) * r
-        return x, y
+    def _project(lon, lat):
+        return np.multiply(lon, x_scale), np.multiply(lat, y_scale)
 
     return _project
 
 
+def project_latlon(project: Callable, coords: List[Tuple[float, float]]) -> np.ndarray:
+    """Project ``(lat, lon)`` route coords to an (N, 2) array of metres."""
+    arr = np.asarray(coords, dtype=np.float64)
+    x, y = project(arr[:, 1], arr[:, 0])
+    return np.column_stack((x, y))
+
+
 def _load_cycle_routes_raw() -> Optional[dict]:
     try:
-        with open(CYCLE_ROUTES_JSON, "r", encoding="utf-8") as fh:
-            return json.load(fh)
+        return read_json_file(CYCLE_ROUTES_JSON)
     except Exception:
         logger.exception("Failed to load CycleRoutes.json")
         return None
 
 
-def _ensure_cache():
-    global _CACHE
-    if _CACHE is not None:
-        return _CACHE
-    if LineString is None or STRtree is None:
-        logger.warning("Cycle route lookup disabled: shapely unavailable")
-        _CACHE = (None, [], {}, None)
-        return _CACHE
-    data = _load_cycle_routes_raw()
-    if not data:
-        _CACHE = (None, [], {}, None)
-        return _CACHE
+def _build_cycle_route_records(data: dict) -> Tuple[float, list, List[Tuple[str, str]]]:
+    """Project every CycleRoutes line: ``(sample_lat, lines, [(label, programme), ...])``."""
     # Use lightweight equirectangular projection to avoid pyproj issues on Python 3.14
     # (pyproj CRS parsing currently throws "expected bytes, str found" in this env).
     sample_lat_value = None
@@ -95,9 +124,8 @@ def _ensure_cache():
         sample_lat_value = 51.5074
     project = _fallback_projector(sample_lat_value)
 
-    features: List[CycleRouteFeature] = []
-    geoms = []
-    geom_to_feature = {}
+    lines = []
+    meta: List[Tuple[str, str]] = []
     for feat in data.get("features", []):
         props = feat.get("properties") or {}
         label = (props.get("Label") or "").strip()
@@ -107,30 +135,148 @@ def _ensure_cache():
             continue
         for coords in _iter_lines(geom):
             try:
-                proj = [project(lon, lat) for lon, lat in coords]
-                line = LineString(proj)
+                arr = np.asarray(coords, dtype=np.float64)
+                x, y = project(arr[:, 0], arr[:, 1])
+                line = LineString(np.column_stack((x, y)))
             except Exception:
                 continue
             if line.is_empty:
                 continue
-            feature = CycleRouteFeature(geom=line, label=label, programme=programme)
-            features.append(feature)
-            geoms.append(line)
-            geom_to_feature[id(line)] = feature
+            lines.append(line)
+            meta.append((label, programme))
+    return sample_lat_value, lines, meta
+
 
+def _load_cycle_route_records() -> Optional[Tuple[float, list, List[Tuple[str, str]]]]:
+    """Projected CycleRoutes records, backed by a ``.pkl`` file next to the JSON.
+
+    The pickle holds the lines as a WKB array and is reused while it is at
+    least as new as the JSON; any failure to read or write it falls back to
+    parsing the JSON.
+    """
+    cache_path = CYCLE_ROUTES_JSON + ".pkl"
+    try:
+        if os.path.getmtime(cache_path) >= os.path.getmtime(CYCLE_ROUTES_JSON):
+            with open(cache_path, "rb") as fh:
+                cached = pickle.load(fh)
+            lines = list(shapely.from_wkb(cached["wkb"]))
+            logger.info("Loaded %d CycleRoutes lines from cache %s", len(lines), cache_path)
+            return cached["sample_lat"], lines, cached["meta"]
+    except FileNotFoundError:
+        pass
+    except Exception:
+        logger.exception("Failed to read CycleRoutes cache %s; reparsing", cache_path)
+    data = _load_cycle_routes_raw()
+    if not data:
+        return None
+    sample_lat_value, lines, meta = _build_cycle_route_records(data)
+    try:
+        payload = {
+            "sample_lat": sample_lat_value,
+            "wkb": shapely.to_wkb(_geometry_array(lines)),
+            "meta": meta,
+        }
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as fh:
+            pickle.dump(payload, fh, protocol=5)
+        os.replace(tmp_path, cache_path)
+        logger.info("Wrote CycleRoutes cache %s", cache_path)
+    except Exception:
+        logger.warning("Could not write CycleRoutes cache %s", cache_path, exc_info=True)
+    return sample_lat_value, lines, meta
+
+
+def _ensure_cache():
+    global _CACHE, _BOUNDS
+    if _CACHE is not None:
+        return _CACHE
+    if LineString is None or STRtree is None:
+        logger.warning("Cycle route lookup disabled: shapely unavailable")
+        _CACHE = (None, [], np.empty(0, dtype=object), None)
+        return _CACHE
+    records = _load_cycle_route_records()
+    if records is None:
+        _CACHE = (None, [], np.empty(0, dtype=object), None)
+        return _CACHE
+    sample_lat_value, lines, meta = records
+    project = _fallback_projector(sample_lat_value)
+    # features[i] describes geoms[i]; STRtree queries return these positions.
+    features = [
+        CycleRouteFeature(geom=line, label=label, programme=programme)
+        for line, (label, programme) in zip(lines, meta)
+    ]
+    geoms = _geometry_array(lines)
     tree = STRtree(geoms)
-    _CACHE = (tree, features, geom_to_feature, geoms, project)
+    if len(geoms):
+        _BOUNDS = tuple(float(v) for v in shapely.total_bounds(geoms))
+    _CACHE = (tree, features, geoms, project)
     logger.info("Cycle route lookup cache ready: %s features", len(features))
     return _CACHE
 
 
+def _geometry_array(geoms: list) -> np.ndarray:
+    arr = np.empty(len(geoms), dtype=object)
+    arr[:] = geoms
+    return arr
+
+
+def _beyond_all_routes(route, distance_m: float) -> bool:
+    """True when ``route`` is further than ``distance_m`` from the CycleRoutes envelope."""
+    if _BOUNDS is None:
+        return False
+    minx, miny, maxx, maxy = route.bounds
+    gminx, gminy, gmaxx, gmaxy = _BOUNDS
+    return (
+        maxx + distance_m < gminx
+        or minx - distance_m > gmaxx
+        or maxy + distance_m < gminy
+        or miny - distance_m > gmaxy
+    )
+
+
+def _query_within(tree, geoms: np.ndarray, route, distance_m: float):
+    """Tree indices and geometries lying within ``distance_m`` of ``route``."""
+    idxs = tree.query(route, predicate="dwithin", distance=distance_m)
+    return idxs, geoms[idxs]
+
+
+@lru_cache(maxsize=4096)
+def _projected_route(key: Tuple[Tuple[float, float], ...]):
+    """Projected LineString for a coords key, or None if it is unusable."""
+    tree, _, _, project = _ensure_cache()
+    if tree is None:
+        return None
+    try:
+        route = LineString(project_latlon(project, key))
+    except Exception:
+        return None
+    if route.is_empty or route.length == 0:
+        return None
+    # Memoized routes are probed repeatedly; a prepared geometry makes the
+    # intersects pre-filter in suggestions cheap.
+    shapely.prepare(route)
+    return route
+
+
+@lru_cache(maxsize=4096)
+def _route_length_m(key: Tuple[Tuple[float, float], ...]) -> float:
+    return line_length_m(list(key))
+
+
 def get_cycle_route_index(programmes: Optional[Iterable[str]] = None):
+    """Return ``(tree, geoms, features, project)`` for labelled routes in ``programmes``.
+
+    ``features[i]`` describes ``geoms[i]``, the position the tree reports.
+    """
     if LineString is None or STRtree is None:
-        return None, [], {}, None
-    tree, features, _, _, project = _ensure_cache()
+        return None, [], [], None
+    tree, features, _, project = _ensure_cache()
     if tree is None:
-        return None, [], {}, None
-    programme_set = {p.strip() for p in (programmes or [])}
+        return None, [], [], None
+    programme_set = frozenset(p.strip() for p in (programmes or []))
+    cached = _INDEX_CACHE.get(programme_set)
+    if cached is not None:
+        return cached
     filtered = []
     for feature in features:
         if programme_set and feature.programme not in programme_set:
@@ -140,15 +286,16 @@ def get_cycle_route_index(programmes: Optional[Iterable[str]] = None):
         filtered.append(feature)
     geoms = [f.geom for f in filtered]
     if not geoms:
-        return None, [], {}, project
-    filtered_tree = STRtree(geoms)
-    geom_to_feature = {id(f.geom): f for f in filtered}
+        index = (None, [], [], project)
+    else:
+        index = (STRtree(geoms), geoms, filtered, project)
+    _INDEX_CACHE[programme_set] = index
     logger.info(
         "Cycle route index: programmes=%s features=%s",
-        list(programme_set) if programme_set else "all",
+        sorted(programme_set) if programme_set else "all",
         len(filtered),
     )
-    return filtered_tree, geoms, geom_to_feature, project
+    return index
 
 
 def suggest_cycle_designation(
@@ -163,46 +310,57 @@ def suggest_cycle_designation(
     Uses a buffered intersection in Web Mercator for speed. Returns the first
     label with the best overlap ratio.
     """
-    if not coords or LineString is None:
-        return None
-    tree, _, geom_to_feature, geoms, project = _ensure_cache()
-    if tree is None:
+    key = _coords_key(coords)
+    if key is None:
         return None
-    try:
-        proj = [project(lon, lat) for lat, lon in coords]
-        route = LineString(proj)
-    except Exception:
+    return _suggest_cached(key, buffer_m, min_overlap_ratio, min_overlap_m, max_distance_m)
+
+
+@lru_cache(maxsize=4096)
+def _suggest_cached(
+    key: Tuple[Tuple[float, float], ...],
+    buffer_m: float,
+    min_overlap_ratio: float,
+    min_overlap_m: float,
+    max_distance_m: float,
+) -> Optional[str]:
+    route = _projected_route(key)
+    if route is None:
         return None
-    if route.is_empty or route.length == 0:
+    tree, features, geoms, _ = _ensure_cache()
+    search_m = max(buffer_m, max_distance_m)
+    # Routes outside the area CycleRoutes covers are rejected on bounds alone.
+    if _beyond_all_routes(route, search_m):
         return None
 
-    buffered = route.buffer(buffer_m)
-    candidates = tree.query(buffered)
+    # Exact distance test inside the tree query (instead of a bbox hit on the
+    # buffered route), widened to max_distance_m so every route that can pass
+    # the distance check is considered.
+    idxs, cand = _query_within(tree, geoms, route, search_m)
+    if not len(idxs):
+        return None
+    # Only candidates that actually touch the route can overlap it; skip the
+    # costly intersection for the rest.
+    overlap_lens = np.zeros(len(idxs), dtype=np.float64)
+    touching = shapely.intersects(route, cand)
+    if touching.any():
+        overlap_lens[touching] = shapely.length(shapely.intersection(route, cand[touching]))
+    distances = shapely.distance(route, cand)
+    # Geodesic length, so the ratio does not inherit the projection's scale
+    # error away from the latitude the projector was centred on.
+    route_len = _route_length_m(key)
     best_label = None
     best_ratio = 0.0
     best_distance = None
-    for geom in candidates:
-        if not hasattr(geom, "intersection"):
-            try:
-                geom = geoms[int(geom)]
-            except Exception:
-                continue
-        try:
-            overlap = route.intersection(geom)
-        except Exception:
-            continue
-        overlap_len = 0.0 if overlap.is_empty else overlap.length
-        ratio = overlap_len / route.length if route.length else 0.0
-        try:
-            distance = route.distance(geom)
-        except Exception:
-            distance = None
+    # Selection stays a scalar loop: its tie-breaking depends on candidate order.
+    for i, overlap_len, distance in zip(idxs, overlap_lens.tolist(), distances.tolist()):
+        ratio = overlap_len / route_len if route_len else 0.0
         passes_overlap = overlap_len >= min_overlap_m or ratio >= min_overlap_ratio
-        passes_distance = distance is not None and distance <= max_distance_m
+        passes_distance = distance <= max_distance_m
         if not (passes_overlap or passes_distance):
             continue
-        feature = geom_to_feature.get(id(geom))
-        if not feature or not feature.label:
+        feature = features[i]
+        if not feature.label:
             continue
         if passes_overlap:
             if ratio > best_ratio:
@@ -212,7 +370,7 @@ def suggest_cycle_designation(
         elif passes_distance and best_label is None:
             best_label = feature.label
             best_distance = distance
-        elif passes_distance and best_distance is not None and distance is not None:
+        elif passes_distance and best_distance is not None:
             if distance < best_distance:
                 best_label = feature.label
                 best_distance = distance
@@ -235,96 +393,86 @@ def debug_cycle_suggestions(
         (100.0, 0.05, 30.0, 80.0),
     ]
     results = []
+    # Build the key once; the projected route is shared by every sweep step.
+    key = _coords_key(coords)
+    if key is None:
+        return [(*params, None) for params in tests]
     for buffer_m, ratio, overlap_m, max_dist in tests:
-        label = suggest_cycle_designation(
-            coords,
-            buffer_m=buffer_m,
-            min_overlap_ratio=ratio,
-            min_overlap_m=overlap_m,
-            max_distance_m=max_dist,
-        )
+        label = _suggest_cached(key, buffer_m, ratio, overlap_m, max_dist)
         results.append((buffer_m, ratio, overlap_m, max_dist, label))
     return results
 
 
 def nearest_cycle_label(coords: List[Tuple[float, float]]) -> Optional[Tuple[str, float, str]]:
-    if not coords or LineString is None:
-        return None
-    tree, _, geom_to_feature, geoms, project = _ensure_cache()
-    if tree is None:
-        return None
-    try:
-        proj = [project(lon, lat) for lat, lon in coords]
-        route = LineString(proj)
-    except Exception:
+    key = _coords_key(coords)
+    if key is None:
         return None
-    if route.is_empty or route.length == 0:
+    return _nearest_cached(key)
+
+
+@lru_cache(maxsize=4096)
+def _nearest_cached(key: Tuple[Tuple[float, float], ...]) -> Optional[Tuple[str, float, str]]:
+    route = _projected_route(key)
+    if route is None:
         return None
+    tree, features, geoms, _ = _ensure_cache()
+    # Most routes have a cycle route close by: a nearest search bounded to
+    # NEAREST_SEARCH_M only visits tree nodes in range, and the unbounded
+    # tree.nearest search only runs when nothing is that close.
+    idxs, distances = tree.query_nearest(
+        route, max_distance=NEAREST_SEARCH_M, return_distance=True, all_matches=False
+    )
+    if len(idxs):
+        feature = features[int(idxs[0])]
+        return feature.label, float(distances[0]), feature.programme
     try:
-        nearest_geom = tree.nearest(route)
+        nearest = tree.nearest(route)
     except Exception:
         return None
-    if nearest_geom is None:
-        return None
-    if not hasattr(nearest_geom, "distance"):
-        # Shapely 2 STRtree may return integer indices
-        try:
-            nearest_geom = geoms[int(nearest_geom)]
-        except Exception:
-            logger.warning("CycleRoutes nearest geom has no distance(): %s", type(nearest_geom))
-            return None
-    feature = geom_to_feature.get(id(nearest_geom))
-    if not feature:
+    if nearest is None:
         return None
+    idx = int(nearest)
     try:
-        distance = route.distance(nearest_geom)
+        distance = route.distance(geoms[idx])
     except Exception:
-        logger.exception("CycleRoutes nearest distance failed for geom type=%s", type(nearest_geom))
-        distance = None
-    if distance is None:
+        logger.exception("CycleRoutes nearest distance failed for index=%s", idx)
         return None
+    feature = features[idx]
     return feature.label, distance, feature.programme
 
 
 def debug_cycle_probe(coords: List[Tuple[float, float]], buffer_m: float = 200.0) -> Optional[dict]:
-    if not coords or LineString is None:
+    key = _coords_key(coords)
+    if key is None:
         return None
-    tree, _, geom_to_feature, geoms, project = _ensure_cache()
-    if tree is None:
-        return None
-    try:
-        proj = [project(lon, lat) for lat, lon in coords]
-        route = LineString(proj)
-    except Exception:
-        return None
-    if route.is_empty or route.length == 0:
+    probe = _probe_cached(key, buffer_m)
+    # Callers get their own dict so the memoized one cannot be mutated.
+    return dict(probe) if probe is not None else None
+
+
+@lru_cache(maxsize=1024)
+def _probe_cached(key: Tuple[Tuple[float, float], ...], buffer_m: float) -> Optional[dict]:
+    route = _projected_route(key)
+    if route is None:
         return None
-    buffered = route.buffer(buffer_m)
-    candidates = tree.query(buffered)
+    tree, features, geoms, _ = _ensure_cache()
+    if _beyond_all_routes(route, buffer_m):
+        idxs, cand = np.empty(0, dtype=np.intp), geoms[:0]
+    else:
+        idxs, cand = _query_within(tree, geoms, route, buffer_m)
     min_dist = None
     min_label = None
     min_programme = None
-    for geom in candidates:
-        if not hasattr(geom, "distance"):
-            try:
-                geom = geoms[int(geom)]
-            except Exception:
-                logger.warning("CycleRoutes probe candidate has no distance(): %s", type(geom))
-                continue
-        try:
-            dist = route.distance(geom)
-        except Exception:
-            logger.exception("CycleRoutes probe distance failed for geom type=%s", type(geom))
-            continue
-        if min_dist is None or dist < min_dist:
-            min_dist = dist
-            feature = geom_to_feature.get(id(geom))
-            if feature:
-                min_label = feature.label
-                min_programme = feature.programme
+    if len(idxs):
+        distances = shapely.distance(route, cand)
+        best = int(np.argmin(distances))
+        min_dist = float(distances[best])
+        feature = features[idxs[best]]
+        min_label = feature.label
+        min_programme = feature.programme
     return {
         "buffer_m": buffer_m,
-        "candidate_count": len(candidates),
+        "candidate_count": len(idxs),
         "min_distance_m": min_dist,
         "min_label": min_label,
         "min_programme": min_programme,
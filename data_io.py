@@ -1,15 +1,17 @@
 import json
 import os
 import time
-from typing import Callable, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 from config import ACCESS_SHEET_ID, ACCESS_SHEET_NAME, ACCESS_TABLE_CACHE, logger
 
 try:
     import gspread
-    from gspread.exceptions import APIError
+    from gspread.exceptions import APIError, GSpreadException
+    from gspread.utils import numericise
     try:
         from googleapiclient.errors import HttpError
     except Exception:  # pragma: no cover
@@ -17,6 +19,8 @@ try:
 except Exception:  # pragma: no cover
     gspread = None
     APIError = None
+    GSpreadException = None
+    numericise = None
     HttpError = None
 
 
@@ -97,6 +101,50 @@ def list_regions(sheet_id: str, *, on_retry: Optional[Callable[[int, float, floa
     return _call_with_retry(_op, on_retry=on_retry)
 
 
+REGIONS_CACHE_TTL = 600.0
+_REGIONS_CACHE: Dict[str, Tuple[float, List[str]]] = {}
+
+
+def list_regions_cached(
+    sheet_id: str,
+    *,
+    ttl: float = REGIONS_CACHE_TTL,
+    on_retry: Optional[Callable[[int, float, float, Exception], None]] = None,
+) -> List[str]:
+    cached = _REGIONS_CACHE.get(sheet_id)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        return list(cached[1])
+    regions = list_regions(sheet_id, on_retry=on_retry)
+    _REGIONS_CACHE[sheet_id] = (time.monotonic(), list(regions))
+    logger.info("Cached %d regions for sheet %s", len(regions), sheet_id)
+    return regions
+
+
+def _values_to_frame(values: List[List[object]]) -> pd.DataFrame:
+    """Build a DataFrame from ``get_all_values()`` rows (header first).
+
+    Matches ``get_all_records()``: the header must be unique and numeric-looking
+    cells become int/float. Numericising runs once per distinct value in
+    each column rather than once per cell, and no per-row dicts are built.
+    """
+    if not values or values == [[]]:
+        return pd.DataFrame()
+    header, rows = values[0], values[1:]
+    if len(header) != len(set(header)):
+        raise GSpreadException(
+            "the header row in the worksheet is not unique, "
+            "try passing 'expected_headers' to get_all_records"
+        )
+    df = pd.DataFrame(rows, columns=header, dtype=object)
+    for col in header:
+        codes, uniques = pd.factorize(df[col].to_numpy(dtype=object))
+        converted = np.empty(len(uniques), dtype=object)
+        converted[:] = [numericise(v) for v in uniques]
+        df[col] = converted[codes] if len(codes) else df[col]
+    # Same column dtypes pd.DataFrame(records) would have inferred.
+    return df.infer_objects()
+
+
 def read_region_sheet(
     sheet_id: str,
     region: str,
@@ -107,10 +155,10 @@ def read_region_sheet(
     if client:
         def _op():
             worksheet = client.open_by_key(sheet_id).worksheet(region)
-            return worksheet.get_all_records()
+            return worksheet.get_all_values()
 
-        records = _call_with_retry(_op, on_retry=on_retry)
-        return pd.DataFrame(records)
+        values = _call_with_retry(_op, on_retry=on_retry)
+        return _values_to_frame(values)
 
     url = (
         "https://docs.google.com/spreadsheets/d/"
@@ -124,10 +172,10 @@ def read_access_sheet(*, on_retry: Optional[Callable[[int, float, float, Excepti
     if client:
         def _op():
             worksheet = client.open_by_key(ACCESS_SHEET_ID).worksheet(ACCESS_SHEET_NAME)
-            return worksheet.get_all_records()
+            return worksheet.get_all_values()
 
-        records = _call_with_retry(_op, on_retry=on_retry)
-        return pd.DataFrame(records)
+        values = _call_with_retry(_op, on_retry=on_retry)
+        return _values_to_frame(values)
 
     url = (
         "https://docs.google.com/spreadsheets/d/"
@@ -136,12 +184,17 @@ def read_access_sheet(*, on_retry: Optional[Callable[[int, float, float, Excepti
     return pd.read_csv(url)
 
 
-def get_access_table_once() -> pd.DataFrame:
+def get_access_table_once(copy: bool = False) -> pd.DataFrame:
+    """Return the process-wide access table, loading it on first use.
+
+    The cached frame itself is returned; treat it as read-only, or pass
+    ``copy=True`` (or call ``.copy()``) before mutating it.
+    """
     global ACCESS_TABLE_CACHE
     if ACCESS_TABLE_CACHE is None:
         logger.info("Loading access table...")
         ACCESS_TABLE_CACHE = read_access_sheet()
-    return ACCESS_TABLE_CACHE.copy()
+    return ACCESS_TABLE_CACHE.copy() if copy else ACCESS_TABLE_CACHE
 
 
 def write_region_sheet(
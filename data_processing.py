@@ -1,14 +1,18 @@
+import http.client
 import json
 import random
+import threading
+import time
 import urllib.parse
-import urllib.request
 from datetime import date
+from functools import lru_cache
 from typing import List, Optional, Tuple
 from uuid import uuid4
 
+import numpy as np
 import pandas as pd
 
-from config import MAP_COLORS, NOMINATIM_EMAIL, NOMINATIM_ENABLED, NOMINATIM_USER_AGENT
+from config import CHOICES, MAP_COLORS, NOMINATIM_EMAIL, NOMINATIM_ENABLED, NOMINATIM_USER_AGENT
 from geo_utils import coords_to_ewkt, wkt_to_latlon
 
 try:
@@ -18,6 +22,15 @@ except Exception:  # pragma: no cover
 
 GEOD = Geod(ellps="WGS84") if Geod else None
 
+BOOL_COLUMNS = ("YearBuildBeforeFlag", "AuditedStreetView", "AuditedInPerson", "Rejected")
+
+CATEGORICAL_COLUMNS = {
+    "OneWay": "direction",
+    "Flow": "flow",
+    "Protection": "protection",
+    "Ownership": "ownership",
+}
+
 
 def row_to_coords(row: pd.Series) -> Optional[List[Tuple[float, float]]]:
     for col in ("text_coords", "geometry", "Geometry"):
@@ -26,6 +39,32 @@ def row_to_coords(row: pd.Series) -> Optional[List[Tuple[float, float]]]:
     return None
 
 
+def frame_to_coords(df: pd.DataFrame) -> List[Optional[List[Tuple[float, float]]]]:
+    """Column-wise ``row_to_coords`` for every row of ``df``.
+
+    The first non-empty WKT among the geometry columns is picked per row, and
+    each distinct WKT string is parsed once.
+    """
+    wkts = np.full(len(df), "", dtype=object)
+    for col in ("text_coords", "geometry", "Geometry"):
+        if col not in df.columns:
+            continue
+        # Plain str.strip per cell: a fixed-width numpy str array would be
+        # sized by the longest WKT in the column.
+        stripped = np.array(
+            [v.strip() if isinstance(v, str) else "" for v in df[col].to_numpy(dtype=object)],
+            dtype=object,
+        )
+        fill = (wkts == "") & (stripped != "")
+        wkts[fill] = stripped[fill]
+    parsed = {wkt: wkt_to_latlon(wkt) for wkt in pd.unique(wkts) if wkt}
+    # Rows sharing a WKT get their own list so in-place edits stay per row.
+    return [
+        (list(coords) if isinstance(coords, list) else coords) if wkt else None
+        for wkt, coords in ((wkt, parsed.get(wkt)) for wkt in wkts)
+    ]
+
+
 def polyline_color(row: pd.Series, colors: Optional[dict] = None) -> str:
     colors = colors or MAP_COLORS
     if bool(row.get("Rejected", False)):
@@ -35,15 +74,28 @@ def polyline_color(row: pd.Series, colors: Optional[dict] = None) -> str:
     return colors["polyline"]
 
 
+_ID_WORDS = (
+    "apple", "banana", "cherry", "date", "elder", "fig", "grape", "honey",
+    "kiwi", "lemon", "mango", "nectar", "olive", "peach", "quince", "rasp",
+    "straw", "tangerine", "ugli", "vanilla", "water", "xigua", "yam", "zucchini",
+)
+_ID_COLORS = ("red", "blue", "green", "yellow", "purple")
+_ID_NOUNS = ("apple", "banana", "cherry", "date", "elder")
+_ID_RNG = np.random.default_rng()
+
+
 def generate_route_id() -> str:
-    words = [
-        "apple", "banana", "cherry", "date", "elder", "fig", "grape", "honey",
-        "kiwi", "lemon", "mango", "nectar", "olive", "peach", "quince", "rasp",
-        "straw", "tangerine", "ugli", "vanilla", "water", "xigua", "yam", "zucchini",
-    ]
-    colors = ["red", "blue", "green", "yellow", "purple"]
-    nouns = ["apple", "banana", "cherry", "date", "elder"]
-    return f"{random.choice(words)}-{random.choice(colors)}-{random.choice(nouns)}"
+    return f"{random.choice(_ID_WORDS)}-{random.choice(_ID_COLORS)}-{random.choice(_ID_NOUNS)}"
+
+
+def generate_route_ids(n: int) -> List[str]:
+    """``n`` route ids drawn in one vectorized pass (same format as ``generate_route_id``)."""
+    if n <= 0:
+        return []
+    words = _ID_RNG.choice(np.array(_ID_WORDS), size=n)
+    colors = _ID_RNG.choice(np.array(_ID_COLORS), size=n)
+    nouns = _ID_RNG.choice(np.array(_ID_NOUNS), size=n)
+    return np.char.add(np.char.add(np.char.add(words, "-"), np.char.add(colors, "-")), nouns).tolist()
 
 
 def ensure_columns(df: pd.DataFrame) -> pd.DataFrame:
@@ -87,16 +139,63 @@ def normalize_bool(value: object) -> bool:
     return False
 
 
+def normalize_bool_series(values: pd.Series) -> np.ndarray:
+    """``normalize_bool`` over a whole column, returned as a numpy bool array.
+
+    Bool columns pass through, numeric columns compare against zero, and
+    anything else is factorized so ``normalize_bool`` runs once per distinct
+    value rather than once per cell.
+    """
+    if pd.api.types.is_bool_dtype(values.dtype):
+        return values.fillna(False).to_numpy(dtype=bool)
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return values.fillna(0).to_numpy() != 0
+    codes, uniques = pd.factorize(values.to_numpy(dtype=object))
+    if not len(uniques):
+        return np.zeros(len(values), dtype=bool)
+    flags = np.fromiter((normalize_bool(v) for v in uniques), dtype=bool, count=len(uniques))
+    return np.where(codes >= 0, flags[codes], False)
+
+
+def categorize_choice_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Store the small fixed-domain columns as pandas categoricals.
+
+    Categories are the CHOICES values plus anything already present in the
+    sheet, so loading never turns an unexpected value into NaN.
+    """
+    for col, kind in CATEGORICAL_COLUMNS.items():
+        if col not in df.columns:
+            continue
+        categories = list(CHOICES[kind].values())
+        extra = [v for v in pd.unique(df[col].dropna()) if v not in categories]
+        df[col] = df[col].astype(pd.CategoricalDtype(categories + extra))
+    return df
+
+
 def prepare_routes_df(df: pd.DataFrame) -> pd.DataFrame:
     df = ensure_columns(df.copy())
     if "guid" not in df.columns:
         df["guid"] = [str(uuid4()) for _ in range(len(df))]
-    df.loc[:, "_coords"] = df.apply(row_to_coords, axis=1)
-    df.loc[:, "YearBuildBeforeFlag"] = df["YearBuildBeforeFlag"].apply(normalize_bool)
-    df.loc[:, "AuditedStreetView"] = df["AuditedStreetView"].apply(normalize_bool)
-    df.loc[:, "AuditedInPerson"] = df["AuditedInPerson"].apply(normalize_bool)
-    df.loc[:, "Rejected"] = df["Rejected"].apply(normalize_bool)
-    return df
+    df["_coords"] = pd.Series(frame_to_coords(df), index=df.index, dtype=object)
+    for col in BOOL_COLUMNS:
+        # Plain numpy bool columns: formatting and masks work on whole arrays.
+        df[col] = normalize_bool_series(df[col])
+    df.loc[:, "description"] = df["description"].fillna("").map(normalize_linebreaks)
+    df["_length_m"] = np.rint(route_lengths_m(df["_coords"])).astype(np.int32)
+    return categorize_choice_columns(df)
+
+
+def _prepend_history_line(history_text: str, line: str) -> str:
+    lines = [l for l in history_text.splitlines() if l.strip()]
+    if lines and lines[0].strip() == line:
+        return history_text
+    # Remove any existing duplicate of the same line before prepending.
+    filtered = [l for l in lines if l.strip() != line]
+    return "\n".join([line] + filtered) if filtered else line
+
+
+def _cell_text(value: object) -> str:
+    return "" if value is None or (not isinstance(value, str) and pd.isna(value)) else str(value)
 
 
 def update_history(df: pd.DataFrame, guid: str, user: str, today: Optional[str] = None) -> pd.DataFrame:
@@ -104,23 +203,59 @@ def update_history(df: pd.DataFrame, guid: str, user: str, today: Optional[str]
 
     today_val = today or today_string()
     line = f"{today_val}: edited by {user or 'unknown'}"
-    current = df.loc[df["guid"] == guid, "History"].fillna("").astype(str).values
-    history_text = current[0] if len(current) else ""
-    lines = [l for l in history_text.splitlines() if l.strip()]
-    if lines and lines[0].strip() == line:
-        new_history = history_text
+    # One guid comparison shared by every read and write below.
+    mask = (df["guid"] == guid).to_numpy()
+    if not mask.any():
+        return df
+    first = int(np.flatnonzero(mask)[0])
+    new_history = _prepend_history_line(_cell_text(df["History"].iat[first]), line)
+    df.loc[mask, "History"] = new_history
+    df.loc[mask, "LastEdited"] = today_val
+    existing_created = df["WhenCreated"].iat[first] if "WhenCreated" in df.columns else None
+    if _cell_text(existing_created) == "":
+        df.loc[mask, "WhenCreated"] = today_val
+    return df
+
+
+def update_history_batch(df: pd.DataFrame, guids, user: str, today: Optional[str] = None) -> pd.DataFrame:
+    """Record an edit by ``user`` on every row whose guid is in ``guids``."""
+    from time_utils import today_string
+
+    today_val = today or today_string()
+    line = f"{today_val}: edited by {user or 'unknown'}"
+    mask = df["guid"].isin(set(guids)).to_numpy()
+    if not mask.any():
+        return df
+    histories = df["History"].to_numpy()[mask]
+    df.loc[mask, "History"] = [_prepend_history_line(_cell_text(h), line) for h in histories]
+    df.loc[mask, "LastEdited"] = today_val
+    if "WhenCreated" in df.columns:
+        created = df["WhenCreated"].to_numpy()
+        missing = mask.copy()
+        missing[mask] = [_cell_text(v) == "" for v in created[mask]]
+        if missing.any():
+            df.loc[missing, "WhenCreated"] = today_val
     else:
-        # Remove any existing duplicate of the same line before prepending.
-        filtered = [l for l in lines if l.strip() != line]
-        new_history = "\n".join([line] + filtered) if filtered else line
-    df.loc[df["guid"] == guid, "History"] = new_history
-    df.loc[df["guid"] == guid, "LastEdited"] = today_val
-    existing_created = df.loc[df["guid"] == guid, "WhenCreated"].values
-    if len(existing_created) == 0 or pd.isna(existing_created[0]) or str(existing_created[0]) == "":
-        df.loc[df["guid"] == guid, "WhenCreated"] = today_val
+        df.loc[mask, "WhenCreated"] = today_val
     return df
 
 
+def frame_fingerprint(df: pd.DataFrame, cols: Optional[List[str]] = None) -> int:
+    """Return a cheap 64-bit fingerprint of ``df[cols]`` (row order ignored)."""
+    if df is None or df.empty:
+        return 0
+    cols = [c for c in (cols if cols is not None else df.columns) if c in df.columns]
+    if not cols:
+        return 0
+    subset = df[cols]
+    object_cols = [c for c in cols if subset[c].dtype == object]
+    if object_cols:
+        # Lists (e.g. `_coords`) are unhashable; hash their text form instead.
+        subset = subset.assign(**{c: subset[c].astype(str) for c in object_cols})
+    hashed = pd.util.hash_pandas_object(subset, index=False)
+    return int(hashed.sum()) ^ len(hashed)
+
+
 def normalize_linebreaks(text: str) -> str:
     if text is None:
         return ""
@@ -149,12 +284,74 @@ def parse_date_value(value: object) -> Optional[date]:
         return None
 
 
-def reverse_geocode_name(lat: float, lon: float, timeout: float = 2.0) -> Optional[str]:
-    if not NOMINATIM_ENABLED:
-        return None
-    user_agent = NOMINATIM_USER_AGENT or "HealthyStreetsShinyPy"
-    if NOMINATIM_EMAIL:
-        user_agent = f"{user_agent} ({NOMINATIM_EMAIL})"
+NOMINATIM_HOST = "nominatim.openstreetmap.org"
+# Nominatim usage policy: at most one request per second.
+NOMINATIM_MIN_INTERVAL = 1.0
+# One idle keep-alive HTTPS connection is kept between lookups, so repeat
+# requests skip the TCP/TLS handshake. The lock only guards this state; it is
+# never held across the rate-limit sleep or the request itself.
+_NOMINATIM_LOCK = threading.Lock()
+_NOMINATIM_STATE = {"conn": None, "last": 0.0}
+
+
+def _nominatim_reserve_slot() -> float:
+    """Claim the next rate-limited request slot; returns seconds to wait for it."""
+    with _NOMINATIM_LOCK:
+        now = time.monotonic()
+        slot = max(now, _NOMINATIM_STATE["last"] + NOMINATIM_MIN_INTERVAL)
+        _NOMINATIM_STATE["last"] = slot
+    return slot - now
+
+
+def _nominatim_take_conn() -> Optional[http.client.HTTPSConnection]:
+    with _NOMINATIM_LOCK:
+        conn = _NOMINATIM_STATE["conn"]
+        _NOMINATIM_STATE["conn"] = None
+    return conn
+
+
+def _nominatim_return_conn(conn: http.client.HTTPSConnection) -> None:
+    with _NOMINATIM_LOCK:
+        if _NOMINATIM_STATE["conn"] is None:
+            _NOMINATIM_STATE["conn"] = conn
+            return
+    conn.close()
+
+
+def _nominatim_get(path: str, headers: dict, timeout: float) -> dict:
+    wait = _nominatim_reserve_slot()
+    if wait > 0:
+        time.sleep(wait)
+    conn = _nominatim_take_conn()
+    for attempt in (0, 1):
+        reused = conn is not None
+        if conn is None:
+            conn = http.client.HTTPSConnection(NOMINATIM_HOST, timeout=timeout)
+        try:
+            conn.request("GET", path, headers=headers)
+            resp = conn.getresponse()
+            body = resp.read()
+        except (http.client.RemoteDisconnected, ConnectionError):
+            conn.close()
+            conn = None
+            # The server may have dropped an idle keep-alive connection;
+            # retry once on a fresh one.
+            if reused and attempt == 0:
+                continue
+            raise
+        except Exception:
+            conn.close()
+            raise
+        _nominatim_return_conn(conn)
+        if resp.status != 200:
+            raise RuntimeError(f"Nominatim HTTP {resp.status}")
+        return json.loads(body.decode("utf-8"))
+    raise RuntimeError("Nominatim request failed")
+
+
+@lru_cache(maxsize=8192)
+def _reverse_geocode_cached(lat: float, lon: float, timeout: float, user_agent: str) -> Optional[str]:
+    # Network errors raise, so only real answers (including "no name") are cached.
     params = {
         "format": "jsonv2",
         "lat": str(lat),
@@ -162,13 +359,8 @@ def reverse_geocode_name(lat: float, lon: float, timeout: float = 2.0) -> Option
         "zoom": "18",
         "addressdetails": "1",
     }
-    url = "https://nominatim.openstreetmap.org/reverse?" + urllib.parse.urlencode(params)
-    req = urllib.request.Request(url, headers={"User-Agent": user_agent})
-    try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-    except Exception:
-        return None
+    path = "/reverse?" + urllib.parse.urlencode(params)
+    data = _nominatim_get(path, {"User-Agent": user_agent}, timeout)
     address = data.get("address", {})
     for key in ("road", "pedestrian", "footway", "cycleway", "path", "street"):
         name = address.get(key)
@@ -177,37 +369,151 @@ def reverse_geocode_name(lat: float, lon: float, timeout: float = 2.0) -> Option
     return data.get("name") or data.get("display_name")
 
 
+def reverse_geocode_name(lat: float, lon: float, timeout: float = 2.0) -> Optional[str]:
+    if not NOMINATIM_ENABLED:
+        return None
+    user_agent = NOMINATIM_USER_AGENT or "HealthyStreetsShinyPy"
+    if NOMINATIM_EMAIL:
+        user_agent = f"{user_agent} ({NOMINATIM_EMAIL})"
+    # Quantized to 5 decimals (~1 m) so repeat lookups of a point hit the memo.
+    try:
+        return _reverse_geocode_cached(round(float(lat), 5), round(float(lon), 5), timeout, user_agent)
+    except Exception:
+        return None
+
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def haversine_segments_m(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle length of each consecutive segment on a spherical Earth.
+
+    Pure NumPy, used when pyproj is unavailable; within ~0.5% of the WGS84
+    geodesic.
+    """
+    phi = np.radians(lats)
+    lam = np.radians(lons)
+    d_phi = np.diff(phi)
+    d_lam = np.diff(lam)
+    a = np.sin(d_phi / 2) ** 2 + np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(d_lam / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _geod():
+    if GEOD is not None:
+        return GEOD
+    try:
+        from pyproj import Geod as _Geod
+
+        return _Geod(ellps="WGS84")
+    except Exception:
+        return None
+
+
 def line_length_m(coords: List[Tuple[float, float]]) -> float:
-    if not coords:
+    if not coords or len(coords) < 2:
         return 0.0
-    geod = GEOD
+    points = np.asarray(coords, dtype=np.float64)
+    lats = points[:, 0]
+    lons = points[:, 1]
+    geod = _geod()
     if geod is None:
-        try:
-            from pyproj import Geod as _Geod
+        return float(haversine_segments_m(lats, lons).sum())
+    # One call over the whole line instead of one geod.inv per segment.
+    return float(geod.line_length(lons, lats))
 
-            geod = _Geod(ellps="WGS84")
-        except Exception:
-            return 0.0
-    lons = [lon for _, lon in coords]
-    lats = [lat for lat, _ in coords]
-    length = 0.0
-    for i in range(len(coords) - 1):
-        _, _, dist = geod.inv(lons[i], lats[i], lons[i + 1], lats[i + 1])
-        length += dist
-    return length
+
+def cached_length_m(row: pd.Series) -> int:
+    """Rounded route length in metres, read from ``_length_m`` when present.
+
+    ``_length_m`` is filled by ``prepare_routes_df`` and must be refreshed
+    wherever ``_coords`` is reassigned.
+    """
+    value = row.get("_length_m")
+    if value is None or pd.isna(value):
+        coords = row.get("_coords") or []
+        return int(round(line_length_m(coords))) if coords else 0
+    return int(value)
+
+
+def coords_to_soa(coords_list) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Flatten per-route ``(lat, lon)`` lists into lat/lon arrays plus CSR offsets.
+
+    Route ``i`` owns points ``offsets[i]:offsets[i + 1]``.
+    """
+    coords_list = list(coords_list)
+    counts = np.fromiter((len(c) if c else 0 for c in coords_list), dtype=np.int64, count=len(coords_list))
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    points = np.fromiter(
+        (v for c in coords_list if c for pt in c for v in pt[:2]),
+        dtype=np.float64,
+        count=int(offsets[-1]) * 2,
+    ).reshape(-1, 2)
+    return points[:, 0], points[:, 1], offsets
+
+
+def route_lengths_m(coords_list) -> np.ndarray:
+    """Geodesic length of every route in one vectorized ``Geod.inv`` call."""
+    lats, lons, offsets = coords_to_soa(coords_list)
+    lengths = np.zeros(len(offsets) - 1, dtype=np.float64)
+    if len(lats) < 2:
+        return lengths
+    geod = _geod()
+    # Segment i joins point i to i + 1; segments spanning two routes are
+    # computed but never summed because each route only takes its own range.
+    if geod is None:
+        seg = haversine_segments_m(lats, lons)
+    else:
+        _, _, seg = geod.inv(lons[:-1], lats[:-1], lons[1:], lats[1:])
+    # Trailing pad so empty routes at the end can index ``cum[len(lats)]``.
+    cum = np.concatenate(([0.0], np.cumsum(seg), [0.0]))
+    starts = offsets[:-1]
+    ends = np.maximum(offsets[1:] - 1, starts)
+    return cum[ends] - cum[starts]
+
+
+def frame_lengths_m(df: pd.DataFrame) -> np.ndarray:
+    """Rounded length in metres of every row, read from ``_length_m`` where filled.
+
+    Rows without a cached length are measured together in one
+    ``route_lengths_m`` call.
+    """
+    if "_length_m" in df.columns:
+        lengths = pd.to_numeric(df["_length_m"], errors="coerce").to_numpy(dtype=np.float64, copy=True)
+    else:
+        lengths = np.full(len(df), np.nan)
+    missing = np.isnan(lengths)
+    if missing.any():
+        if "_coords" in df.columns:
+            lengths[missing] = np.rint(route_lengths_m(df["_coords"].to_numpy(dtype=object)[missing]))
+        else:
+            lengths[missing] = 0.0
+    return lengths.astype(np.int64)
 
 
 __all__ = [
     "row_to_coords",
+    "frame_to_coords",
     "polyline_color",
     "generate_route_id",
+    "generate_route_ids",
     "ensure_columns",
     "normalize_bool",
+    "normalize_bool_series",
+    "categorize_choice_columns",
     "prepare_routes_df",
     "update_history",
+    "update_history_batch",
+    "frame_fingerprint",
     "normalize_linebreaks",
     "parse_date_value",
     "reverse_geocode_name",
     "line_length_m",
+    "haversine_segments_m",
+    "cached_length_m",
+    "coords_to_soa",
+    "route_lengths_m",
+    "frame_lengths_m",
     "coords_to_ewkt",
 ]
@@ -1,28 +1,50 @@
 import json
-from typing import List, Optional, Tuple
+import math
+import os
+import pickle
+import xml.etree.ElementTree as ET
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
-from config import logger
+import numpy as np
 
-try:
-    from fastkml import kml as fastkml
-except Exception:  # pragma: no cover
-    fastkml = None
+from config import logger
 
 try:
+    import shapely
     from shapely import wkt as shapely_wkt
-    from shapely.geometry import LineString, shape as shapely_shape
+    from shapely.geometry import (
+        GeometryCollection,
+        LinearRing,
+        LineString,
+        MultiLineString,
+        MultiPoint,
+        MultiPolygon,
+        Point,
+        Polygon,
+        shape as shapely_shape,
+    )
     from shapely.geometry.base import BaseGeometry
+    from shapely.ops import linemerge
 except Exception:  # pragma: no cover
+    shapely = None
     shapely_wkt = None
     LineString = None
     shapely_shape = None
     BaseGeometry = None
+    linemerge = None
 
 try:
     from pyproj import Transformer
 except Exception:  # pragma: no cover
     Transformer = None
 
+try:
+    import orjson
+except Exception:  # pragma: no cover
+    orjson = None
+
 
 def to_shapely_geom(geom: object) -> Optional[object]:
     if geom is None:
@@ -31,92 +53,222 @@ def to_shapely_geom(geom: object) -> Optional[object]:
         return None
     if BaseGeometry is not None and isinstance(geom, BaseGeometry):
         return geom
+    # Build from the coordinate mapping first; formatting and re-parsing WKT is
+    # the slow leg, so it is only the fallback.
+    geo_interface = getattr(geom, "__geo_interface__", None)
+    if geo_interface is not None:
+        try:
+            return shapely_shape(geo_interface)
+        except Exception:
+            pass
     if shapely_wkt is not None and hasattr(geom, "wkt"):
         try:
             return shapely_wkt.loads(geom.wkt)
         except Exception:
             logger.exception("Failed to convert WKT to shapely geometry")
     try:
-        return shapely_shape(geom.__geo_interface__)
+        return shapely_shape(geom)
     except Exception:
-        try:
-            return shapely_shape(geom)
-        except Exception:
-            logger.exception("Failed to convert geo interface to shapely geometry")
-            return None
+        logger.exception("Failed to convert geo interface to shapely geometry")
+        return None
+
+
+_KML_GEOMETRY_TAGS = {"Point", "LineString", "LinearRing", "Polygon", "MultiGeometry"}
+
+
+def _kml_tag(elem) -> str:
+    return elem.tag.rsplit("}", 1)[-1]
+
+
+def _kml_child(elem, name: str):
+    for child in elem:
+        if _kml_tag(child) == name:
+            return child
+    return None
+
+
+def _kml_coordinates(elem) -> List[Tuple[float, ...]]:
+    node = _kml_child(elem, "coordinates")
+    if node is None or not node.text:
+        return []
+    return [tuple(map(float, token.split(","))) for token in node.text.split()]
+
+
+def _kml_ring(boundary) -> List[Tuple[float, ...]]:
+    ring = _kml_child(boundary, "LinearRing") if boundary is not None else None
+    return _kml_coordinates(ring) if ring is not None else []
+
+
+def _kml_geometry(elem) -> Optional[object]:
+    tag = _kml_tag(elem)
+    if tag == "Point":
+        coords = _kml_coordinates(elem)
+        return Point(coords[0]) if coords else None
+    if tag == "LineString":
+        return LineString(_kml_coordinates(elem))
+    if tag == "LinearRing":
+        return LinearRing(_kml_coordinates(elem))
+    if tag == "Polygon":
+        shell = _kml_ring(_kml_child(elem, "outerBoundaryIs"))
+        holes = [_kml_ring(b) for b in elem if _kml_tag(b) == "innerBoundaryIs"]
+        return Polygon(shell, [h for h in holes if h])
+    if tag == "MultiGeometry":
+        parts = [g for g in (_kml_geometry(c) for c in elem if _kml_tag(c) in _KML_GEOMETRY_TAGS) if g is not None]
+        types = {p.geom_type for p in parts}
+        if types == {"Polygon"}:
+            return MultiPolygon(parts)
+        if types == {"LineString"}:
+            return MultiLineString(parts)
+        if types == {"Point"}:
+            return MultiPoint(parts)
+        return GeometryCollection(parts)
+    return None
 
 
 def load_kml_geometries(path: str) -> List[Tuple[str, object]]:
-    if fastkml is None:
-        raise RuntimeError("fastkml not available")
+    """``(name, geometry)`` for every Placemark in the KML at ``path``.
 
-    with open(path, "rb") as fh:
-        kml_doc = fastkml.KML()
-        kml_doc.from_string(fh.read())
+    The file is streamed with ``iterparse`` and each Placemark is cleared once
+    its geometry is built, so memory does not grow with the XML tree.
+    """
+    if LineString is None:
+        raise RuntimeError("shapely not available")
 
     results: List[Tuple[str, object]] = []
+    for _, elem in ET.iterparse(path, events=("end",)):
+        if _kml_tag(elem) != "Placemark":
+            continue
+        name_node = _kml_child(elem, "name")
+        name = (name_node.text or "").strip() if name_node is not None else ""
+        for child in elem:
+            if _kml_tag(child) not in _KML_GEOMETRY_TAGS:
+                continue
+            try:
+                geom = _kml_geometry(child)
+            except Exception:
+                logger.exception("Failed to build KML geometry for placemark %r", name)
+                geom = None
+            if geom is not None and not geom.is_empty:
+                results.append((name, geom))
+            break
+        elem.clear()
+    return results
 
-    def _walk(features):
-        for feat in features:
-            if hasattr(feat, "features"):
-                _walk(feat.features())
-            if hasattr(feat, "geometry") and feat.geometry:
-                geom = to_shapely_geom(feat.geometry)
-                if geom is not None:
-                    results.append((getattr(feat, "name", "") or "", geom))
 
-    _walk(kml_doc.features())
+_KML_CACHE: Dict[str, List[Tuple[str, object]]] = {}
+
+
+def load_kml_geometries_cached(path: str) -> List[Tuple[str, object]]:
+    """Load KML geometries once per process, backed by a ``.pkl`` file next to the KML.
+
+    The pickle is reused while it is at least as new as the KML; any failure to
+    read or write it falls back to parsing the KML.
+    """
+    if path in _KML_CACHE:
+        return _KML_CACHE[path]
+    cache_path = path + ".pkl"
+    results = None
+    try:
+        if os.path.getmtime(cache_path) >= os.path.getmtime(path):
+            with open(cache_path, "rb") as fh:
+                results = pickle.load(fh)
+            logger.info("Loaded %d KML geometries from cache %s", len(results), cache_path)
+    except FileNotFoundError:
+        results = None
+    except Exception:
+        logger.exception("Failed to read KML cache %s; reparsing", cache_path)
+        results = None
+    if results is None:
+        results = load_kml_geometries(path)
+        try:
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as fh:
+                pickle.dump(results, fh, protocol=5)
+            os.replace(tmp_path, cache_path)
+            logger.info("Wrote KML cache %s", cache_path)
+        except Exception:
+            logger.warning("Could not write KML cache %s", cache_path, exc_info=True)
+    _KML_CACHE[path] = results
     return results
 
 
 def _sample_coord(coords):
-    if not coords:
-        return None
-    if isinstance(coords[0], (float, int)):
-        return coords
-    return _sample_coord(coords[0])
+    # GeoJSON nesting is homogeneous: follow the first element of each level
+    # down to the first position.
+    while isinstance(coords, (list, tuple)) and coords:
+        if isinstance(coords[0], (float, int)):
+            return coords
+        coords = coords[0]
+    return None
 
 
 def sample_lat(coords: object) -> Optional[float]:
-    if not coords:
-        return None
-    if isinstance(coords[0], (float, int)):
-        return coords[1] if len(coords) > 1 else None
-    try:
-        return sample_lat(coords[0])
-    except Exception:
+    position = _sample_coord(coords)
+    if position is None or len(position) < 2:
         return None
+    return position[1]
+
+
+@lru_cache(maxsize=32)
+def _wgs84_transformer(source_epsg: int):
+    """Transformer from ``EPSG:source_epsg`` to WGS84, built once per EPSG code."""
+    return Transformer.from_crs(f"EPSG:{source_epsg}", "EPSG:4326", always_xy=True)
+
+
+def read_json_file(path: str) -> object:
+    """Parse the JSON file at ``path``, with orjson's C decoder when it is installed."""
+    if orjson is not None:
+        with open(path, "rb") as fh:
+            return orjson.loads(fh.read())
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
 
 
 def load_geojson(path: str, source_epsg: Optional[int] = None) -> Optional[dict]:
     try:
-        with open(path, "r", encoding="utf-8") as fh:
-            data = json.load(fh)
+        data = read_json_file(path)
         if not source_epsg:
             return data
         if Transformer is None:
             logger.warning("GeoJSON %s expects EPSG:%s but pyproj is unavailable", path, source_epsg)
             return data
         try:
-            transformer = Transformer.from_crs(f"EPSG:{source_epsg}", "EPSG:4326", always_xy=True)
+            transformer = _wgs84_transformer(int(source_epsg))
         except Exception:
             transformer = None
         if transformer is None:
             logger.warning("GeoJSON %s expects EPSG:%s but no transformer available", path, source_epsg)
             return data
 
-        def _reproject_coords(coords):
-            if isinstance(coords[0], (float, int)):
-                x, y = coords
-                lon, lat = transformer.transform(x, y)
-                return [lon, lat]
-            return [_reproject_coords(c) for c in coords]
-
+        # Gather every position slot in the file, transform them all in one
+        # pyproj call, then write the results back into the same slots.
+        positions: List[list] = []
         for feature in data.get("features", []):
             geom = feature.get("geometry") or {}
             coords = geom.get("coordinates")
-            if coords:
-                geom["coordinates"] = _reproject_coords(coords)
+            if not coords:
+                continue
+            if isinstance(coords[0], (float, int)):
+                # A Point's coordinates are the position itself; give it a
+                # fresh list so the write-back below has a slot to fill.
+                coords = geom["coordinates"] = list(coords)
+                positions.append(coords)
+                continue
+            stack = [coords]
+            while stack:
+                coords = stack.pop()
+                if isinstance(coords[0][0], (float, int)):
+                    positions.extend(coords)
+                else:
+                    stack.extend(coords)
+        if positions:
+            # float64 arrays go straight into pyproj's buffer without a copy.
+            points = np.array(positions, dtype=np.float64)
+            lons, lats = transformer.transform(points[:, 0], points[:, 1])
+            # Positions are rewritten in place: no new list per point.
+            for pos, lon, lat in zip(positions, lons.tolist(), lats.tolist()):
+                pos[0] = lon
+                pos[1] = lat
         return data
     except Exception:
         logger.exception("Failed to load geojson %s", path)
@@ -126,11 +278,9 @@ def load_geojson(path: str, source_epsg: Optional[int] = None) -> Optional[dict]
 def geojson_geom_types(data: Optional[dict]) -> dict:
     if not data:
         return {}
-    counts: dict = {}
-    for feat in data.get("features", []):
-        gtype = (feat.get("geometry") or {}).get("type") or "unknown"
-        counts[gtype] = counts.get(gtype, 0) + 1
-    return counts
+    return dict(
+        Counter((feat.get("geometry") or {}).get("type") or "unknown" for feat in data.get("features", []))
+    )
 
 
 def strip_ewkt(value: str) -> str:
@@ -139,28 +289,129 @@ def strip_ewkt(value: str) -> str:
     return value
 
 
+def _parse_linestring_wkt_fast(wkt_text: str) -> Optional[List[Tuple[float, float]]]:
+    """Parse a plain 2D ``LINESTRING (x y, ...)`` into (lat, lon) pairs.
+
+    Returns None for anything else (Z/M, EMPTY, single-point, multi-part,
+    malformed) so the caller can fall back to Shapely.
+    """
+    head, sep, body = wkt_text.partition("(")
+    if not sep or head.strip().upper() != "LINESTRING" or not body.endswith(")"):
+        return None
+    body = body[:-1]
+    if "(" in body or ")" in body:
+        return None
+    values = body.replace(",", " ").split()
+    if len(values) < 4 or len(values) % 2:
+        return None
+    try:
+        floats = list(map(float, values))
+    except ValueError:
+        return None
+    if body.count(",") != len(floats) // 2 - 1:
+        return None
+    return list(zip(floats[1::2], floats[0::2]))
+
+
 def wkt_to_latlon(wkt_text: str) -> List[Tuple[float, float]]:
+    wkt_text = strip_ewkt(wkt_text)
+    # Route sheets store plain LINESTRINGs; skip the Shapely round-trip for those.
+    fast = _parse_linestring_wkt_fast(wkt_text.strip())
+    if fast is not None:
+        return fast
     if shapely_wkt is None:
         raise RuntimeError("shapely not available")
-    geom = shapely_wkt.loads(strip_ewkt(wkt_text))
-    if geom.geom_type == "LineString":
-        return [(lat, lon) for lon, lat in geom.coords]
-    if geom.geom_type == "MultiLineString":
-        coords: List[Tuple[float, float]] = []
-        for line in geom.geoms:
-            coords.extend([(lat, lon) for lon, lat in line.coords])
-        return coords
-    return []
+    geom = shapely_wkt.loads(wkt_text)
+    if geom.geom_type not in ("LineString", "MultiLineString"):
+        return []
+    return _xy_to_latlon(shapely.get_coordinates(geom))
+
+
+def _xy_to_latlon(xy: np.ndarray) -> List[Tuple[float, float]]:
+    """(lat, lon) tuples from an ``(n, 2)`` array of (lon, lat) coordinates."""
+    return list(zip(xy[:, 1].tolist(), xy[:, 0].tolist()))
 
 
 def coords_to_ewkt(coords: List[Tuple[float, float]]) -> str:
     if LineString is None:
         raise RuntimeError("shapely not available")
-    line = LineString([(lon, lat) for lat, lon in coords])
+    line = LineString(np.asarray(coords, dtype=np.float64)[:, ::-1]) if len(coords) else LineString()
     wkt = line.wkt
     return f"SRID=4326;{wkt}"
 
 
+def _is_rectangle(geom) -> bool:
+    """True for a hole-free axis-aligned rectangle Polygon."""
+    return (
+        geom.geom_type == "Polygon"
+        and not geom.interiors
+        and len(geom.exterior.coords) == 5
+        and geom.equals(geom.envelope)
+    )
+
+
+def _clip_segment(x0, y0, x1, y1, xmin, ymin, xmax, ymax):
+    """Liang-Barsky clip of one segment; returns ``(t0, t1)`` or None if outside."""
+    t0, t1 = 0.0, 1.0
+    dx = x1 - x0
+    dy = y1 - y0
+    for p, q in ((-dx, x0 - xmin), (dx, xmax - x0), (-dy, y0 - ymin), (dy, ymax - y0)):
+        if p == 0:
+            if q < 0:
+                return None
+            continue
+        r = q / p
+        if p < 0:
+            if r > t1:
+                return None
+            t0 = max(t0, r)
+        else:
+            if r < t0:
+                return None
+            t1 = min(t1, r)
+    return t0, t1
+
+
+def _clip_line_to_rect(
+    coords: List[Tuple[float, float]], bounds: Tuple[float, float, float, float]
+) -> List[Tuple[float, float]]:
+    """Longest piece of a (lat, lon) line inside a lon/lat rectangle, or []."""
+    xmin, ymin, xmax, ymax = bounds
+    parts: List[List[Tuple[float, float]]] = []
+    current: List[Tuple[float, float]] = []
+    for (lat0, lon0), (lat1, lon1) in zip(coords, coords[1:]):
+        hit = _clip_segment(lon0, lat0, lon1, lat1, xmin, ymin, xmax, ymax)
+        if hit is None:
+            current = []
+            continue
+        t0, t1 = hit
+        start = (lat0 + t0 * (lat1 - lat0), lon0 + t0 * (lon1 - lon0)) if t0 > 0 else (lat0, lon0)
+        end = (lat0 + t1 * (lat1 - lat0), lon0 + t1 * (lon1 - lon0)) if t1 < 1 else (lat1, lon1)
+        if current and current[-1] == start:
+            current.append(end)
+        else:
+            current = [start, end]
+            parts.append(current)
+        if t1 < 1:
+            current = []
+
+    def _planar_length(part):
+        return sum(math.hypot(b[0] - a[0], b[1] - a[1]) for a, b in zip(part, part[1:]))
+
+    parts = [p for p in parts if _planar_length(p) > 0]
+    return max(parts, key=_planar_length) if parts else []
+
+
+def _clip_changed(out: List[Tuple[float, float]], coords: List[Tuple[float, float]]) -> bool:
+    # A clip that removed anything nearly always changes the point count or an
+    # endpoint; only when both match is the full point-by-point compare needed.
+    if len(out) != len(coords):
+        return True
+    if tuple(out[0]) != tuple(coords[0]) or tuple(out[-1]) != tuple(coords[-1]):
+        return True
+    return any(tuple(a) != tuple(b) for a, b in zip(out, coords))
+
+
 def clip_coords_to_borough(
     coords: List[Tuple[float, float]],
     borough_geom: Optional[object],
@@ -175,7 +426,30 @@ def clip_coords_to_borough(
         logger.info("clip_coords_to_borough: shapely not available")
         return coords, False
     try:
-        line = LineString([(lon, lat) for lat, lon in coords])
+        lats = [lat for lat, _ in coords]
+        lons = [lon for _, lon in coords]
+        bminx, bminy, bmaxx, bmaxy = borough_geom.bounds
+        if min(lons) > bmaxx or max(lons) < bminx or min(lats) > bmaxy or max(lats) < bminy:
+            logger.info("clip_coords_to_borough: outside borough bounds")
+            return [], True
+        if _is_rectangle(borough_geom):
+            # A plain bounding box needs no GEOS overlay: clip each segment
+            # against the rectangle directly.
+            out = _clip_line_to_rect([(lat, lon) for lat, lon in coords], (bminx, bminy, bmaxx, bmaxy))
+            if not out:
+                logger.info("clip_coords_to_borough: empty after clip")
+                return [], True
+            return out, _clip_changed(out, coords)
+        line = LineString(list(zip(lons, lats)))
+        # Borough geometries live for the session; preparing one once makes
+        # every later containment test cheap. Most edits stay inside the
+        # borough and need no intersection at all.
+        if not shapely.is_prepared(borough_geom):
+            shapely.prepare(borough_geom)
+        # covers, not contains: a route running along the boundary is still
+        # wholly inside and needs no clip.
+        if borough_geom.covers(line):
+            return coords, False
         clipped = line.intersection(borough_geom)
         if clipped.is_empty:
             logger.info("clip_coords_to_borough: empty after clip")
@@ -183,8 +457,6 @@ def clip_coords_to_borough(
         if clipped.geom_type == "LineString":
             result = clipped
         else:
-            from shapely.ops import linemerge
-
             merged = linemerge(clipped)
             if merged.geom_type == "LineString":
                 result = merged
@@ -194,8 +466,8 @@ def clip_coords_to_borough(
                     logger.info("clip_coords_to_borough: no parts after merge")
                     return [], True
                 result = max(parts, key=lambda g: g.length)
-        out = [(coord[1], coord[0]) for coord in result.coords]
-        return out, True if out != coords else False
+        out = _xy_to_latlon(shapely.get_coordinates(result))
+        return out, _clip_changed(out, coords)
     except Exception:
         logger.exception("Failed to clip line to borough")
         return coords, False
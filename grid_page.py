@@ -1,16 +1,25 @@
+import base64
 import json
 import logging
-from typing import Iterable, List, Optional, Set, Tuple
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+import numpy as np
 from shiny import ui
 
-from config import CHOICES, TOOLTIP_TEXT
+from config import CHOICES, HSS_DEBUG, STATIC_DIR, TOOLTIP_TEXT
 from config import ONE_WAY_DASH
 from data_processing import polyline_color
+from server_highlight import highlight_guid_set
 from config import MAP_COLORS
 
 
 GRID_PAGE_SIZE = 10
+# Select choices are fixed config; build the lists once rather than per row.
+# Shiny only reads them, so every row shares the same list.
+_FLOW_CHOICES = list(CHOICES["flow"].values())
+_PROTECTION_CHOICES = list(CHOICES["protection"].values())
+_OWNERSHIP_CHOICES = list(CHOICES["ownership"].values())
 logger = logging.getLogger("healthy_streets_shinypy")
 
 
@@ -18,7 +27,9 @@ def safe_guid(guid: object) -> str:
     return str(guid).replace("-", "_")
 
 
+@lru_cache(maxsize=4096)
 def grid_input_ids(guid: object) -> dict:
+    # Cached per guid; callers must treat the returned dict as read-only.
     sg = safe_guid(guid)
     return {
         "name": f"grid_name_{sg}",
@@ -34,6 +45,46 @@ def grid_input_ids(guid: object) -> dict:
     }
 
 
+def _pager_item(label: str, target: Optional[int] = None, active: bool = False, disabled: bool = False) -> ui.Tag:
+    cls = "page-item"
+    if active:
+        cls += " active"
+    if disabled:
+        cls += " disabled"
+    if target is None or disabled:
+        return ui.tags.li(ui.tags.span(label, class_="page-link"), class_=cls)
+    return ui.tags.li(
+        ui.tags.a(label, class_="page-link", href="#", onclick=f"hssSetGridPage({target}); return false;"),
+        class_=cls,
+    )
+
+
+@lru_cache(maxsize=64)
+def build_grid_pager(page: int, total_pages: int, window: int = 2) -> ui.Tag:
+    # Cached per (page, total_pages); callers must not mutate the returned tag.
+    start = max(1, page - window)
+    end = min(total_pages, page + window)
+    items = [
+        _pager_item("«", 1, disabled=(page == 1)),
+        _pager_item("‹", page - 1, disabled=(page == 1)),
+    ]
+    for p in range(start, end + 1):
+        items.append(_pager_item(str(p), p, active=(p == page)))
+    items.extend(
+        [
+            _pager_item("›", page + 1, disabled=(page == total_pages)),
+            _pager_item("»", total_pages, disabled=(page == total_pages)),
+        ]
+    )
+    return ui.tags.nav(ui.tags.ul(*items, class_="pagination pagination-sm mb-0"))
+
+
+def _coords_blob(coords) -> str:
+    # Little-endian float32 (lat, lon) pairs, base64-encoded: about a quarter
+    # of the JSON text size and decoded with a Float32Array.
+    return base64.b64encode(np.asarray(coords, dtype="<f4").tobytes()).decode("ascii")
+
+
 def route_minimap(
     coords: Optional[List[Tuple[float, float]]],
     color: str,
@@ -43,6 +94,7 @@ def route_minimap(
     width: int = 120,
     height: int = 80,
     weight: int = 2,
+    coords_bin: Optional[str] = None,
 ):
     if not coords:
         return ui.tags.div("No geometry", class_="hss-grid-map-empty")
@@ -51,7 +103,7 @@ def route_minimap(
         class_="hss-grid-map",
         style=f"width:{width}px;height:{height}px;",
         **{
-            "data-coords": json.dumps(coords),
+            "data-coords-bin": coords_bin or _coords_blob(coords),
             "data-color": color,
             "data-opacity": f"{opacity:.2f}",
             "data-dash": dash_array or "",
@@ -60,294 +112,40 @@ def route_minimap(
         },
     )
 
-def grid_assets():
-    return ui.TagList(
-        ui.tags.style(
-            """
-            .hss-grid-controls {
-                display: flex;
-                gap: 0.75rem;
-                align-items: center;
-                margin-bottom: 0.5rem;
-            }
-            .hss-grid-map {
-                border: 1px solid #d7dbe0;
-                border-radius: 6px;
-                background: #f8f9fa;
-                position: relative;
-                z-index: 1;
-            }
-            .hss-grid-map-empty {
-                width: 120px;
-                height: 80px;
-                border: 1px solid #d7dbe0;
-                border-radius: 6px;
-                background: #f8f9fa;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                font-size: 12px;
-                color: #666;
-            }
-            .hss-grid-table td, .hss-grid-table th {
-                vertical-align: top;
-                padding: 0.35rem;
-            }
-            .hss-grid-table .form-control,
-            .hss-grid-table .form-select {
-                font-size: 0.85rem;
-                padding: 0.2rem 0.4rem;
-            }
-            .hss-grid-table th {
-                font-size: 0.9rem;
-            }
-            .hss-grid-table .shiny-input-container {
-                margin-bottom: 0.2rem !important;
-            }
-            .hss-grid-audit .shiny-input-container {
-                margin-bottom: 0.1rem !important;
-            }
-            .hss-grid-audit label {
-                font-size: 12px;
-            }
-            .hss-grid-stack {
-                display: flex;
-                flex-direction: column;
-                gap: 0.25rem;
-            }
-            .hss-grid-action {
-                display: flex;
-                flex-direction: column;
-                gap: 0.25rem;
-                align-items: flex-start;
-            }
-            .hss-grid-map-wrap {
-                position: relative;
-                display: inline-block;
-            }
-            .hss-grid-goto {
-                position: absolute;
-                top: 4px;
-                right: 4px;
-                width: 24px;
-                height: 24px;
-                padding: 0;
-                border-radius: 6px;
-                display: inline-flex;
-                align-items: center;
-                justify-content: center;
-                font-size: 12px;
-                z-index: 5;
-                background: #ffffff;
-                box-shadow: 0 1px 2px rgba(0,0,0,0.15);
-            }
-            .hss-grid-badge {
-                position: absolute;
-                top: 4px;
-                left: 4px;
-                z-index: 6;
-            }
-            .hss-grid-action .btn {
-                padding: 0.2rem 0.5rem;
-                font-size: 12px;
-            }
-            .hss-grid-table-wrap {
-                overflow-x: auto;
-            }
-            .hss-grid-table th:first-child,
-            .hss-grid-table td:first-child {
-                position: sticky;
-                left: 0;
-                background: #fff;
-                z-index: 1;
-            }
-            .hss-grid-table th:first-child {
-                z-index: 2;
-            }
-            .hss-grid-row-added td {
-                background: #f0fdf4;
-            }
-            .hss-grid-row-changed td {
-                background: #fff7ed;
-            }
-            .hss-grid-row-added td:first-child {
-                background: #f0fdf4;
-            }
-            .hss-grid-row-changed td:first-child {
-                background: #fff7ed;
-            }
-            .hss-change-badge {
-                display: inline-block;
-                padding: 0.1rem 0.5rem;
-                border-radius: 999px;
-                font-size: 12px;
-                line-height: 1.4;
-                align-self: flex-start;
-            }
-            .hss-change-badge-changed {
-                background: #fde68a;
-                color: #92400e;
-            }
-            .hss-change-badge-added {
-                background: #bbf7d0;
-                color: #166534;
-            }
-            """
-        ),
-        ui.tags.script(
-            """
-            function hssEnsureLeaflet(cb) {
-                if (window.L) {
-                    cb();
-                    return;
-                }
-                if (window.__hssLeafletLoading) {
-                    const timer = setInterval(function() {
-                        if (window.L) {
-                            clearInterval(timer);
-                            cb();
-                        }
-                    }, 50);
-                    return;
-                }
-                window.__hssLeafletLoading = true;
-                const link = document.createElement('link');
-                link.rel = 'stylesheet';
-                link.href = 'https://unpkg.com/leaflet@1.9.4/dist/leaflet.css';
-                document.head.appendChild(link);
-                const script = document.createElement('script');
-                script.src = 'https://unpkg.com/leaflet@1.9.4/dist/leaflet.js';
-                script.onload = function() { cb(); };
-                document.head.appendChild(script);
-            }
 
-            function hssInitMiniMaps(root) {
-                hssEnsureLeaflet(function() {
-                    const nodes = (root || document).querySelectorAll('.hss-grid-map');
-                    nodes.forEach(function(node) {
-                        const raw = node.dataset.coords;
-                        if (!raw) return;
-                        const coords = JSON.parse(raw);
-                        if (!coords || !coords.length) return;
-                        const strokeColor = node.dataset.color || '#1c42d7';
-                        const strokeOpacity = node.dataset.opacity ? parseFloat(node.dataset.opacity) : 0.9;
-                        const dash = node.dataset.dash || null;
-                        const weight = node.dataset.weight ? parseFloat(node.dataset.weight) : 2;
-                        console.log('HSS grid minimap style', { color: strokeColor, opacity: strokeOpacity, dash: dash });
-                        const coordsKey = JSON.stringify(coords);
-                        if (node.dataset.hssInit) {
-                            if (node._hssPolyline) {
-                                node._hssPolyline.setStyle({ color: strokeColor, opacity: strokeOpacity, dashArray: dash, weight: weight });
-                                console.log('HSS grid minimap updated');
-                            }
-                            if (node._hssCoordsKey !== coordsKey && node._hssPolyline) {
-                                node._hssPolyline.setLatLngs(coords);
-                                if (node._hssMap) {
-                                    const bounds = L.latLngBounds(coords);
-                                    node._hssMap.fitBounds(bounds, { padding: [2, 2] });
-                                    const maxZoom = 15;
-                                    if (node._hssMap.getZoom() > maxZoom) {
-                                        node._hssMap.setZoom(maxZoom);
-                                    }
-                                }
-                                node._hssCoordsKey = coordsKey;
-                            }
-                            return;
-                        }
-                        node.dataset.hssInit = '1';
-                        node._hssCoordsKey = coordsKey;
-                        const map = L.map(node, {
-                            attributionControl: false,
-                            zoomControl: false,
-                            dragging: false,
-                            scrollWheelZoom: false,
-                            doubleClickZoom: false,
-                            boxZoom: false,
-                            keyboard: false,
-                            tap: false,
-                        });
-                        node._hssMap = map;
-                        L.tileLayer('https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png', {
-                            maxZoom: 19,
-                            attribution: '&copy; OpenStreetMap contributors &copy; CARTO'
-                        }).addTo(map);
-                        const line = L.polyline(coords, { color: strokeColor, opacity: strokeOpacity, dashArray: dash, weight: weight }).addTo(map);
-                        node._hssPolyline = line;
-                        console.log('HSS grid minimap created');
-                        const bounds = L.latLngBounds(coords);
-                        map.fitBounds(bounds, { padding: [2, 2] });
-                        const maxZoom = 15;
-                        if (map.getZoom() > maxZoom) {
-                            map.setZoom(maxZoom);
-                        }
-                    });
-                });
-            }
+# guid -> (coords id, coords, encoded coords). Only the compact blob is kept,
+# one per route. _coords lists are replaced on edit, never mutated, so the
+# list identity names the geometry version; the list itself is held so its id
+# cannot be reused while the entry lives.
+_MINIMAP_BLOBS: Dict[str, Tuple[int, object, str]] = {}
+_MINIMAP_BLOBS_MAX = 4096
 
-            function hssRefreshMiniMaps() {
-                hssInitMiniMaps(document);
-            }
 
-            document.addEventListener('DOMContentLoaded', function() {
-                hssInitMiniMaps(document);
-                window.hssSetGridPage = function(page) {
-                    if (!window.Shiny || !window.Shiny.setInputValue) return;
-                    window.Shiny.setInputValue('grid_page', page, {priority: 'event'});
-                };
-                document.addEventListener('click', function(ev) {
-                    const btn = ev.target.closest('.hss-grid-btn');
-                    if (!btn) return;
-                    if (!window.Shiny || !window.Shiny.setInputValue) return;
-                    const guid = btn.dataset.guid;
-                    const action = btn.dataset.action;
-                    if (!guid || !action) return;
-                    const payload = { guid: guid, ts: Date.now() };
-                    if (action === 'goto') {
-                        window.Shiny.setInputValue('grid_goto_click', payload, {priority: 'event'});
-                    } else if (action === 'delete') {
-                        window.Shiny.setInputValue('grid_delete_click', payload, {priority: 'event'});
-                    } else if (action.startsWith('undo_')) {
-                        payload.action = action;
-                        window.Shiny.setInputValue('changes_undo_click', payload, {priority: 'event'});
-                    }
-                });
-                if (window.Shiny && window.Shiny.addCustomMessageHandler) {
-                    window.Shiny.addCustomMessageHandler('hss_refresh_minimaps', function(payload) {
-                        console.log('HSS grid: refresh minimaps', payload);
-                        hssRefreshMiniMaps();
-                    });
-                    window.Shiny.addCustomMessageHandler('hss_update_minimap', function(payload) {
-                        console.log('HSS grid: update minimap', payload);
-                        if (!payload || !payload.guid) return;
-                        const node = document.querySelector('.hss-grid-map[data-guid=\"' + payload.guid + '\"]');
-                        if (!node) return;
-                        node.dataset.color = payload.color || node.dataset.color;
-                        node.dataset.opacity = (payload.opacity !== undefined) ? payload.opacity : node.dataset.opacity;
-                        node.dataset.dash = payload.dash || '';
-                        if (node._hssPolyline) {
-                            node._hssPolyline.setStyle({
-                                color: node.dataset.color || '#1c42d7',
-                                opacity: parseFloat(node.dataset.opacity || '0.9'),
-                                dashArray: node.dataset.dash || null,
-                                weight: 2,
-                            });
-                        } else {
-                            hssInitMiniMaps(node);
-                        }
-                    });
-                }
-                const observer = new MutationObserver(function(mutations) {
-                    mutations.forEach(function(m) {
-                        m.addedNodes.forEach(function(node) {
-                            if (node.nodeType !== 1) return;
-                            hssInitMiniMaps(node);
-                        });
-                    });
-                });
-                observer.observe(document.body, { childList: true, subtree: true });
-            });
-            """
-        ),
+def _minimap_for(
+    coords,
+    color: str,
+    opacity: float,
+    dash_array: Optional[str],
+    guid: str,
+) -> ui.Tag:
+    if not coords:
+        return route_minimap(coords, color, opacity, dash_array, guid)
+    hit = _MINIMAP_BLOBS.get(guid)
+    if hit is None or hit[0] != id(coords):
+        if len(_MINIMAP_BLOBS) >= _MINIMAP_BLOBS_MAX:
+            _MINIMAP_BLOBS.clear()
+        hit = (id(coords), coords, _coords_blob(coords))
+        _MINIMAP_BLOBS[guid] = hit
+    return route_minimap(coords, color, opacity, dash_array, guid, coords_bin=hit[2])
+
+
+def grid_assets():
+    # Linked rather than inlined so the browser caches them; grid_assets() is
+    # included by the Grid, Changes and Suggestions tabs.
+    return ui.TagList(
+        ui.tags.script(f"window.HSS_DEBUG = {json.dumps(HSS_DEBUG)};"),
+        ui.include_css(STATIC_DIR / "hss_grid.css", method="link"),
+        ui.include_js(STATIC_DIR / "hss_grid.js", method="link"),
     )
 
 
@@ -379,13 +177,13 @@ def render_grid(
     start = max(page - 1, 0) * GRID_PAGE_SIZE
     end = start + GRID_PAGE_SIZE
     slice_rows = rows.iloc[start:end]
-    highlight_set: Set[str] = set(highlight_guids or [])
+    highlight_set: Set[str] = highlight_guid_set(highlight_guids)
 
     rows_ui = []
     status_map = change_status or {}
     for _, row in slice_rows.iterrows():
         guid = row.get("guid", "")
-        safe_guid_val = safe_guid(guid)
+        ids = grid_input_ids(guid)
         status = status_map.get(str(guid))
         coords = row.get("_coords")
         base_color = polyline_color(row, MAP_COLORS)
@@ -407,7 +205,7 @@ def render_grid(
                     ui.tags.div(
                         ui.tags.div(
                             badge if badge else "",
-                            route_minimap(coords, base_color, opacity, dash_array, str(guid)),
+                            _minimap_for(coords, base_color, opacity, dash_array, str(guid)),
                             ui.tags.button(
                                 "↗",
                                 title="Go to map",
@@ -422,21 +220,21 @@ def render_grid(
                 ui.tags.td(
                     ui.tags.div(
                         ui.input_text(
-                            f"grid_name_{safe_guid_val}", 
+                            ids["name"], 
                             "", 
                             value=str(row.get("name", "")),
                             placeholder="Name",
                             update_on="blur",
                         ),
                         ui.input_text(
-                            f"grid_designation_{safe_guid_val}",
+                            ids["designation"],
                             "",
                             value=str(row.get("Designation", "")),
                             placeholder="Designation",
                             update_on="blur",
                         ),
                         ui.input_text(
-                            f"grid_id_{safe_guid_val}", 
+                            ids["id"], 
                             "", 
                             value=str(row.get("id", "")),
                             placeholder="Id",
@@ -448,15 +246,15 @@ def render_grid(
                 ui.tags.td(
                     ui.tags.div(
                         ui.input_select(
-                            f"grid_oneway_{safe_guid_val}",
+                            ids["oneway"],
                             "",
                             choices=["TwoWay", "OneWay"],
                             selected=row.get("OneWay", "TwoWay") or "TwoWay",
                         ),
                         ui.input_select(
-                            f"grid_flow_{safe_guid_val}",
+                            ids["flow"],
                             "",
-                            choices=list(CHOICES["flow"].values()),
+                            choices=_FLOW_CHOICES,
                             selected=row.get("Flow", "") or "",
                         ),
                         class_="hss-grid-stack",
@@ -465,15 +263,15 @@ def render_grid(
                 ui.tags.td(
                     ui.tags.div(
                         ui.input_select(
-                            f"grid_protection_{safe_guid_val}",
+                            ids["protection"],
                             "",
-                            choices=list(CHOICES["protection"].values()),
+                            choices=_PROTECTION_CHOICES,
                             selected=row.get("Protection", "") or "",
                         ),
                         ui.input_select(
-                            f"grid_owner_{safe_guid_val}",
+                            ids["owner"],
                             "",
-                            choices=list(CHOICES["ownership"].values()),
+                            choices=_OWNERSHIP_CHOICES,
                             selected=row.get("Ownership", "") or "",
                         ),
                         class_="hss-grid-stack",
@@ -482,17 +280,17 @@ def render_grid(
                 ui.tags.td(
                     ui.tags.div(
                         ui.input_checkbox(
-                            f"grid_audit_sv_{safe_guid_val}",
+                            ids["audit_sv"],
                             "Audited StreetView",
                             value=bool(row.get("AuditedStreetView", False)),
                         ),
                         ui.input_checkbox(
-                            f"grid_audit_ip_{safe_guid_val}",
+                            ids["audit_ip"],
                             "Audited In Person",
                             value=bool(row.get("AuditedInPerson", False)),
                         ),
                         ui.input_checkbox(
-                            f"grid_rejected_{safe_guid_val}",
+                            ids["rejected"],
                             "Rejected",
                             value=bool(row.get("Rejected", False)),
                         ),
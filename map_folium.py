@@ -1,42 +1,93 @@
+import os
 from typing import Dict, Optional, Tuple
 
 import folium
 from branca.element import Element, MacroElement
 from folium.elements import JSCSSMixin
-from jinja2 import Template
+from folium.utilities import JsCode
+from jinja2 import BaseLoader, Environment
 
 from config import (
     CYCLE_ROUTES_JSON,
+    HSS_DEBUG,
     LCC_TFL_GEOJSON,
     MAP_COLORS,
     ONE_WAY_DASH,
+    STATIC_URL_PATH,
     TFL_GEOJSON,
     get_route_style,
     logger,
 )
-from data_processing import line_length_m
+from data_processing import cached_length_m
 from geo_utils import geojson_geom_types, load_geojson
 
-_CYCLE_ROUTES_CACHE = None
+# (st_mtime_ns, parsed geojson) of the last CycleRoutes read.
+_CYCLE_ROUTES_CACHE: Optional[Tuple[int, Optional[dict]]] = None
 
 
 def _load_cycle_routes_once() -> Optional[dict]:
+    """Parsed CycleRoutes geojson, re-read only when the file's mtime changes."""
     global _CYCLE_ROUTES_CACHE
-    if _CYCLE_ROUTES_CACHE is not None:
-        return _CYCLE_ROUTES_CACHE
+    try:
+        mtime_ns = os.stat(CYCLE_ROUTES_JSON).st_mtime_ns
+    except OSError:
+        return load_geojson(CYCLE_ROUTES_JSON)
+    cache = _CYCLE_ROUTES_CACHE
+    if cache is not None and cache[0] == mtime_ns:
+        return cache[1]
     data = load_geojson(CYCLE_ROUTES_JSON)
     if data:
         try:
             logger.info("Loaded CycleRoutes geojson features=%s", len(data.get("features", [])))
         except Exception:
             logger.info("Loaded CycleRoutes geojson")
-    _CYCLE_ROUTES_CACHE = data
-    return _CYCLE_ROUTES_CACHE
+    _CYCLE_ROUTES_CACHE = (mtime_ns, data)
+    return data
 
 
-class GeomanControl(JSCSSMixin, MacroElement):
-    _template = Template(
-        """
+# Read-only reference layers whose source file is at least this large are
+# sliced into vector tiles; smaller ones stay plain GeoJSON layers. Paint
+# cost follows vertex count, which file size tracks without walking the
+# geometry (the TfL network file is ~7 MB / ~170k vertices in 32 features).
+VECTOR_GRID_MIN_BYTES = 2 * 1024 * 1024
+
+
+def _add_reference_layer(data: dict, path: str, name: str, style: dict, pane: str, parent) -> None:
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        size = 0
+    if size >= VECTOR_GRID_MIN_BYTES:
+        VectorGridLayer(data, style, pane=pane).add_to(parent)
+        return
+    folium.GeoJson(
+        data,
+        name=name,
+        style_function=lambda _: style,
+        pane=pane,
+        interactive=False,
+        control=False,
+    ).add_to(parent)
+
+
+# The only route attributes the map reads (styling, tooltip, guid lookups);
+# the selection handler re-reads the full row from the dataframe by guid,
+# so nothing else needs to travel to the browser or back in edit messages.
+_MAP_ROUTE_PROPERTIES = (
+    "guid",
+    "name",
+    "OneWay",
+    "Rejected",
+    "AuditedStreetView",
+    "AuditedInPerson",
+)
+
+
+# One environment compiles both map templates once per process; templates
+# never change at runtime, so nothing needs re-checking or evicting.
+_TEMPLATE_ENV = Environment(loader=BaseLoader(), cache_size=-1, auto_reload=False, autoescape=False)
+
+_GEOMAN_TPL_SRC = """
         {% macro script(this, kwargs) %}
             {{ this._parent.get_name() }}.pm.addControls({
                 position: {{ this.position|tojson }},
@@ -55,7 +106,42 @@ class GeomanControl(JSCSSMixin, MacroElement):
             });
         {% endmacro %}
         """
-    )
+
+_SHINY_TPL_SRC = """
+        {% macro script(this, kwargs) %}
+            var hssBaseLayers = {};
+            {% for name, layer in this.base_layers.items() %}
+            hssBaseLayers[{{ name|tojson }}] = {{ layer }};
+            {% endfor %}
+            var hssOverlayLayers = {};
+            {% for name, layer in this.overlay_layers.items() %}
+            hssOverlayLayers[{{ name|tojson }}] = {{ layer }};
+            {% endfor %}
+            var hssOneWayDash = {{ this.one_way_dash|tojson }};
+            var HSS_DEBUG = {{ this.hss_debug|tojson }};
+            var HSS_CONFIG = {
+                highlightColor: {{ this.highlight_color|tojson }},
+                highlightWeight: {{ this.highlight_weight|tojson }}
+            };
+            hssWireHandlers({{ this.map_name }}, {{ this.layer_name }});
+        {% endmacro %}
+        """
+
+
+_VECTOR_GRID_TPL_SRC = """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = L.vectorGrid.slicer({{ this.data|tojson }}, {
+                rendererFactory: L.canvas.tile,
+                vectorTileLayerStyles: { sliced: {{ this.style|tojson }} },
+                interactive: false,
+                pane: {{ this.pane|tojson }}
+            }).addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+        """
+
+
+class GeomanControl(JSCSSMixin, MacroElement):
+    _template = _TEMPLATE_ENV.from_string(_GEOMAN_TPL_SRC)
 
     default_js = [
         (
@@ -76,679 +162,36 @@ class GeomanControl(JSCSSMixin, MacroElement):
         self.position = position
 
 
-class ShinyBridge(MacroElement):
-    _template = Template(
-        """
-        {% macro script(this, kwargs) %}
-            var hssBaseLayers = {};
-            {% for name, layer in this.base_layers.items() %}
-            hssBaseLayers[{{ name|tojson }}] = {{ layer }};
-            {% endfor %}
-            var hssOverlayLayers = {};
-            {% for name, layer in this.overlay_layers.items() %}
-            hssOverlayLayers[{{ name|tojson }}] = {{ layer }};
-            {% endfor %}
-            var hssOneWayDash = {{ this.one_way_dash|tojson }};
-
-            function hssWireHandlers(map, layerGroup) {
-                function sendMessage(type, payload) {
-                    if (type === "edited_geojson") {
-                        console.log("HSS iframe sendMessage edited_geojson", payload);
-                    }
-                    if (window.parent && window.parent.postMessage) {
-                        window.parent.postMessage({ type: type, payload: payload }, "*");
-                    }
-                }
-                function sendSelected(feature, latlng) {
-                    var props = feature && feature.properties ? feature.properties : {};
-                    sendMessage("selected_route", {
-                        guid: props.guid,
-                        properties: props,
-                        latlng: latlng
-                    });
-                }
-
-                function resetAllStyles() {
-                    if (layerGroup.eachLayer) {
-                        layerGroup.eachLayer(function(l) {
-                            if (l && l.options && l.options._hssOriginalStyle && l.setStyle) {
-                                l.setStyle(l.options._hssOriginalStyle);
-                            }
-                        });
-                    }
-                    if (map && map.eachLayer) {
-                        map.eachLayer(function(l) {
-                            if (l && l.options && l.options._hssOriginalStyle && l.setStyle) {
-                                l.setStyle(l.options._hssOriginalStyle);
-                            }
-                        });
-                    }
-                    if (window.hssSelectedLayer && window.hssSelectedLayer.options && window.hssSelectedLayer.options._hssOriginalStyle) {
-                        if (window.hssSelectedLayer.setStyle) {
-                            window.hssSelectedLayer.setStyle(window.hssSelectedLayer.options._hssOriginalStyle);
-                        }
-                    }
-                    applyHighlightStyles();
-                }
-
-                function applyHighlightStyles() {
-                    if (!window.hssHighlightGuids) return;
-                    var dimOpacity = (typeof window.hssHighlightDimOpacity === 'number') ? window.hssHighlightDimOpacity : 0.3;
-                    var total = 0;
-                    var highlighted = 0;
-                    var dimmed = 0;
-                    function maybeHighlight(layer) {
-                        if (!layer || !layer.feature || !layer.feature.properties) return;
-                        var guid = layer.feature.properties.guid;
-                        if (!guid) return;
-                        total += 1;
-                        if (window.hssSelectedLayer === layer) return;
-                        if (!layer.options._hssOriginalStyle && layer.options) {
-                            layer.options._hssOriginalStyle = {
-                                color: layer.options.color,
-                                weight: layer.options.weight,
-                                opacity: layer.options.opacity
-                            };
-                        }
-                        if (!layer.setStyle) return;
-                        if (window.hssHighlightGuids[guid]) {
-                            highlighted += 1;
-                            layer.setStyle({
-                                color: layer.options._hssOriginalStyle.color,
-                                weight: layer.options._hssOriginalStyle.weight,
-                                opacity: 0.9,
-                                dashArray: layer.options._hssOriginalStyle.dashArray || null
-                            });
-                        } else if (layer.options._hssOriginalStyle) {
-                            dimmed += 1;
-                            layer.setStyle({
-                                color: layer.options._hssOriginalStyle.color,
-                                weight: layer.options._hssOriginalStyle.weight,
-                                opacity: dimOpacity,
-                                dashArray: layer.options._hssOriginalStyle.dashArray || null
-                            });
-                        }
-                    }
-                    if (layerGroup && layerGroup.eachLayer) {
-                        layerGroup.eachLayer(function(l) {
-                            if (l && l.eachLayer) {
-                                l.eachLayer(function(child) { maybeHighlight(child); });
-                            } else {
-                                maybeHighlight(l);
-                            }
-                        });
-                    }
-                    if (map && map.eachLayer) {
-                        map.eachLayer(function(l) { maybeHighlight(l); });
-                    }
-                    console.log('HSS iframe highlight applied', { total: total, highlighted: highlighted, dimmed: dimmed, dimOpacity: dimOpacity });
-                }
-
-                function bindFeatureLayer(layer) {
-                    if (!layer || !layer.feature || !layer.feature.properties || !layer.feature.properties.guid) {
-                        return;
-                    }
-                    layer.off('click');
-                    layer.on('click', function(e) {
-                        try {
-                            if (window.L && L.DomEvent && e) {
-                                L.DomEvent.stopPropagation(e);
-                            }
-                        } catch (err) {}
-                        var feature = layer.feature;
-                        if (!feature || !feature.properties || !feature.properties.guid) {
-                            return;
-                        }
-                        console.log('HSS iframe layer click', feature.properties.guid);
-                        if (window.hssEditingLayer && window.hssEditingLayer.pm) {
-                            window.hssEditingLayer.pm.disable();
-                        }
-                        resetAllStyles();
-                        window.hssSelectedLayer = layer;
-                        if (!layer.options._hssOriginalStyle) {
-                            layer.options._hssOriginalStyle = {
-                                color: layer.options.color,
-                                weight: layer.options.weight,
-                                opacity: layer.options.opacity
-                            };
-                        }
-                        window.hssSelectedStyle = layer.options._hssOriginalStyle;
-                        if (layer.setStyle) {
-                            layer.setStyle({ color: "{{ this.highlight_color }}", weight: {{ this.highlight_weight }}, opacity: 0.95 });
-                        }
-                        if (layer.pm) {
-                            console.log('HSS iframe enable edit', feature.properties.guid);
-                            layer.pm.enable({ preventMarkerRemoval: true, allowSelfIntersection: true });
-                            window.hssEditingLayer = layer;
-                            setTimeout(function() {
-                                logPmOverlays('after enable');
-                            }, 0);
-                        }
-                        sendSelected(feature, e.latlng);
-                    });
-                    if (layer.pm && layer.feature && layer.feature.properties) {
-                        var gid = layer.feature.properties.guid;
-                        layer.on('pm:edit', function() {
-                            console.log('HSS iframe layer pm:edit', gid);
-                        });
-                        layer.on('pm:editstart', function() {
-                            console.log('HSS iframe layer pm:editstart', gid);
-                            logPmOverlays('editstart');
-                        });
-                        layer.on('pm:editend', function() {
-                            console.log('HSS iframe layer pm:editend', gid);
-                            logPmOverlays('editend');
-                        });
-                        layer.on('pm:vertexdragend', function() {
-                            console.log('HSS iframe layer pm:vertexdragend', gid);
-                            queueEditedGeoJSON(layer, 'vertexdragend');
-                        });
-                        layer.on('pm:markerdragend', function() {
-                            console.log('HSS iframe layer pm:markerdragend', gid);
-                            queueEditedGeoJSON(layer, 'markerdragend');
-                        });
-                        layer.on('pm:vertexadded', function() {
-                            console.log('HSS iframe layer pm:vertexadded', gid);
-                        });
-                        layer.on('pm:vertexremoved', function() {
-                            console.log('HSS iframe layer pm:vertexremoved', gid);
-                        });
-                    }
-                }
-
-                function bindLayer(layer) {
-                    if (!layer) return;
-                    if (layer.eachLayer) {
-                        layer.eachLayer(function(child) { bindLayer(child); });
-                        return;
-                    }
-                    bindFeatureLayer(layer);
-                }
-
-                function findLayerByGuid(guid) {
-                    var found = null;
-                    if (!layerGroup || !layerGroup.eachLayer) return null;
-                    layerGroup.eachLayer(function(l) {
-                        if (found) return;
-                        if (l && l.feature && l.feature.properties && l.feature.properties.guid === guid) {
-                            found = l;
-                        }
-                    });
-                    if (!found) {
-                        if (map && map.eachLayer) {
-                            map.eachLayer(function(l) {
-                                if (found) return;
-                                if (l && l.feature && l.feature.properties && l.feature.properties.guid === guid) {
-                                    found = l;
-                                }
-                            });
-                        }
-                    }
-                    if (!found) {
-                        console.log('HSS iframe update_style: layer not found for guid', guid);
-                    }
-                    return found;
-                }
+class VectorGridLayer(JSCSSMixin, MacroElement):
+    """Read-only GeoJSON sliced into canvas tiles in the browser.
 
-                function updateTooltip(layer) {
-                    if (!layer || !layer.getTooltip) return;
-                    var t = layer.getTooltip();
-                    if (!t) return;
-                    var props = layer.feature && layer.feature.properties ? layer.feature.properties : {};
-                    var name = props.name || "";
-                    var dir = props.OneWay || "";
-                    var len = props.Length_m !== undefined ? props.Length_m : "";
-                    var html = "<b>Name:</b> " + name + "<br><b>Direction:</b> " + dir + "<br><b>Length (m):</b> " + len;
-                    t.setContent(html);
-                }
-
-                function normalizeLatLngs(coords) {
-                    if (!coords || !coords.length) return coords;
-                    if (Array.isArray(coords[0]) && Array.isArray(coords[0][0])) {
-                        return coords[0].map(function(c) { return L.latLng(c[0], c[1]); });
-                    }
-                    return coords.map(function(c) { return L.latLng(c[0], c[1]); });
-                }
-
-                var hssEditTimer = null;
-                var hssEditPayload = null;
-                function queueEditedGeoJSON(layer, source) {
-                    if (!layer || !layer.toGeoJSON) return;
-                    hssEditPayload = { features: [layer.toGeoJSON()] };
-                    if (hssEditTimer) clearTimeout(hssEditTimer);
-                    hssEditTimer = setTimeout(function() {
-                        if (!hssEditPayload) return;
-                        console.log('HSS iframe sending edited_geojson (debounced)', source || 'pm:edit', hssEditPayload);
-                        sendMessage("edited_geojson", hssEditPayload);
-                        hssEditPayload = null;
-                    }, 250);
-                }
-
-                bindLayer(layerGroup);
-                map.on('pm:edit', function(e) {
-                    if (!e.layer) return;
-                    console.log('HSS iframe pm:edit', e.layer);
-                    queueEditedGeoJSON(e.layer, 'pm:edit');
-                });
-
-                map.on('pm:create', function(e) {
-                    if (e.layer && e.layer.toGeoJSON) {
-                        console.log('HSS iframe pm:create', e.layer);
-                        var tempId = "tmp-" + Date.now() + "-" + Math.floor(Math.random() * 1000000);
-                        e.layer._hssTempId = tempId;
-                        if (!window.hssTempLayerMap) window.hssTempLayerMap = {};
-                        window.hssTempLayerMap[tempId] = e.layer;
-                        if (window.hssEditingLayer && window.hssEditingLayer.pm) {
-                            window.hssEditingLayer.pm.disable();
-                        }
-                        if (e.layer.pm) {
-                            setTimeout(function() {
-                                e.layer.pm.enable({ allowSelfIntersection: true });
-                                window.hssEditingLayer = e.layer;
-                                if (e.layer.setStyle) {
-                                    e.layer.setStyle({ color: "{{ this.highlight_color }}", weight: {{ this.highlight_weight }}, opacity: 0.95 });
-                                }
-                            }, 150);
-                        }
-                        if (e.layer && e.layer.feature) {
-                            setTimeout(function() {
-                                sendSelected(e.layer.feature, e.layer.getLatLngs ? e.layer.getLatLngs()[0] : null);
-                            }, 0);
-                        }
-                        var gj = e.layer.toGeoJSON();
-                        if (!gj.properties) gj.properties = {};
-                        gj.properties._temp_id = tempId;
-                        console.log('HSS iframe sending created_geojson', gj);
-                        sendMessage("created_geojson", gj);
-                    }
-                });
-
-                map.on('pm:drawstart', function() {
-                    if (window.hssEditingLayer && window.hssEditingLayer.pm) {
-                        window.hssEditingLayer.pm.disable();
-                    }
-                    resetAllStyles();
-                });
+    Only features in the visible tiles are drawn, so memory and paint time
+    follow the viewport rather than the size of the dataset.
+    """
 
-                map.on('pm:drawend', function() {
-                    console.log('HSS iframe pm:drawend');
-                });
+    _template = _TEMPLATE_ENV.from_string(_VECTOR_GRID_TPL_SRC)
 
-                map.on('pm:editend', function() {
-                    console.log('HSS iframe pm:editend');
-                    logPmOverlays('map editend');
-                });
+    default_js = [
+        (
+            "leaflet_vectorgrid_js",
+            "https://unpkg.com/leaflet.vectorgrid@1.3.0/dist/Leaflet.VectorGrid.bundled.js",
+        )
+    ]
 
-                window.addEventListener('message', function(event) {
-                    if (!event || !event.data || !event.data.type) return;
-                    if (event.data.type === 'start_draw') {
-                        if (map.pm) {
-                            map.pm.enableDraw('Line', { snappable: false });
-                        }
-                    }
-                    if (event.data.type === 'select_route') {
-                        var payload = event.data.payload || {};
-                        var guid = payload.guid;
-                        if (!guid) return;
-                        var layer = findLayerByGuid(guid);
-                        if (layer && layer.fire) {
-                            if (layer.getBounds && map.getBounds) {
-                                var layerBounds = layer.getBounds();
-                                if (layerBounds && (payload.zoom || !map.getBounds().contains(layerBounds))) {
-                                    map.fitBounds(layerBounds, { padding: [20, 20] });
-                                }
-                            }
-                            var center = null;
-                            if (layer.getBounds) {
-                                center = layer.getBounds().getCenter();
-                            }
-                            layer.fire('click', { latlng: center });
-                        }
-                    }
-                    if (event.data.type === 'clear_selection') {
-                        console.log('HSS iframe clear_selection');
-                        try {
-                            if (window.hssEditingLayer && window.hssEditingLayer.pm) {
-                                window.hssEditingLayer.pm.disable();
-                            }
-                            if (window.hssSelectedLayer && window.hssSelectedLayer.pm) {
-                                window.hssSelectedLayer.pm.disable();
-                            }
-                            if (layerGroup && layerGroup.eachLayer) {
-                                layerGroup.eachLayer(function(l) {
-                                    try {
-                                        if (l && l.pm && l.pm.enabled && l.pm.enabled()) {
-                                            l.pm.disable();
-                                        }
-                                    } catch (err) {}
-                                });
-                            }
-                            if (map && map.pm && map.pm.getGeomanLayers) {
-                                var pmLayers = map.pm.getGeomanLayers();
-                                if (pmLayers && pmLayers.forEach) {
-                                    pmLayers.forEach(function(l) {
-                                        try {
-                                            if (l && l.pm && l.pm.enabled && l.pm.enabled()) {
-                                                l.pm.disable();
-                                            }
-                                        } catch (err) {}
-                                    });
-                                }
-                            }
-                            if (map && map.pm && map.pm.disableGlobalEditMode) {
-                                map.pm.disableGlobalEditMode();
-                            }
-                            if (map && map.pm && map.pm.disableGlobalDragMode) {
-                                map.pm.disableGlobalDragMode();
-                            }
-                            if (map && map.pm && map.pm.disableGlobalRotateMode) {
-                                map.pm.disableGlobalRotateMode();
-                            }
-                            if (map && map.pm && map.pm.disableGlobalRemovalMode) {
-                                map.pm.disableGlobalRemovalMode();
-                            }
-                            if (map && map.pm && map.pm.disableDraw) {
-                                map.pm.disableDraw();
-                            }
-                            if (map && map.pm && map.pm.disableGlobalCutMode) {
-                                map.pm.disableGlobalCutMode();
-                            }
-                        } catch (err) {}
-                        window.hssEditingLayer = null;
-                        window.hssSelectedLayer = null;
-                        resetAllStyles();
-                    }
-                    if (event.data.type === 'update_style') {
-                        var payload = event.data.payload || {};
-                        var guid = payload.guid;
-                        console.log('HSS iframe update_style: received payload', payload);
-                        if (!guid) return;
-                        var layer = findLayerByGuid(guid);
-                        if (!layer) return;
-                        if (payload.properties && layer.feature && layer.feature.properties) {
-                            Object.keys(payload.properties).forEach(function(key) {
-                                layer.feature.properties[key] = payload.properties[key];
-                            });
-                        }
-                        var baseColor = payload.style && payload.style.color ? payload.style.color : (layer.options.color || "{{ this.highlight_color }}");
-                        var dashArray = payload.style && payload.style.dashArray ? payload.style.dashArray : null;
-                        var baseWeight = payload.style && payload.style.weight ? payload.style.weight : null;
-                        if (!baseWeight && layer.options && layer.options._hssOriginalStyle && layer.options._hssOriginalStyle.weight) {
-                            baseWeight = layer.options._hssOriginalStyle.weight;
-                        }
-                        if (!baseWeight && layer.options && layer.options.weight) {
-                            baseWeight = layer.options.weight;
-                        }
-                        if (!baseWeight) baseWeight = 3;
-                        var baseStyle = {
-                            color: baseColor,
-                            weight: baseWeight,
-                            opacity: 0.9,
-                            dashArray: dashArray
-                        };
-                        layer.options._hssOriginalStyle = baseStyle;
-                        if (window.hssSelectedLayer === layer) {
-                            if (layer.setStyle) {
-                                layer.setStyle({
-                                    color: "{{ this.highlight_color }}",
-                                    weight: {{ this.highlight_weight }},
-                                    opacity: 0.95,
-                                    dashArray: dashArray
-                                });
-                            }
-                            console.log('HSS iframe update_style: applied highlight style', guid);
-                        } else if (layer.setStyle) {
-                            layer.setStyle(baseStyle);
-                            console.log('HSS iframe update_style: applied base style', guid, baseStyle);
-                        }
-                        applyHighlightStyles();
-                        updateTooltip(layer);
-                        console.log('HSS iframe update_style: updated tooltip', guid);
-                    }
-                    if (event.data.type === 'replace_geometry') {
-                        var payload = event.data.payload || {};
-                        var guid = payload.guid;
-                        console.log('HSS iframe replace_geometry', payload);
-                        if (!guid) return;
-                        var layer = findLayerByGuid(guid);
-                        if (!layer && window.hssEditingLayer) {
-                            layer = window.hssEditingLayer;
-                        }
-                        if (!layer) {
-                            console.log('HSS iframe replace_geometry: no layer for guid', guid);
-                        }
-                        if (!layer || !payload.coords || !layer.setLatLngs) return;
-                        layer.setLatLngs(normalizeLatLngs(payload.coords));
-                        if (layer.redraw) layer.redraw();
-                        if (layer.pm && layer.pm.enabled && layer.pm.enabled()) {
-                            layer.pm.disable();
-                            layer.pm.enable();
-                        }
-                        if (payload.properties && layer.feature && layer.feature.properties) {
-                            Object.keys(payload.properties).forEach(function(key) {
-                                layer.feature.properties[key] = payload.properties[key];
-                            });
-                        }
-                        updateTooltip(layer);
-                        applyHighlightStyles();
-                    }
-                    if (event.data.type === 'created_update') {
-                        var payload = event.data.payload || {};
-                        var tempId = payload.temp_id;
-                        console.log('HSS iframe created_update', payload);
-                        if (!tempId) return;
-                        var layer = null;
-                        if (window.hssTempLayerMap && window.hssTempLayerMap[tempId]) {
-                            layer = window.hssTempLayerMap[tempId];
-                        }
-                        if (!layer && layerGroup && layerGroup.eachLayer) {
-                            layerGroup.eachLayer(function(l) {
-                                if (layer) return;
-                                if (l && l._hssTempId === tempId) layer = l;
-                            });
-                        }
-                        if (!layer && map && map.eachLayer) {
-                            map.eachLayer(function(l) {
-                                if (layer) return;
-                                if (l && l._hssTempId === tempId) layer = l;
-                            });
-                        }
-                        if (!layer) return;
-                        if (payload.guid) {
-                            if (!layer.feature) layer.feature = layer.toGeoJSON();
-                            if (!layer.feature.properties) layer.feature.properties = {};
-                            layer.feature.properties.guid = payload.guid;
-                        }
-                        if (layerGroup && layerGroup.addLayer) {
-                            layerGroup.addLayer(layer);
-                        }
-                        bindFeatureLayer(layer);
-                        if (payload.coords && layer.setLatLngs) {
-                            layer.setLatLngs(normalizeLatLngs(payload.coords));
-                            if (layer.redraw) layer.redraw();
-                        }
-                        if (layer.pm && layer.pm.enabled && layer.pm.enabled()) {
-                            layer.pm.disable();
-                            layer.pm.enable();
-                        }
-                        if (payload.style && layer.setStyle) {
-                            var dashArray = payload.style.dashArray || null;
-                            layer.options._hssOriginalStyle = {
-                                color: payload.style.color,
-                                weight: 3,
-                                opacity: 0.9,
-                                dashArray: dashArray
-                            };
-                            layer.setStyle({
-                                color: "{{ this.highlight_color }}",
-                                weight: {{ this.highlight_weight }},
-                                opacity: 0.95,
-                                dashArray: dashArray
-                            });
-                        }
-                        if (payload.properties && layer.feature && layer.feature.properties) {
-                            Object.keys(payload.properties).forEach(function(key) {
-                                layer.feature.properties[key] = payload.properties[key];
-                            });
-                        }
-                        window.hssSelectedLayer = layer;
-                        updateTooltip(layer);
-                    }
-                    if (event.data.type === 'discard_created') {
-                        var payload = event.data.payload || {};
-                        var tempId = payload.temp_id;
-                        console.log('HSS iframe discard_created', payload);
-                        if (!tempId) return;
-                        var layer = null;
-                        if (window.hssTempLayerMap && window.hssTempLayerMap[tempId]) {
-                            layer = window.hssTempLayerMap[tempId];
-                        }
-                        if (!layer && map && map.eachLayer) {
-                            map.eachLayer(function(l) {
-                                if (layer) return;
-                                if (l && l._hssTempId === tempId) layer = l;
-                            });
-                        }
-                        if (layer && map && map.removeLayer) {
-                            map.removeLayer(layer);
-                        }
-                    }
-                if (event.data.type === 'set_highlight') {
-                    var payload = event.data.payload || {};
-                    var list = payload.guids || [];
-                    var active = payload.active !== false;
-                    if (!active) {
-                        window.hssHighlightGuids = null;
-                        window.hssHighlightDimOpacity = null;
-                        console.log('HSS iframe set_highlight cleared');
-                        resetAllStyles();
-                        return;
-                    }
-                    window.hssHighlightGuids = {};
-                    window.hssHighlightDimOpacity = payload.dim_opacity;
-                    list.forEach(function(g) { window.hssHighlightGuids[g] = true; });
-                    console.log('HSS iframe set_highlight', list.length);
-                    applyHighlightStyles();
-                }
-                    if (event.data.type === 'set_route_style') {
-                        var payload = event.data.payload || {};
-                        var colors = payload.colors || {};
-                        var baseWeight = payload.weight || null;
-                        if (!baseWeight) baseWeight = 3;
-                    if (typeof baseWeight !== 'number') {
-                        baseWeight = parseInt(baseWeight, 10);
-                    }
-                    if (!baseWeight || baseWeight < 1) baseWeight = 1;
-                    if (baseWeight > 12) baseWeight = 12;
-                    var highlightWeight = baseWeight + 2;
-                    if (map && map.eachLayer) {
-                        map.eachLayer(function(l) {
-                            if (!l || !l.feature || !l.feature.properties || !l.setStyle) return;
-                            var props = l.feature.properties || {};
-                            if (!props.guid) return;
-                            var color = colors.polyline;
-                            if (props.Rejected) {
-                                color = colors.polyline_rejected || color;
-                            } else if (props.AuditedStreetView || props.AuditedInPerson) {
-                                color = colors.polyline_approved || color;
-                            }
-                            var dash = (props.OneWay === 'OneWay') ? hssOneWayDash : null;
-                            var style = {
-                                color: color || l.options.color,
-                                weight: baseWeight,
-                                opacity: 0.9,
-                                dashArray: dash
-                            };
-                            l.options._hssOriginalStyle = style;
-                            if (window.hssSelectedLayer === l) {
-                                l.setStyle({
-                                    color: colors.polyline_highlight || "{{ this.highlight_color }}",
-                                    weight: highlightWeight,
-                                    opacity: 0.95,
-                                    dashArray: dash
-                                });
-                            } else {
-                                l.setStyle(style);
-                            }
-                        });
-                    }
-                    window.hssHighlightDimOpacity = window.hssHighlightDimOpacity || payload.dim_opacity;
-                    applyHighlightStyles();
-                }
-                if (event.data.type === 'set_basemap') {
-                    var payload = event.data.payload || {};
-                    var name = payload.name || null;
-                    if (!name || !hssBaseLayers[name]) return;
-                    Object.keys(hssBaseLayers).forEach(function(key) {
-                        if (key !== name && map.hasLayer(hssBaseLayers[key])) {
-                            map.removeLayer(hssBaseLayers[key]);
-                        }
-                    });
-                    if (!map.hasLayer(hssBaseLayers[name])) {
-                        map.addLayer(hssBaseLayers[name]);
-                    }
-                }
-                if (event.data.type === 'set_overlays') {
-                    var payload = event.data.payload || {};
-                    var overlays = payload.overlays || {};
-                    Object.keys(overlays).forEach(function(name) {
-                        if (!hssOverlayLayers[name]) return;
-                        if (overlays[name]) {
-                            if (!map.hasLayer(hssOverlayLayers[name])) {
-                                map.addLayer(hssOverlayLayers[name]);
-                            }
-                        } else {
-                            if (map.hasLayer(hssOverlayLayers[name])) {
-                                map.removeLayer(hssOverlayLayers[name]);
-                            }
-                        }
-                    });
-                }
-            });
+    def __init__(self, data: dict, style: dict, pane: str = "overlayPane"):
+        super().__init__()
+        self._name = "VectorGridLayer"
+        self.data = data
+        self.style = style
+        self.pane = pane
 
-                map.on('click', function(e) {
-                    sendMessage("map_click", e.latlng);
-                });
-                map.on('baselayerchange', function(e) {
-                    if (e && e.name) {
-                        sendMessage('basemap_change', { name: e.name });
-                    }
-                });
-                map.on('overlayadd', function(e) {
-                    if (e && e.name) {
-                        sendMessage('overlay_change', { name: e.name, visible: true });
-                    }
-                });
-                map.on('overlayremove', function(e) {
-                    if (e && e.name) {
-                        sendMessage('overlay_change', { name: e.name, visible: false });
-                    }
-                });
 
-                function logPmOverlays(label) {
-                    try {
-                        var nodes = Array.from(document.querySelectorAll('.leaflet-pane svg path, .leaflet-pane svg rect, .leaflet-pane svg g'));
-                        var pmNodes = nodes.filter(function(el) {
-                            var cls = el.getAttribute('class') || '';
-                            return cls.indexOf('leaflet-pm') !== -1 || cls.indexOf('pm-') !== -1;
-                        }).map(function(el) {
-                            return {
-                                tag: el.tagName,
-                                className: el.getAttribute('class') || '',
-                                id: el.getAttribute('id') || ''
-                            };
-                        });
-                        console.log('HSS pm overlays', label, pmNodes);
-                    } catch (e) {
-                        console.log('HSS pm overlays error', e);
-                    }
-                }
-            }
+class ShinyBridge(JSCSSMixin, MacroElement):
+    _template = _TEMPLATE_ENV.from_string(_SHINY_TPL_SRC)
 
-            hssWireHandlers({{ this.map_name }}, {{ this.layer_name }});
-        {% endmacro %}
-        """
-    )
+    # The handler code is a static file the browser caches; only the config
+    # above is rendered per map.
+    default_js = [("hss_shiny_bridge", f"{STATIC_URL_PATH}/shiny_bridge.js")]
 
     def __init__(
         self,
@@ -761,6 +204,7 @@ class ShinyBridge(MacroElement):
         base_layers: Optional[Dict[str, str]] = None,
         one_way_dash: Optional[str] = None,
         overlay_layers: Optional[Dict[str, str]] = None,
+        hss_debug: bool = False,
     ):
         super().__init__()
         self._name = "ShinyBridge"
@@ -773,6 +217,7 @@ class ShinyBridge(MacroElement):
         self.base_layers = base_layers or {}
         self.one_way_dash = one_way_dash or ""
         self.overlay_layers = overlay_layers or {}
+        self.hss_debug = bool(hss_debug)
 
 
 def build_map(
@@ -786,7 +231,17 @@ def build_map(
     route_scheme: Optional[str],
     route_width: Optional[int],
 ) -> folium.Map:
-    m = folium.Map(location=center, zoom_start=zoom, tiles=None, control_scale=True, keyboard=False)
+    # Canvas rendering draws every vector layer of a pane into one <canvas>
+    # instead of an SVG <path> per feature, which keeps pan/zoom and
+    # restyles cheap with thousands of routes.
+    m = folium.Map(
+        location=center,
+        zoom_start=zoom,
+        tiles=None,
+        control_scale=True,
+        keyboard=False,
+        prefer_canvas=True,
+    )
 
     vml_guard = """
     <script>
@@ -842,13 +297,8 @@ def build_map(
         coords = row.get("_coords")
         if not coords:
             continue
-        length_m = line_length_m(coords) if coords else 0.0
-        properties = {k: row.get(k) for k in [
-            "guid", "name", "id", "Designation", "OneWay", "Flow", "Protection",
-            "Ownership", "YearBuildBeforeFlag", "YearBuilt", "AuditedStreetView",
-            "AuditedInPerson", "Rejected", "description", "History",
-        ]}
-        properties["Length_m"] = int(round(length_m))
+        properties = {k: row.get(k) for k in _MAP_ROUTE_PROPERTIES}
+        properties["Length_m"] = cached_length_m(row)
         features.append({
             "type": "Feature",
             "properties": properties,
@@ -875,6 +325,7 @@ def build_map(
 
     folium.map.CustomPane("tflPane", z_index=200).add_to(m)
     tfl_group = folium.FeatureGroup(name="TFL", show=True, control=True)
+    tfl_style = {"color": MAP_COLORS["tfl_lines"], "weight": 1, "opacity": 0.5}
     tfl_data = load_geojson(TFL_GEOJSON)
     if tfl_data:
         try:
@@ -882,14 +333,7 @@ def build_map(
             logger.info("TFL geom types=%s", geojson_geom_types(tfl_data))
         except Exception:
             logger.info("Loaded TFL geojson")
-        folium.GeoJson(
-            tfl_data,
-            name="TFL",
-            style_function=lambda _: {"color": MAP_COLORS["tfl_lines"], "weight": 1, "opacity": 0.5},
-            pane="tflPane",
-            interactive=False,
-            control=False,
-        ).add_to(tfl_group)
+        _add_reference_layer(tfl_data, TFL_GEOJSON, "TFL", tfl_style, "tflPane", tfl_group)
 
     lcc_tfl_data = load_geojson(LCC_TFL_GEOJSON)
     if lcc_tfl_data:
@@ -898,14 +342,7 @@ def build_map(
             logger.info("TFL (LCC) geom types=%s", geojson_geom_types(lcc_tfl_data))
         except Exception:
             logger.info("Loaded TFL (LCC) geojson")
-        folium.GeoJson(
-            lcc_tfl_data,
-            name="TFL (LCC)",
-            style_function=lambda _: {"color": MAP_COLORS["tfl_lines"], "weight": 1, "opacity": 0.5},
-            pane="tflPane",
-            interactive=False,
-            control=False,
-        ).add_to(tfl_group)
+        _add_reference_layer(lcc_tfl_data, LCC_TFL_GEOJSON, "TFL (LCC)", tfl_style, "tflPane", tfl_group)
 
     tfl_group.add_to(m)
 
@@ -951,6 +388,9 @@ def build_map(
         {"type": "FeatureCollection", "features": features},
         name="routes",
         style_function=route_style,
+        # Lets Leaflet hand each route layer to the bridge as it is built,
+        # instead of the bridge walking the finished layer group.
+        on_each_feature=JsCode("hssOnEachRouteFeature"),
         tooltip=folium.GeoJsonTooltip(
             fields=["name", "OneWay", "Length_m"],
             aliases=["Name:", "Direction:", "Length (m):"],
@@ -977,7 +417,7 @@ def build_map(
             ).add_to(m)
 
     if london_mask is not None:
-        london_layer = folium.GeoJson(
+        folium.GeoJson(
             london_mask.__geo_interface__,
             name="London",
             style_function=lambda _: {
@@ -986,17 +426,11 @@ def build_map(
                 "fillOpacity": 0.35,
                 "fillColor": "#bfbfbf",
             },
+            # There is no per-feature DOM node to hide from the pointer on
+            # a canvas, so keep the mask out of hit-testing instead.
+            interactive=False,
             control=False,
         ).add_to(m)
-        london_layer.add_child(
-            Element(
-                f"""
-            <style>
-              #{london_layer.get_name()}_pane .leaflet-interactive {{ pointer-events: none; }}
-            </style>
-            """
-            )
-        )
 
     GeomanControl().add_to(m)
 
@@ -1026,6 +460,7 @@ def build_map(
         base_layers=base_layers,
         one_way_dash=ONE_WAY_DASH,
         overlay_layers=overlay_layers,
+        hss_debug=HSS_DEBUG,
     )
     bridge.add_to(m)
 
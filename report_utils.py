@@ -4,10 +4,11 @@ from datetime import datetime
 from typing import Dict, Iterable, List, Optional, Tuple
 
 from shapely.geometry.base import BaseGeometry
+from shapely.strtree import STRtree
 
 import pandas as pd
 
-from data_processing import line_length_m
+from data_processing import frame_lengths_m, line_length_m
 
 
 # High-contrast palette tuned for light basemaps (Mapbox/OSM-style) with
@@ -23,20 +24,21 @@ FOUR_COLOR_PALETTE: List[str] = [
 def compute_borough_colors(borough_geoms: Dict[str, BaseGeometry]) -> Dict[str, str]:
     names = sorted(borough_geoms.keys())
     adjacency: Dict[str, set] = {name: set() for name in names}
-    for i, name in enumerate(names):
-        geom = borough_geoms.get(name)
-        if geom is None:
+    # touches() implies intersects(), so one intersects query per borough
+    # covers both; the tree's bounding-box pass leaves only real neighbours
+    # for the exact predicate.
+    present = [name for name in names if borough_geoms.get(name) is not None]
+    tree = STRtree([borough_geoms[name] for name in present])
+    for name in present:
+        try:
+            hits = tree.query(borough_geoms[name], predicate="intersects")
+        except Exception:
             continue
-        for other in names[i + 1 :]:
-            other_geom = borough_geoms.get(other)
-            if other_geom is None:
-                continue
-            try:
-                if geom.touches(other_geom) or geom.intersects(other_geom):
-                    adjacency[name].add(other)
-                    adjacency[other].add(name)
-            except Exception:
-                continue
+        for j in hits:
+            other = present[int(j)]
+            if other != name:
+                adjacency[name].add(other)
+                adjacency[other].add(name)
 
     colors: Dict[str, str] = {}
     order = sorted(names, key=lambda n: len(adjacency[n]), reverse=True)
@@ -82,7 +84,9 @@ def format_report_metadata(filter_label: str, source_url: Optional[str] = None)
 
 def add_length_columns(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
-    df["LengthInM"] = df["_coords"].apply(lambda coords: int(round(line_length_m(coords or []))))
+    # Reads the _length_m that prepare_routes_df stores; only rows without
+    # one are measured, in one vectorised pass.
+    df["LengthInM"] = frame_lengths_m(df)
     return df
 
 
@@ -108,6 +112,14 @@ def compute_borough_summary(df: pd.DataFrame) -> pd.DataFrame:
     return pd.DataFrame(rows)
 
 
+def _row_length_m(row: pd.Series, coords) -> int:
+    # Rows from add_length_columns carry their length already.
+    value = row.get("LengthInM")
+    if value is not None and not pd.isna(value):
+        return int(value)
+    return int(round(line_length_m(coords))) if coords else 0
+
+
 def geojson_feature(
     row: pd.Series,
     *,
@@ -125,7 +137,7 @@ def geojson_feature(
             "Designation": row.get("Designation", ""),
             "OneWay": row.get("OneWay", ""),
             "Borough": borough,
-            "LengthInM": int(round(line_length_m(coords))) if coords else 0,
+            "LengthInM": _row_length_m(row, coords),
             "stroke": borough_color(borough, borough_colors),
             "stroke-width": weight,
         },
@@ -10,9 +10,9 @@ from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 import pandas as pd
 
-from data_processing import normalize_bool, line_length_m
+from data_processing import cached_length_m, normalize_bool_series
 from config import logger
-from cycle_routes import get_cycle_route_index
+from cycle_routes import get_cycle_route_index, project_latlon
 from tfl_lookup import tfl_near_distance
 from report_utils import (
     add_length_columns,
@@ -76,7 +76,7 @@ def filter_routes(
         return df
     df = df.copy()
     if "Rejected" in df.columns:
-        df = df.loc[~df["Rejected"].apply(normalize_bool)]
+        df = df.loc[~normalize_bool_series(df["Rejected"])]
     if filter_mode == "TFL only":
         df = df.loc[df["Ownership"].fillna("").str.upper() == "TFL"]
     elif filter_mode == "Since date" and since_date:
@@ -176,7 +176,7 @@ def compute_cycleway_coverage(
             columns=["Label", "Programme", "Cycleway_len_m", "OneWay_m", "TwoWay_m", "Coverage_pct"]
         )
     allowed_programmes = {"Cycleways", "Cycle Superhighways"}
-    tree, geoms, geom_to_feature, project = get_cycle_route_index(allowed_programmes)
+    tree, geoms, features, project = get_cycle_route_index(allowed_programmes)
     if tree is None or not geoms or project is None:
         return pd.DataFrame(
             columns=["Label", "Programme", "Cycleway_len_m", "OneWay_m", "TwoWay_m", "Coverage_pct"]
@@ -185,10 +185,7 @@ def compute_cycleway_coverage(
     from shapely.geometry import LineString
 
     totals: Dict[str, Dict[str, float]] = {}
-    for geom in geoms:
-        feature = geom_to_feature.get(id(geom))
-        if not feature:
-            continue
+    for geom, feature in zip(geoms, features):
         entry = totals.setdefault(
             feature.label,
             {"Programme": feature.programme, "Cycleway_len_m": 0.0, "OneWay_m": 0.0, "TwoWay_m": 0.0},
@@ -204,8 +201,7 @@ def compute_cycleway_coverage(
             continue
         routes_considered += 1
         try:
-            proj = [project(lon, lat) for lat, lon in coords]
-            route = LineString(proj)
+            route = LineString(project_latlon(project, coords))
         except Exception:
             continue
         if route.is_empty or route.length == 0:
@@ -226,15 +222,9 @@ def compute_cycleway_coverage(
         if len(candidates) == 0:
             continue
         matched_candidates += 1
-        for geom in candidates:
-            if not hasattr(geom, "intersection"):
-                try:
-                    geom = geoms[int(geom)]
-                except Exception:
-                    continue
-            feature = geom_to_feature.get(id(geom))
-            if not feature:
-                continue
+        for idx in candidates:
+            geom = geoms[idx]
+            feature = features[idx]
             try:
                 # Use a buffer to capture near-overlaps (line-line intersections
                 # are often empty due to tiny geometric offsets).
@@ -333,7 +323,7 @@ def compute_tfl_mislabeled(
                 "Id": row.get("id", ""),
                 "Ownership": owner,
                 "OneWay": row.get("OneWay", ""),
-                "LengthInM": int(round(line_length_m(coords))) if coords else 0,
+                "LengthInM": cached_length_m(row),
                 "DistanceToTFL_m": round(distance, 2) if distance is not None else None,
             }
         )
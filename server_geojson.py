@@ -80,7 +80,9 @@ def register_geojson_handlers(
             if not idx_list:
                 logger.info("Edit geojson: guid not found in dataframe %s", guid)
                 continue
+            length_m = int(round(line_length_m(clipped_coords)))
             df.at[idx_list[0], "_coords"] = clipped_coords
+            df.at[idx_list[0], "_length_m"] = length_m
             df = update_history(df, guid, current_user.get())
             if clipped:
                 ui.notification_show("Route was clipped to the borough boundary.", type="warning")
@@ -92,7 +94,7 @@ def register_geojson_handlers(
                     "guid": guid,
                     "coords": clipped_coords,
                     "properties": {
-                        "Length_m": int(round(line_length_m(clipped_coords))) if clipped_coords else 0,
+                        "Length_m": length_m,
                     },
                     "style": {
                         "color": polyline_color(row, route_colors()),
@@ -108,7 +110,7 @@ def register_geojson_handlers(
         last_edit_payload.set(payload_key)
 
     @reactive.effect
-    def _apply_created_geojson():
+    async def _apply_created_geojson():
         created = input.created_geojson()
         if not created:
             return
@@ -154,7 +156,12 @@ def register_geojson_handlers(
             return
         default_name = "New Route"
         try:
-            default_name = reverse_geocode_name(clipped_coords[0][0], clipped_coords[0][1]) or default_name
+            # Off the event loop: the lookup is rate limited and may wait on
+            # other sessions' requests.
+            default_name = (
+                await asyncio.to_thread(reverse_geocode_name, clipped_coords[0][0], clipped_coords[0][1])
+                or default_name
+            )
         except Exception:
             logger.exception("Reverse geocode failed for new route.")
         new_row["name"] = default_name
@@ -201,6 +208,7 @@ def register_geojson_handlers(
                 type="message",
             )
         new_row["_coords"] = clipped_coords
+        new_row["_length_m"] = int(round(line_length_m(clipped_coords))) if clipped_coords else 0
         df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
         data_state.set(df)
         selected_guid.set(new_guid)
@@ -227,7 +235,7 @@ def register_geojson_handlers(
                         "AuditedStreetView": bool(row.get("AuditedStreetView", False)),
                         "AuditedInPerson": bool(row.get("AuditedInPerson", False)),
                         "name": row.get("name", ""),
-                        "Length_m": int(round(line_length_m(clipped_coords))) if clipped_coords else 0,
+                        "Length_m": new_row["_length_m"],
                     },
                     "style": {
                         "color": polyline_color(row, route_colors()),
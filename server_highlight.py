@@ -2,7 +2,7 @@ import asyncio
 
 from async_utils import send_custom
 import json
-from typing import List, Optional, Tuple
+from typing import FrozenSet, Iterable, List, Optional, Tuple
 
 import pandas as pd
 from shiny import reactive, render, ui
@@ -22,6 +22,13 @@ def _cell_equal(a: object, b: object) -> bool:
     return a == b
 
 
+# One-entry memo: grid_view, changes_view, grid edits and the highlight effect
+# all ask for the same (frame, filters) combination within one flush. The
+# frame is held so its id cannot be reused; data_state frames are replaced,
+# never mutated in place.
+_HIGHLIGHT_CACHE = {"key": None, "df": None, "value": None, "guid_set": frozenset()}
+
+
 def compute_highlight(
     *,
     df: pd.DataFrame,
@@ -30,6 +37,40 @@ def compute_highlight(
     owner_value: str,
     audit_value: str,
     dim_percent: int,
+) -> Tuple[List[str], float, str, Optional[object], Optional[str], bool]:
+    key = (id(df), len(df), mode, repr(since_value), owner_value, audit_value, dim_percent)
+    if key == _HIGHLIGHT_CACHE["key"] and _HIGHLIGHT_CACHE["df"] is df:
+        return _HIGHLIGHT_CACHE["value"]
+    value = _compute_highlight(
+        df=df,
+        mode=mode,
+        since_value=since_value,
+        owner_value=owner_value,
+        audit_value=audit_value,
+        dim_percent=dim_percent,
+    )
+    _HIGHLIGHT_CACHE.update(key=key, df=df, value=value, guid_set=frozenset(value[0]))
+    return value
+
+
+def highlight_guid_set(guids: Optional[Iterable[str]]) -> FrozenSet[str]:
+    """Frozenset for O(1) membership; reuses the memoized set for the cached result."""
+    cached = _HIGHLIGHT_CACHE["value"]
+    if cached is not None and guids is cached[0]:
+        return _HIGHLIGHT_CACHE["guid_set"]
+    if isinstance(guids, frozenset):
+        return guids
+    return frozenset(guids or [])
+
+
+def _compute_highlight(
+    *,
+    df: pd.DataFrame,
+    mode: str,
+    since_value: object,
+    owner_value: str,
+    audit_value: str,
+    dim_percent: int,
 ) -> Tuple[List[str], float, str, Optional[object], Optional[str], bool]:
     if not mode:
         mode = "None"
@@ -265,5 +306,6 @@ def register_highlight_handlers(
 __all__ = [
     "register_highlight_handlers",
     "compute_highlight",
+    "highlight_guid_set",
     "_cell_equal",
 ]
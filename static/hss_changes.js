@@ -0,0 +1,50 @@
+(function() {
+    function loadState() {
+        try {
+            return JSON.parse(localStorage.getItem('hss_changes_open_v1') || '{}');
+        } catch (e) {
+            return {};
+        }
+    }
+    function saveState(state) {
+        try {
+            localStorage.setItem('hss_changes_open_v1', JSON.stringify(state || {}));
+        } catch (e) {
+            return;
+        }
+    }
+    function applyState(root) {
+        const state = loadState();
+        const nodes = (root || document).querySelectorAll('details.hss-change-details[data-change-id]');
+        nodes.forEach(function(node) {
+            const id = node.dataset.changeId;
+            if (!id) return;
+            if (state[id] === undefined) return;
+            node.open = !!state[id];
+        });
+    }
+    document.addEventListener('DOMContentLoaded', function() {
+        applyState(document);
+        document.addEventListener('toggle', function(ev) {
+            const node = ev.target;
+            if (!node || !node.matches || !node.matches('details.hss-change-details[data-change-id]')) return;
+            const state = loadState();
+            state[node.dataset.changeId] = !!node.open;
+            saveState(state);
+        }, true);
+        document.addEventListener('click', function(ev) {
+            const btn = ev.target.closest('.hss-change-more');
+            if (!btn || !window.Shiny || !window.Shiny.setInputValue) return;
+            window.Shiny.setInputValue('changes_load_more', { group: btn.dataset.group, ts: Date.now() }, {priority: 'event'});
+        });
+        const observer = new MutationObserver(function(mutations) {
+            mutations.forEach(function(m) {
+                m.addedNodes.forEach(function(node) {
+                    if (node.nodeType !== 1) return;
+                    applyState(node);
+                });
+            });
+        });
+        observer.observe(document.body, { childList: true, subtree: true });
+    });
+})();
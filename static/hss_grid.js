@@ -0,0 +1,219 @@
+function hssEnsureLeaflet(cb) {
+    if (window.L) {
+        cb();
+        return;
+    }
+    if (window.__hssLeafletLoading) {
+        const timer = setInterval(function() {
+            if (window.L) {
+                clearInterval(timer);
+                cb();
+            }
+        }, 50);
+        return;
+    }
+    window.__hssLeafletLoading = true;
+    const link = document.createElement('link');
+    link.rel = 'stylesheet';
+    link.href = 'https://unpkg.com/leaflet@1.9.4/dist/leaflet.css';
+    document.head.appendChild(link);
+    const script = document.createElement('script');
+    script.src = 'https://unpkg.com/leaflet@1.9.4/dist/leaflet.js';
+    script.onload = function() { cb(); };
+    document.head.appendChild(script);
+}
+
+function hssDecodeCoords(b64) {
+    const bytes = Uint8Array.from(atob(b64), function(c) { return c.charCodeAt(0); });
+    const flat = new Float32Array(bytes.buffer);
+    const coords = [];
+    for (let i = 0; i + 1 < flat.length; i += 2) {
+        coords.push([flat[i], flat[i + 1]]);
+    }
+    return coords;
+}
+
+function hssInitOne(node) {
+    const bin = node.dataset.coordsBin;
+    const raw = bin || node.dataset.coords;
+    if (!raw) return;
+    const coords = bin ? hssDecodeCoords(bin) : JSON.parse(raw);
+    if (!coords || !coords.length) return;
+    const strokeColor = node.dataset.color || '#1c42d7';
+    const strokeOpacity = node.dataset.opacity ? parseFloat(node.dataset.opacity) : 0.9;
+    const dash = node.dataset.dash || null;
+    const weight = node.dataset.weight ? parseFloat(node.dataset.weight) : 2;
+    if (window.HSS_DEBUG) console.log('HSS grid minimap style', { color: strokeColor, opacity: strokeOpacity, dash: dash });
+    const coordsKey = raw;
+    if (node.dataset.hssInit) {
+        if (node._hssPolyline) {
+            node._hssPolyline.setStyle({ color: strokeColor, opacity: strokeOpacity, dashArray: dash, weight: weight });
+            if (window.HSS_DEBUG) console.log('HSS grid minimap updated');
+        }
+        if (node._hssCoordsKey !== coordsKey && node._hssPolyline) {
+            node._hssPolyline.setLatLngs(coords);
+            if (node._hssMap) {
+                const bounds = L.latLngBounds(coords);
+                node._hssMap.fitBounds(bounds, { padding: [2, 2] });
+                const maxZoom = 15;
+                if (node._hssMap.getZoom() > maxZoom) {
+                    node._hssMap.setZoom(maxZoom);
+                }
+            }
+            node._hssCoordsKey = coordsKey;
+        }
+        return;
+    }
+    node.dataset.hssInit = '1';
+    node._hssCoordsKey = coordsKey;
+    const map = L.map(node, {
+        attributionControl: false,
+        zoomControl: false,
+        dragging: false,
+        scrollWheelZoom: false,
+        doubleClickZoom: false,
+        boxZoom: false,
+        keyboard: false,
+        tap: false,
+    });
+    node._hssMap = map;
+    L.tileLayer('https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png', {
+        maxZoom: 19,
+        attribution: '&copy; OpenStreetMap contributors &copy; CARTO'
+    }).addTo(map);
+    const line = L.polyline(coords, { color: strokeColor, opacity: strokeOpacity, dashArray: dash, weight: weight }).addTo(map);
+    node._hssPolyline = line;
+    if (window.HSS_DEBUG) console.log('HSS grid minimap created');
+    const bounds = L.latLngBounds(coords);
+    map.fitBounds(bounds, { padding: [2, 2] });
+    const maxZoom = 15;
+    if (map.getZoom() > maxZoom) {
+        map.setZoom(maxZoom);
+    }
+}
+
+function hssTeardownOne(node) {
+    if (!node._hssMap) return;
+    node._hssMap.remove();
+    node._hssMap = null;
+    node._hssPolyline = null;
+    node._hssCoordsKey = null;
+    delete node.dataset.hssInit;
+}
+
+var hssMiniMapObserver = window.hssMiniMapObserver || null;
+function hssMiniMapVisibility(entries) {
+    entries.forEach(function(entry) {
+        if (entry.isIntersecting) {
+            hssInitOne(entry.target);
+        } else {
+            hssTeardownOne(entry.target);
+        }
+    });
+}
+
+function hssInitMiniMaps(root) {
+    hssEnsureLeaflet(function() {
+        const scope = root || document;
+        const nodes = Array.from(scope.querySelectorAll('.hss-grid-map'));
+        if (scope.matches && scope.matches('.hss-grid-map')) nodes.push(scope);
+        if (!('IntersectionObserver' in window)) {
+            nodes.forEach(hssInitOne);
+            return;
+        }
+        // Leaflet maps (and their tile requests) are only built for
+        // minimaps near the viewport, and torn down once scrolled away.
+        if (!hssMiniMapObserver) {
+            hssMiniMapObserver = new IntersectionObserver(hssMiniMapVisibility, { rootMargin: '100px' });
+        }
+        nodes.forEach(function(node) {
+            if (node.dataset.hssInit) {
+                // Already live: apply style/coords changes now.
+                hssInitOne(node);
+                return;
+            }
+            hssMiniMapObserver.observe(node);
+        });
+    });
+}
+
+// Page-level state lives in `var`/window slots so the script can be
+// evaluated more than once without redeclaration errors.
+var hssRefreshTimer = window.hssRefreshTimer || null;
+function hssRefreshMiniMaps() {
+    // Back-to-back refresh messages collapse into one trailing pass.
+    clearTimeout(hssRefreshTimer);
+    hssRefreshTimer = setTimeout(function() { hssInitMiniMaps(document); }, 50);
+}
+
+var hssPendingEvents = window.hssPendingEvents || {};
+function hssSendEvent(name, payload, key) {
+    // Trailing 50 ms debounce per key: repeated clicks (or key
+    // repeat) on the same target send one event, distinct targets
+    // are never dropped.
+    clearTimeout(hssPendingEvents[key]);
+    hssPendingEvents[key] = setTimeout(function() {
+        delete hssPendingEvents[key];
+        window.Shiny.setInputValue(name, payload, {priority: 'event'});
+    }, 50);
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    hssInitMiniMaps(document);
+    window.hssSetGridPage = function(page) {
+        if (!window.Shiny || !window.Shiny.setInputValue) return;
+        window.Shiny.setInputValue('grid_page', page, {priority: 'event'});
+    };
+    document.addEventListener('click', function(ev) {
+        const btn = ev.target.closest('.hss-grid-btn');
+        if (!btn) return;
+        if (!window.Shiny || !window.Shiny.setInputValue) return;
+        const guid = btn.dataset.guid;
+        const action = btn.dataset.action;
+        if (!guid || !action) return;
+        const payload = { guid: guid, ts: Date.now() };
+        if (action === 'goto') {
+            // Only the last "go to" matters, whichever route it targets.
+            hssSendEvent('grid_goto_click', payload, 'goto');
+        } else if (action === 'delete') {
+            hssSendEvent('grid_delete_click', payload, 'delete:' + guid);
+        } else if (action.startsWith('undo_')) {
+            payload.action = action;
+            hssSendEvent('changes_undo_click', payload, action + ':' + guid);
+        }
+    });
+    if (window.Shiny && window.Shiny.addCustomMessageHandler) {
+        window.Shiny.addCustomMessageHandler('hss_refresh_minimaps', function(payload) {
+            console.log('HSS grid: refresh minimaps', payload);
+            hssRefreshMiniMaps();
+        });
+        window.Shiny.addCustomMessageHandler('hss_update_minimap', function(payload) {
+            console.log('HSS grid: update minimap', payload);
+            if (!payload || !payload.guid) return;
+            const node = document.querySelector('.hss-grid-map[data-guid="' + payload.guid + '"]');
+            if (!node) return;
+            node.dataset.color = payload.color || node.dataset.color;
+            node.dataset.opacity = (payload.opacity !== undefined) ? payload.opacity : node.dataset.opacity;
+            node.dataset.dash = payload.dash || '';
+            if (node._hssPolyline) {
+                node._hssPolyline.setStyle({
+                    color: node.dataset.color || '#1c42d7',
+                    opacity: parseFloat(node.dataset.opacity || '0.9'),
+                    dashArray: node.dataset.dash || null,
+                    weight: 2,
+                });
+            } else {
+                hssInitMiniMaps(node);
+            }
+        });
+    }
+    const observer = new MutationObserver(function(mutations) {
+        mutations.forEach(function(m) {
+            m.addedNodes.forEach(function(node) {
+                if (node.nodeType !== 1) return;
+                hssInitMiniMaps(node);
+            });
+        });
+    });
+    observer.observe(document.body, { childList: true, subtree: true });
+});
@@ -0,0 +1,765 @@
+// Map-side ShinyBridge handlers, loaded into the map iframe as a static file.
+// build_map's ShinyBridge element defines hssBaseLayers, hssOverlayLayers,
+// hssOneWayDash, HSS_CONFIG and HSS_DEBUG, then calls
+// hssWireHandlers(map, layerGroup). Tracing is only logged when HSS_DEBUG
+// is set.
+
+// onEachFeature hook of the routes GeoJSON layer. Leaflet calls it while it
+// builds each feature layer, which is before hssWireHandlers runs, so the
+// layers are parked here and bound once the handlers exist.
+var hssPendingFeatureLayers = [];
+var hssBindFeatureLayer = null;
+function hssOnEachRouteFeature(feature, layer) {
+    if (hssBindFeatureLayer) {
+        hssBindFeatureLayer(layer);
+        return;
+    }
+    hssPendingFeatureLayers.push(layer);
+}
+
+function hssWireHandlers(map, layerGroup) {
+    // The selection highlight is fixed for the life of the map.
+    var HSS_HL_COLOR = HSS_CONFIG.highlightColor;
+    var HSS_HL_WEIGHT = HSS_CONFIG.highlightWeight;
+
+    // Copies src's own properties onto dst without allocating a key array.
+    function hssAssign(dst, src) {
+        for (var k in src) {
+            if (Object.prototype.hasOwnProperty.call(src, k)) dst[k] = src[k];
+        }
+        return dst;
+    }
+
+    function sendMessage(type, payload) {
+        if (type === "edited_geojson") {
+            console.log("HSS iframe sendMessage edited_geojson", payload);
+        }
+        if (window.parent && window.parent.postMessage) {
+            window.parent.postMessage({ type: type, payload: payload }, "*");
+        }
+    }
+    function sendSelected(feature, latlng) {
+        var props = feature && feature.properties ? feature.properties : {};
+        sendMessage("selected_route", {
+            guid: props.guid,
+            properties: props,
+            latlng: latlng
+        });
+    }
+
+    // Route layers indexed by guid, plus a dense list of the same layers, so
+    // lookups and restyles never walk every layer on the map.
+    window.hssLayersByGuid = {};
+    window.hssAllFeatureLayers = [];
+
+    function indexFeatureLayer(layer) {
+        window.hssLayersByGuid[layer.feature.properties.guid] = layer;
+        if (!layer._hssIndexed) {
+            layer._hssIndexed = true;
+            window.hssAllFeatureLayers.push(layer);
+        }
+    }
+
+    function unindexFeatureLayer(layer) {
+        if (!layer || !layer._hssIndexed) return;
+        layer._hssIndexed = false;
+        var layers = window.hssAllFeatureLayers;
+        var idx = layers.indexOf(layer);
+        if (idx >= 0) layers.splice(idx, 1);
+        var guid = layer.feature && layer.feature.properties ? layer.feature.properties.guid : null;
+        if (guid && window.hssLayersByGuid[guid] === layer) {
+            delete window.hssLayersByGuid[guid];
+        }
+    }
+
+    // Style work requested by messages is coalesced into one pass per
+    // animation frame: keyed ops run once each (latest wins), then the
+    // highlight pass, which reads the styles those ops set.
+    var hssStyleOps = {};
+    var hssStyleOpOrder = [];
+    var hssHighlightPending = false;
+    var hssRafPending = false;
+    var hssRequestFrame = window.requestAnimationFrame
+        ? window.requestAnimationFrame.bind(window)
+        : function(cb) { return setTimeout(cb, 16); };
+
+    function flushStyleUpdates() {
+        hssRafPending = false;
+        var ops = hssStyleOps;
+        var order = hssStyleOpOrder;
+        hssStyleOps = {};
+        hssStyleOpOrder = [];
+        for (var i = 0, n = order.length; i < n; i++) {
+            ops[order[i]]();
+        }
+        if (hssHighlightPending) {
+            hssHighlightPending = false;
+            applyHighlightStyles();
+        }
+    }
+
+    function scheduleStyleFlush() {
+        if (hssRafPending) return;
+        hssRafPending = true;
+        hssRequestFrame(flushStyleUpdates);
+    }
+
+    function queueStyleUpdate(key, fn) {
+        if (!Object.prototype.hasOwnProperty.call(hssStyleOps, key)) {
+            hssStyleOpOrder.push(key);
+        }
+        hssStyleOps[key] = fn;
+        scheduleStyleFlush();
+    }
+
+    function queueHighlight() {
+        hssHighlightPending = true;
+        scheduleStyleFlush();
+    }
+
+    // Route styles come from a small palette, so layers share one frozen
+    // style object per color/weight/opacity/dash combination rather than
+    // each holding its own copy. Leaflet's setStyle copies the values into
+    // the layer's options, so sharing is safe.
+    var hssStyleCache = {};
+    function internStyle(color, weight, opacity, dashArray) {
+        var key = color + '|' + weight + '|' + opacity + '|' + (dashArray || '');
+        var style = hssStyleCache[key];
+        if (!style) {
+            style = Object.freeze({ color: color, weight: weight, opacity: opacity, dashArray: dashArray || null });
+            hssStyleCache[key] = style;
+        }
+        return style;
+    }
+
+    function originalStyleFromOptions(layer) {
+        var o = layer.options;
+        return internStyle(o.color, o.weight, o.opacity, o.dashArray);
+    }
+
+    function resetAllStyles() {
+        var layers = window.hssAllFeatureLayers;
+        for (var i = 0, n = layers.length; i < n; i++) {
+            var l = layers[i];
+            if (l.options && l.options._hssOriginalStyle && l.setStyle) {
+                l.setStyle(l.options._hssOriginalStyle);
+            }
+        }
+        if (window.hssSelectedLayer && window.hssSelectedLayer.options && window.hssSelectedLayer.options._hssOriginalStyle) {
+            if (window.hssSelectedLayer.setStyle) {
+                window.hssSelectedLayer.setStyle(window.hssSelectedLayer.options._hssOriginalStyle);
+            }
+        }
+        applyHighlightStyles();
+    }
+
+    function applyHighlightStyles() {
+        var guids = window.hssHighlightGuids;
+        if (!guids) return;
+        var dimOpacity = (typeof window.hssHighlightDimOpacity === 'number') ? window.hssHighlightDimOpacity : 0.3;
+        var selected = window.hssSelectedLayer;
+        // Each base style maps to one lit and one dimmed variant per pass;
+        // look them up by object so the loop builds no style keys.
+        var litFor = new Map();
+        var dimFor = new Map();
+        var total = 0;
+        var highlighted = 0;
+        var dimmed = 0;
+        var layers = window.hssAllFeatureLayers;
+        for (var i = 0, n = layers.length; i < n; i++) {
+            var layer = layers[i];
+            var props = layer && layer.feature ? layer.feature.properties : null;
+            var guid = props ? props.guid : null;
+            if (!guid) continue;
+            total += 1;
+            if (selected === layer || !layer.setStyle) continue;
+            var options = layer.options;
+            var base = options._hssOriginalStyle;
+            if (!base) {
+                base = options._hssOriginalStyle = originalStyleFromOptions(layer);
+            }
+            var variants = guids[guid] ? litFor : dimFor;
+            var style = variants.get(base);
+            if (!style) {
+                style = internStyle(base.color, base.weight, variants === litFor ? 0.9 : dimOpacity, base.dashArray);
+                variants.set(base, style);
+            }
+            if (variants === litFor) {
+                highlighted += 1;
+            } else {
+                dimmed += 1;
+            }
+            layer.setStyle(style);
+        }
+        if (HSS_DEBUG) console.log('HSS iframe highlight applied', { total: total, highlighted: highlighted, dimmed: dimmed, dimOpacity: dimOpacity });
+    }
+
+    // Layers whose click handler is attached; entries go with the layer.
+    var hssBoundLayers = new WeakSet();
+
+    function bindFeatureLayer(layer) {
+        if (!layer || !layer.feature || !layer.feature.properties || !layer.feature.properties.guid) {
+            return;
+        }
+        indexFeatureLayer(layer);
+        // created_update re-binds drawn layers once they get a guid; the
+        // click handler only needs attaching the first time.
+        if (hssBoundLayers.has(layer)) return;
+        hssBoundLayers.add(layer);
+        layer.on('click', function(e) {
+            try {
+                if (window.L && L.DomEvent && e) {
+                    L.DomEvent.stopPropagation(e);
+                }
+            } catch (err) {}
+            var feature = layer.feature;
+            if (!feature || !feature.properties || !feature.properties.guid) {
+                return;
+            }
+            if (HSS_DEBUG) console.log('HSS iframe layer click', feature.properties.guid);
+            stopEditing(window.hssEditingLayer);
+            resetAllStyles();
+            window.hssSelectedLayer = layer;
+            if (!layer.options._hssOriginalStyle) {
+                layer.options._hssOriginalStyle = originalStyleFromOptions(layer);
+            }
+            window.hssSelectedStyle = layer.options._hssOriginalStyle;
+            if (layer.setStyle) {
+                layer.setStyle({ color: HSS_HL_COLOR, weight: HSS_HL_WEIGHT, opacity: 0.95 });
+            }
+            if (layer.pm) {
+                if (HSS_DEBUG) console.log('HSS iframe enable edit', feature.properties.guid);
+                attachEditHandlers(layer);
+                layer.pm.enable({ preventMarkerRemoval: true, allowSelfIntersection: true });
+                window.hssEditingLayer = layer;
+                setTimeout(function() {
+                    logPmOverlays('after enable');
+                }, 0);
+            }
+            sendSelected(feature, e.latlng);
+        });
+    }
+
+    // Geoman edit-lifecycle listeners live only on the layer being edited:
+    // attached just before its edit mode is enabled, removed when it stops
+    // being edited. One shared set of handlers serves every layer.
+    function editGuid(e) {
+        var l = e && e.target;
+        return l && l.feature && l.feature.properties ? l.feature.properties.guid : null;
+    }
+
+    function onEditDragEnd(e) {
+        var source = (e && e.type) ? e.type.replace('pm:', '') : 'dragend';
+        if (HSS_DEBUG) console.log('HSS iframe layer pm:' + source, editGuid(e));
+        queueEditedGeoJSON(e.target, source);
+    }
+
+    var hssEditHandlers = {
+        'pm:edit': function(e) {
+            if (HSS_DEBUG) console.log('HSS iframe layer pm:edit', editGuid(e));
+        },
+        'pm:editstart': function(e) {
+            if (HSS_DEBUG) console.log('HSS iframe layer pm:editstart', editGuid(e));
+            logPmOverlays('editstart');
+        },
+        'pm:editend': function(e) {
+            if (HSS_DEBUG) console.log('HSS iframe layer pm:editend', editGuid(e));
+            logPmOverlays('editend');
+        },
+        'pm:vertexdragend': onEditDragEnd,
+        'pm:markerdragend': onEditDragEnd,
+        'pm:vertexadded': function(e) {
+            if (HSS_DEBUG) console.log('HSS iframe layer pm:vertexadded', editGuid(e));
+        },
+        'pm:vertexremoved': function(e) {
+            if (HSS_DEBUG) console.log('HSS iframe layer pm:vertexremoved', editGuid(e));
+        }
+    };
+
+    function attachEditHandlers(layer) {
+        if (!layer || !layer.pm || layer._hssEditHandlers) return;
+        layer.on(hssEditHandlers);
+        layer._hssEditHandlers = true;
+    }
+
+    function detachEditHandlers(layer) {
+        if (!layer || !layer._hssEditHandlers) return;
+        layer.off(hssEditHandlers);
+        layer._hssEditHandlers = false;
+    }
+
+    // Re-syncs an editing layer's vertex markers after setLatLngs through
+    // Geoman's public API, keeping the edit options the layer was enabled with.
+    function refreshEditMarkers(layer) {
+        var pm = layer && layer.pm;
+        if (!pm || !pm.enabled || !pm.enabled()) return;
+        var opts = hssAssign({}, pm.options);
+        pm.disable();
+        pm.enable(opts);
+    }
+
+    function stopEditing(layer) {
+        if (!layer) return;
+        if (layer.pm) layer.pm.disable();
+        detachEditHandlers(layer);
+    }
+
+    function findLayerByGuid(guid) {
+        var found = window.hssLayersByGuid[guid] || null;
+        if (!found) {
+            if (HSS_DEBUG) console.log('HSS iframe update_style: layer not found for guid', guid);
+        }
+        return found;
+    }
+
+    function updateTooltip(layer) {
+        if (!layer || !layer.getTooltip) return;
+        var t = layer.getTooltip();
+        if (!t) return;
+        var props = layer.feature && layer.feature.properties ? layer.feature.properties : {};
+        var name = props.name || "";
+        var dir = props.OneWay || "";
+        var len = props.Length_m !== undefined ? props.Length_m : "";
+        var html = "<b>Name:</b> " + name + "<br><b>Direction:</b> " + dir + "<br><b>Length (m):</b> " + len;
+        t.setContent(html);
+    }
+
+    // setLatLngs converts [lat, lng] pairs into L.LatLng itself, so the
+    // server's coordinate arrays are handed over as-is (first line only).
+    function normalizeLatLngs(coords) {
+        if (!coords || !coords.length) return coords;
+        if (Array.isArray(coords[0]) && Array.isArray(coords[0][0])) {
+            return coords[0];
+        }
+        return coords;
+    }
+
+    // A drag fires layer and map edit events together; only the edited
+    // layer is remembered here and it is serialised once, when the burst
+    // settles, rather than on every event.
+    var hssEditTimer = null;
+    var hssEditLayer = null;
+    function queueEditedGeoJSON(layer, source) {
+        if (!layer || !layer.toGeoJSON) return;
+        if (hssEditLayer && hssEditLayer !== layer) {
+            flushEditedGeoJSON(source);
+        }
+        hssEditLayer = layer;
+        if (hssEditTimer) clearTimeout(hssEditTimer);
+        hssEditTimer = setTimeout(function() {
+            flushEditedGeoJSON(source);
+        }, 250);
+    }
+
+    function flushEditedGeoJSON(source) {
+        if (hssEditTimer) clearTimeout(hssEditTimer);
+        hssEditTimer = null;
+        var layer = hssEditLayer;
+        hssEditLayer = null;
+        if (!layer) return;
+        var payload = { features: [layer.toGeoJSON()] };
+        console.log('HSS iframe sending edited_geojson (debounced)', source || 'pm:edit', payload);
+        sendMessage("edited_geojson", payload);
+    }
+
+    var pending = hssPendingFeatureLayers;
+    hssPendingFeatureLayers = [];
+    for (var p = 0, np = pending.length; p < np; p++) {
+        bindFeatureLayer(pending[p]);
+    }
+    hssBindFeatureLayer = bindFeatureLayer;
+    map.on('layerremove', function(e) {
+        unindexFeatureLayer(e.layer);
+    });
+    map.on('layeradd', function(e) {
+        var l = e.layer;
+        if (l && !l._hssIndexed && l.feature && l.feature.properties && l.feature.properties.guid) {
+            indexFeatureLayer(l);
+        }
+    });
+    map.on('pm:edit', function(e) {
+        if (!e.layer) return;
+        if (HSS_DEBUG) console.log('HSS iframe pm:edit', e.layer);
+        queueEditedGeoJSON(e.layer, 'pm:edit');
+    });
+
+    map.on('pm:create', function(e) {
+        if (e.layer && e.layer.toGeoJSON) {
+            if (HSS_DEBUG) console.log('HSS iframe pm:create', e.layer);
+            var tempId = "tmp-" + Date.now() + "-" + Math.floor(Math.random() * 1000000);
+            e.layer._hssTempId = tempId;
+            if (!window.hssTempLayerMap) window.hssTempLayerMap = {};
+            window.hssTempLayerMap[tempId] = e.layer;
+            stopEditing(window.hssEditingLayer);
+            if (e.layer.pm) {
+                setTimeout(function() {
+                    e.layer.pm.enable({ allowSelfIntersection: true });
+                    window.hssEditingLayer = e.layer;
+                    if (e.layer.setStyle) {
+                        e.layer.setStyle({ color: HSS_HL_COLOR, weight: HSS_HL_WEIGHT, opacity: 0.95 });
+                    }
+                }, 150);
+            }
+            if (e.layer && e.layer.feature) {
+                setTimeout(function() {
+                    sendSelected(e.layer.feature, e.layer.getLatLngs ? e.layer.getLatLngs()[0] : null);
+                }, 0);
+            }
+            var gj = e.layer.toGeoJSON();
+            if (!gj.properties) gj.properties = {};
+            gj.properties._temp_id = tempId;
+            console.log('HSS iframe sending created_geojson', gj);
+            sendMessage("created_geojson", gj);
+        }
+    });
+
+    map.on('pm:drawstart', function() {
+        stopEditing(window.hssEditingLayer);
+        resetAllStyles();
+    });
+
+    map.on('pm:drawend', function() {
+        if (HSS_DEBUG) console.log('HSS iframe pm:drawend');
+    });
+
+    map.on('pm:editend', function() {
+        if (HSS_DEBUG) console.log('HSS iframe pm:editend');
+        logPmOverlays('map editend');
+    });
+
+    window.addEventListener('message', function(event) {
+        if (!event || !event.data || !event.data.type) return;
+        if (event.data.type === 'start_draw') {
+            if (map.pm) {
+                map.pm.enableDraw('Line', { snappable: false });
+            }
+        }
+        if (event.data.type === 'select_route') {
+            var payload = event.data.payload || {};
+            var guid = payload.guid;
+            if (!guid) return;
+            var layer = findLayerByGuid(guid);
+            if (layer && layer.fire) {
+                if (layer.getBounds && map.getBounds) {
+                    var layerBounds = layer.getBounds();
+                    if (layerBounds && (payload.zoom || !map.getBounds().contains(layerBounds))) {
+                        map.fitBounds(layerBounds, { padding: [20, 20] });
+                    }
+                }
+                var center = null;
+                if (layer.getBounds) {
+                    center = layer.getBounds().getCenter();
+                }
+                layer.fire('click', { latlng: center });
+            }
+        }
+        if (event.data.type === 'clear_selection') {
+            console.log('HSS iframe clear_selection');
+            try {
+                stopEditing(window.hssEditingLayer);
+                stopEditing(window.hssSelectedLayer);
+                if (layerGroup && layerGroup.eachLayer) {
+                    layerGroup.eachLayer(function(l) {
+                        try {
+                            if (l && l.pm && l.pm.enabled && l.pm.enabled()) {
+                                stopEditing(l);
+                            }
+                        } catch (err) {}
+                    });
+                }
+                if (map && map.pm && map.pm.getGeomanLayers) {
+                    var pmLayers = map.pm.getGeomanLayers();
+                    if (pmLayers && pmLayers.forEach) {
+                        pmLayers.forEach(function(l) {
+                            try {
+                                if (l && l.pm && l.pm.enabled && l.pm.enabled()) {
+                                    stopEditing(l);
+                                }
+                            } catch (err) {}
+                        });
+                    }
+                }
+                if (map && map.pm && map.pm.disableGlobalEditMode) {
+                    map.pm.disableGlobalEditMode();
+                }
+                if (map && map.pm && map.pm.disableGlobalDragMode) {
+                    map.pm.disableGlobalDragMode();
+                }
+                if (map && map.pm && map.pm.disableGlobalRotateMode) {
+                    map.pm.disableGlobalRotateMode();
+                }
+                if (map && map.pm && map.pm.disableGlobalRemovalMode) {
+                    map.pm.disableGlobalRemovalMode();
+                }
+                if (map && map.pm && map.pm.disableDraw) {
+                    map.pm.disableDraw();
+                }
+                if (map && map.pm && map.pm.disableGlobalCutMode) {
+                    map.pm.disableGlobalCutMode();
+                }
+            } catch (err) {}
+            window.hssEditingLayer = null;
+            window.hssSelectedLayer = null;
+            resetAllStyles();
+        }
+        if (event.data.type === 'update_style') {
+            var payload = event.data.payload || {};
+            var guid = payload.guid;
+            console.log('HSS iframe update_style: received payload', payload);
+            if (!guid) return;
+            var layer = findLayerByGuid(guid);
+            if (!layer) return;
+            if (payload.properties && layer.feature && layer.feature.properties) {
+                hssAssign(layer.feature.properties, payload.properties);
+            }
+            var baseColor = payload.style && payload.style.color ? payload.style.color : (layer.options.color || HSS_HL_COLOR);
+            var dashArray = payload.style && payload.style.dashArray ? payload.style.dashArray : null;
+            var baseWeight = payload.style && payload.style.weight ? payload.style.weight : null;
+            if (!baseWeight && layer.options && layer.options._hssOriginalStyle && layer.options._hssOriginalStyle.weight) {
+                baseWeight = layer.options._hssOriginalStyle.weight;
+            }
+            if (!baseWeight && layer.options && layer.options.weight) {
+                baseWeight = layer.options.weight;
+            }
+            if (!baseWeight) baseWeight = 3;
+            var baseStyle = internStyle(baseColor, baseWeight, 0.9, dashArray);
+            // Styles are interned, so an unchanged style is the same object:
+            // the layer already shows it and only its properties moved on.
+            if (baseStyle === layer.options._hssOriginalStyle) {
+                updateTooltip(layer);
+                if (HSS_DEBUG) console.log('HSS iframe update_style: style unchanged', guid);
+                return;
+            }
+            layer.options._hssOriginalStyle = baseStyle;
+            if (window.hssSelectedLayer === layer) {
+                if (layer.setStyle) {
+                    layer.setStyle({
+                        color: HSS_HL_COLOR,
+                        weight: HSS_HL_WEIGHT,
+                        opacity: 0.95,
+                        dashArray: dashArray
+                    });
+                }
+                if (HSS_DEBUG) console.log('HSS iframe update_style: applied highlight style', guid);
+            } else if (layer.setStyle) {
+                layer.setStyle(baseStyle);
+                if (HSS_DEBUG) console.log('HSS iframe update_style: applied base style', guid, baseStyle);
+            }
+            queueHighlight();
+            updateTooltip(layer);
+            if (HSS_DEBUG) console.log('HSS iframe update_style: updated tooltip', guid);
+        }
+        if (event.data.type === 'replace_geometry') {
+            var payload = event.data.payload || {};
+            var guid = payload.guid;
+            console.log('HSS iframe replace_geometry', payload);
+            if (!guid) return;
+            var layer = findLayerByGuid(guid);
+            if (!layer && window.hssEditingLayer) {
+                layer = window.hssEditingLayer;
+            }
+            if (!layer) {
+                if (HSS_DEBUG) console.log('HSS iframe replace_geometry: no layer for guid', guid);
+            }
+            if (!layer || !payload.coords || !layer.setLatLngs) return;
+            layer.setLatLngs(normalizeLatLngs(payload.coords));
+            if (layer.redraw) layer.redraw();
+            refreshEditMarkers(layer);
+            if (payload.properties && layer.feature && layer.feature.properties) {
+                hssAssign(layer.feature.properties, payload.properties);
+            }
+            updateTooltip(layer);
+            queueHighlight();
+        }
+        if (event.data.type === 'created_update') {
+            var payload = event.data.payload || {};
+            var tempId = payload.temp_id;
+            console.log('HSS iframe created_update', payload);
+            if (!tempId) return;
+            // pm:create registers every drawn layer in hssTempLayerMap.
+            var layer = window.hssTempLayerMap ? window.hssTempLayerMap[tempId] : null;
+            if (!layer) {
+                console.warn('HSS iframe temp layer missing', tempId);
+                return;
+            }
+            if (payload.guid) {
+                if (!layer.feature) layer.feature = layer.toGeoJSON();
+                if (!layer.feature.properties) layer.feature.properties = {};
+                layer.feature.properties.guid = payload.guid;
+            }
+            if (layerGroup && layerGroup.addLayer) {
+                layerGroup.addLayer(layer);
+            }
+            bindFeatureLayer(layer);
+            if (layer.pm && layer.pm.enabled && layer.pm.enabled()) {
+                // Drawn layers are already in edit mode from pm:create.
+                attachEditHandlers(layer);
+            }
+            if (payload.coords && layer.setLatLngs) {
+                layer.setLatLngs(normalizeLatLngs(payload.coords));
+                if (layer.redraw) layer.redraw();
+            }
+            refreshEditMarkers(layer);
+            if (payload.style && layer.setStyle) {
+                var dashArray = payload.style.dashArray || null;
+                layer.options._hssOriginalStyle = internStyle(payload.style.color, 3, 0.9, dashArray);
+                layer.setStyle({
+                    color: HSS_HL_COLOR,
+                    weight: HSS_HL_WEIGHT,
+                    opacity: 0.95,
+                    dashArray: dashArray
+                });
+            }
+            if (payload.properties && layer.feature && layer.feature.properties) {
+                hssAssign(layer.feature.properties, payload.properties);
+            }
+            window.hssSelectedLayer = layer;
+            updateTooltip(layer);
+        }
+        if (event.data.type === 'discard_created') {
+            var payload = event.data.payload || {};
+            var tempId = payload.temp_id;
+            console.log('HSS iframe discard_created', payload);
+            if (!tempId) return;
+            var layer = window.hssTempLayerMap ? window.hssTempLayerMap[tempId] : null;
+            if (!layer) {
+                console.warn('HSS iframe temp layer missing', tempId);
+                return;
+            }
+            if (map && map.removeLayer) {
+                map.removeLayer(layer);
+            }
+            delete window.hssTempLayerMap[tempId];
+        }
+    if (event.data.type === 'set_highlight') {
+        var payload = event.data.payload || {};
+        var list = payload.guids || [];
+        var active = payload.active !== false;
+        if (!active) {
+            window.hssHighlightGuids = null;
+            window.hssHighlightDimOpacity = null;
+            console.log('HSS iframe set_highlight cleared');
+            resetAllStyles();
+            return;
+        }
+        window.hssHighlightGuids = {};
+        window.hssHighlightDimOpacity = payload.dim_opacity;
+        list.forEach(function(g) { window.hssHighlightGuids[g] = true; });
+        console.log('HSS iframe set_highlight', list.length);
+        queueHighlight();
+    }
+        if (event.data.type === 'set_route_style') {
+            var payload = event.data.payload || {};
+            var colors = payload.colors || {};
+            var baseWeight = payload.weight || null;
+            if (!baseWeight) baseWeight = 3;
+        if (typeof baseWeight !== 'number') {
+            baseWeight = parseInt(baseWeight, 10);
+        }
+        if (!baseWeight || baseWeight < 1) baseWeight = 1;
+        if (baseWeight > 12) baseWeight = 12;
+        var highlightWeight = baseWeight + 2;
+        // Only the latest route style matters; restyle every layer in one
+        // frame-aligned pass.
+        queueStyleUpdate('routeStyle', function() {
+            var layers = window.hssAllFeatureLayers;
+            for (var i = 0, n = layers.length; i < n; i++) {
+                (function(l) {
+                    if (!l.setStyle) return;
+                    var props = l.feature.properties || {};
+                    if (!props.guid) return;
+                    var color = colors.polyline;
+                    if (props.Rejected) {
+                        color = colors.polyline_rejected || color;
+                    } else if (props.AuditedStreetView || props.AuditedInPerson) {
+                        color = colors.polyline_approved || color;
+                    }
+                    var dash = (props.OneWay === 'OneWay') ? hssOneWayDash : null;
+                    var style = internStyle(color || l.options.color, baseWeight, 0.9, dash);
+                    l.options._hssOriginalStyle = style;
+                    if (window.hssSelectedLayer === l) {
+                        l.setStyle({
+                            color: colors.polyline_highlight || HSS_HL_COLOR,
+                            weight: highlightWeight,
+                            opacity: 0.95,
+                            dashArray: dash
+                        });
+                    } else {
+                        l.setStyle(style);
+                    }
+                })(layers[i]);
+            }
+        });
+        window.hssHighlightDimOpacity = window.hssHighlightDimOpacity || payload.dim_opacity;
+        queueHighlight();
+    }
+    if (event.data.type === 'set_basemap') {
+        var payload = event.data.payload || {};
+        var name = payload.name || null;
+        if (!name || !hssBaseLayers[name]) return;
+        Object.keys(hssBaseLayers).forEach(function(key) {
+            if (key !== name && map.hasLayer(hssBaseLayers[key])) {
+                map.removeLayer(hssBaseLayers[key]);
+            }
+        });
+        if (!map.hasLayer(hssBaseLayers[name])) {
+            map.addLayer(hssBaseLayers[name]);
+        }
+    }
+    if (event.data.type === 'set_overlays') {
+        var payload = event.data.payload || {};
+        var overlays = payload.overlays || {};
+        Object.keys(overlays).forEach(function(name) {
+            if (!hssOverlayLayers[name]) return;
+            if (overlays[name]) {
+                if (!map.hasLayer(hssOverlayLayers[name])) {
+                    map.addLayer(hssOverlayLayers[name]);
+                }
+            } else {
+                if (map.hasLayer(hssOverlayLayers[name])) {
+                    map.removeLayer(hssOverlayLayers[name]);
+                }
+            }
+        });
+    }
+});
+
+    map.on('click', function(e) {
+        sendMessage("map_click", e.latlng);
+    });
+    map.on('baselayerchange', function(e) {
+        if (e && e.name) {
+            sendMessage('basemap_change', { name: e.name });
+        }
+    });
+    map.on('overlayadd', function(e) {
+        if (e && e.name) {
+            sendMessage('overlay_change', { name: e.name, visible: true });
+        }
+    });
+    map.on('overlayremove', function(e) {
+        if (e && e.name) {
+            sendMessage('overlay_change', { name: e.name, visible: false });
+        }
+    });
+
+    function logPmOverlays(label) {
+        if (!HSS_DEBUG) return;
+        try {
+            var nodes = Array.from(document.querySelectorAll('.leaflet-pane svg path, .leaflet-pane svg rect, .leaflet-pane svg g'));
+            var pmNodes = nodes.filter(function(el) {
+                var cls = el.getAttribute('class') || '';
+                return cls.indexOf('leaflet-pm') !== -1 || cls.indexOf('pm-') !== -1;
+            }).map(function(el) {
+                return {
+                    tag: el.tagName,
+                    className: el.getAttribute('class') || '',
+                    id: el.getAttribute('id') || ''
+                };
+            });
+            console.log('HSS pm overlays', label, pmNodes);
+        } catch (e) {
+            console.log('HSS pm overlays error', e);
+        }
+    }
+}
@@ -1,8 +1,7 @@
-import json
 from typing import Callable, List, Optional, Tuple
 
 from config import LCC_TFL_GEOJSON, TFL_GEOJSON, logger
-from geo_utils import sample_lat
+from geo_utils import read_json_file, sample_lat
 
 try:
     from shapely.geometry import shape
@@ -38,8 +37,7 @@ def _fallback_projector(lat0: float) -> Callable[[float, float], Tuple[float, fl
 
 def _load_geojson(path: str) -> Optional[dict]:
     try:
-        with open(path, "r", encoding="utf-8") as fh:
-            return json.load(fh)
+        return read_json_file(path)
     except Exception:
         logger.exception("Failed to load geojson %s", path)
         return None